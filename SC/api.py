@@ -0,0 +1,197 @@
+import base64
+import gzip
+import hashlib
+import json
+import zlib
+import logging
+
+from flask import Response, jsonify
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+API_VERSION = 1
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/html', 'text/csv', 'text/plain')
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # well past gzip's ratio on JSON while staying cheap enough per request
+
+# The item schema of each v1 endpoint; a response's ``items`` is a list of these
+ITEM_SCHEMAS = {
+    'table': {'index': 'table number on the page, from 0', 'rows': 'list of rows, each a list of cell strings'},
+    'image': {'url': 'absolute image URL'},
+    'video': {'url': 'absolute video URL'},
+    'news': {'text': 'headline'},
+    'pdf': {'url': 'absolute PDF URL', 'name': 'file name'},
+    'ebay': {'title': 'listing title', 'link': 'listing URL', 'image_url': 'image URL', 'price': 'price as shown',
+             'rating': 'seller rating as shown'},
+    'movie': {'name': 'title', 'poster_url': 'poster image URL', 'year': 'release year', 'rating': 'IMDb rating',
+              'plot': 'plot summary', 'genre': 'genres'},
+    'all': {'kind': 'table | image | video | news | pdf', '...': 'the fields of that kind'},
+    'pdf_info': {'page': 'page number, from 1', 'text': 'extracted text'},
+}
+
+
+class CursorError(ValueError):
+    pass
+
+
+def items_for(data_type, result):
+    """A scraper result as the flat list of items the v1 API pages through."""
+    if result is None:  # extractors report "nothing found" as None
+        return []
+    if data_type == 'table':
+        return [{'index': index, 'rows': rows} for index, rows in enumerate(result)]
+    if data_type in ('image', 'video'):
+        return [{'url': url} for url in result]
+    if data_type == 'news':
+        return [{'text': text} for text in result]
+    if data_type in ('pdf', 'ebay'):
+        return list(result)
+    if data_type == 'movie':
+        return [result]
+    if data_type == 'all':
+        sections = (('table', items_for('table', result['tables'])), ('image', items_for('image', result['images:all'])),
+                    ('video', items_for('video', result['videos:all'])), ('news', items_for('news', result['headlines'])),
+                    ('pdf', items_for('pdf', result['pdf_links'])))
+        return [dict(item, kind=kind) for kind, items in sections for item in items]
+    raise ValueError(f"Unsupported data_type: {data_type}")
+
+
+def content_hash(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+def encode_cursor(offset, digest):
+    """An opaque cursor for the item at offset, tied to the result it came from."""
+    raw = json.dumps({'o': offset, 'h': digest[:16]}, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, digest):
+    """The offset a cursor points at. Raises CursorError if it is malformed or the result has changed since."""
+    if not cursor:
+        return 0
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        offset, cursor_digest = int(data['o']), data['h']
+    except (ValueError, TypeError, KeyError):
+        raise CursorError("Invalid cursor.")
+    if cursor_digest != digest[:16]:
+        raise CursorError("The result changed since this cursor was issued; start again without a cursor.")
+    return max(offset, 0)
+
+
+def page_size(value):
+    """The ?limit= page size, clamped to 1..MAX_PAGE_SIZE. Raises ValueError if it is not an integer."""
+    if value in (None, ''):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(value), MAX_PAGE_SIZE))
+
+
+def _etag_matches(request, etag):
+    # A compressed response's tag carries an encoding suffix (see compress_response); any encoding of it matches
+    return any(tag.split('-', 1)[0] == etag for tag in request.if_none_match.as_set()) or request.if_none_match.star_tag
+
+
+def paged_response(request, data_type, query, items, limit, cursor=None, **extra):
+    """A v1 response: one page of items with a cursor for the next, and a strong ETag.
+
+    The ETag covers the whole result's content hash plus the page, so a
+    client revalidating an unchanged result gets a bodiless 304 and the
+    page is never serialized.
+    """
+    digest = content_hash([items, extra])
+    offset = decode_cursor(cursor, digest)
+    etag = f"{digest[:32]}.{offset}.{limit}"
+    if _etag_matches(request, etag):
+        response = Response(status=304)
+    else:
+        page = items[offset:offset + limit]
+        next_offset = offset + len(page)
+        response = jsonify(dict(extra, success=True, api_version=API_VERSION, data_type=data_type, query=query,
+                                content_hash=digest, total=len(items), offset=offset, items=page,
+                                next_cursor=encode_cursor(next_offset, digest) if next_offset < len(items) else None))
+    response.set_etag(etag)
+    response.cache_control.no_cache = True  # always revalidate; unchanged results cost a 304
+    return response
+
+
+def negotiate_encoding(request):
+    """'br', 'gzip' or None, from Accept-Encoding quality values (br only when the brotli module is installed)."""
+    accepted = request.accept_encodings
+    best, best_quality = None, 0
+    for encoding in (('br',) if brotli is not None else ()) + ('gzip',):
+        quality = accepted[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _compress_stream(chunks, encoding):
+    # Flush after every chunk so NDJSON lines still reach the client as they are produced
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        flush, finish = compressor.flush, compressor.finish
+        compress = compressor.process
+    else:
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        compress = compressor.compress
+        flush, finish = (lambda: compressor.flush(zlib.Z_SYNC_FLUSH)), compressor.flush
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compress(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def compress_response(request, response):
+    """Compress text and JSON responses (streamed ones chunk by chunk) per Accept-Encoding."""
+    if response.status_code == 304:
+        # Answer with the tag of the encoding the client revalidated, if that is what it sent
+        etag, weak = response.get_etag()
+        encoding = negotiate_encoding(request)
+        if etag and not weak and encoding and f"{etag}-{encoding}" in request.if_none_match.as_set():
+            response.set_etag(f"{etag}-{encoding}")
+        return response
+    if (response.status_code < 200 or response.status_code in (204, 206) or response.direct_passthrough
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(request)
+    if encoding is None:
+        return response
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < MIN_COMPRESS_BYTES:
+            return response
+        with metrics.span('compress'):
+            if encoding == 'br':
+                data = brotli.compress(data, quality=BROTLI_QUALITY)
+            else:
+                data = gzip.compress(data, GZIP_LEVEL, mtime=0)
+        response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # Each encoding is a different byte sequence, so it gets its own strong tag
+        response.set_etag(f"{etag}-{encoding}")
+    return response
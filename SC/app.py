@@ -1,17 +1,29 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context, g, before_render_template, template_rendered
 import requests
-from bs4 import BeautifulSoup
 import os
-import re
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import pdfplumber
+import json
+import time
+import threading
 import logging
+import fetcher
+import metrics
+from scrapers import SCRAPERS, register as register_scraper, lazy_import, mark_ready, startup_report
+from fetcher import fetch_page
+from driver_pool import driver_pool, PoolTimeout
+from batch import run_batch, host_of
+from pdf_extract import extract_pdf
+from pdf_cache import pdf_cache
+from ebay import iter_ebay_products, DEFAULT_PRODUCTS
+from news_monitor import news_monitor
+from result_store import result_store
+from crawler import crawl, DEFAULT_DEPTH, DEFAULT_PAGES
+from jobs import job_queue, JobQueueFull, DEFAULT_TIMEOUT as DEFAULT_JOB_TIMEOUT
+from table_export import data_tables, csv_lines, ndjson_lines, columnar
+import media
+import api
+from movies import lookup_movie, cached_movie, normalize_query, movie_cache, MovieNotFound
+from extractors import (EXTRACTORS, TableExtractor, ImageExtractor, VideoExtractor,
+                        HeadlineExtractor, PdfLinkExtractor, extract_page, extract_url, run_extractors)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -19,485 +31,899 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# Per-request sampling profiles (?profile=1) are only taken when this is set
+PROFILING_ENABLED = os.environ.get('SCRAPER_PROFILING') == '1'
+
+@app.before_request
+def start_request_timing():
+    g.request_started = time.perf_counter()
+    metrics.begin_request()
+    g.profiler = None
+    if PROFILING_ENABLED and request.args.get('profile') == '1':
+        g.profiler = metrics.SamplingProfiler(threading.get_ident()).start()
+
+@app.after_request
+def finish_request_timing(response):
+    """Record request duration and size, and report this request's phases in a Server-Timing header.
+
+    Streamed responses are measured up to the first byte.
+    """
+    elapsed = time.perf_counter() - g.get('request_started', time.perf_counter())
+    endpoint = request.endpoint or 'unknown'
+    metrics.request_seconds.observe(elapsed, endpoint=endpoint, method=request.method,
+                                    status=str(response.status_code))
+    if not response.is_streamed:
+        metrics.response_size.observe(response.calculate_content_length() or 0, endpoint=endpoint)
+    spans = metrics.end_request() + [('total', elapsed)]
+    response.headers['Server-Timing'] = metrics.server_timing(spans)
+    profiler = g.get('profiler')
+    if profiler is not None:
+        g.profiler = None
+        response.headers['X-Profile-Id'] = metrics.save_profile(profiler.stop(), f"{request.method} {request.path}")
+    return response
+
+@app.after_request
+def compress(response):
+    # Registered after the timing hook, so it runs first and the recorded size is the compressed one
+    return api.compress_response(request, response)
+
+@before_render_template.connect_via(app)
+def start_render_timing(sender, template, context, **extra):
+    g.render_started = time.perf_counter()
+
+@template_rendered.connect_via(app)
+def finish_render_timing(sender, template, context, **extra):
+    if 'render_started' in g:
+        metrics.record('render', time.perf_counter() - g.pop('render_started'))
+
+# Result store kind for each data_type whose results are worth searching later
+RESULT_KINDS = {'table': 'tables', 'news': 'headlines', 'pdf': 'pdf_links', 'movie': 'movie', 'ebay': 'ebay'}
+
+def remember(data_type, target, result):
+    """Queue a scrape result for the result store; 'all' results are stored per part. Never blocks."""
+    if not result:
+        return
+    if data_type == 'all':
+        for part, kind in (('tables', 'tables'), ('headlines', 'headlines'), ('pdf_links', 'pdf_links')):
+            result_store.record(kind, target, result.get(part))
+    elif data_type in RESULT_KINDS:
+        result_store.record(RESULT_KINDS[data_type], target, result)
+
+def parse_limit(value):
+    """A positive item count from a form field, or None for 'no limit'."""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+@app.context_processor
+def scraper_choices():
+    return {'scrapers': SCRAPERS}
+
 @app.route('/', methods=['GET', 'POST'])
 def index():
+    """Render the form; on POST, run the registered scraper for the chosen data_type."""
     if request.method == 'POST':
         url = request.form.get('url')
-        data_type = request.form.get('data_type')
-    
-        if url and data_type == 'table':
-            tables = scrape_tables(url)
-            if tables:
-                if 'table_number' in request.form:
-                    selected_tables = request.form.getlist('table_number')
-                    selected_tables = [int(i) for i in selected_tables]
-                    return render_template('index.html', tables=tables, url=url, 
-                                        selected_tables=selected_tables, data_type='table')
-                return render_template('index.html', tables=tables, url=url, data_type='table')
-            else:
-                return render_template('index.html', error="No tables found on this page.", url=url, data_type='table')
-
-        elif url and data_type == 'image':
-            image_format = request.form.get('image_format', 'all')
-            num_images = request.form.get('num_images')
-            images = scrape_images(url, image_format)
-            if images:
-                if num_images:
-                    try:
-                        num_images = int(num_images)
-                        images = images[:num_images]
-                    except ValueError:
-                        pass
-                return render_template('index.html', images=images, url=url, 
-                                     data_type='image', image_format=image_format,
-                                     num_images=num_images or len(images))
-            else:
-                return render_template('index.html', error="No images found on this page.", url=url, data_type='image')
+        scraper = SCRAPERS.get(request.form.get('data_type'))
+        if url and scraper:
+            return render_template('index.html', **scraper.view(url, request.form))
 
-        elif url and data_type == 'movie':
-            movie_data = scrape_movie_details(url)
-            if "error" in movie_data:
-                return render_template('index.html', error=movie_data["error"], data_type='movie')
-            else:
-                return render_template('index.html', movie_data=movie_data, data_type='movie')
-            
-        elif url and data_type == 'video':
-            video_format = request.form.get('video_format', 'all')
-            num_videos = request.form.get('num_videos')
-            video_data = scrape_videos(url, video_format)
-            if video_data:
-                if num_videos:
-                    try:
-                        num_videos = int(num_videos)
-                        video_data = video_data[:num_videos]
-                    except ValueError:
-                        pass
-                return render_template('index.html', video_data=video_data, url=url, 
-                                     data_type='video', video_format=video_format,
-                                     num_videos=num_videos or len(video_data))
-            else:
-                return render_template('index.html', error="No videos found on this page.", url=url, data_type='video')
-
-        elif url and data_type == 'ebay':
-            product_name = request.form.get('url')  # Use 'url' field for product name
-            num_products = request.form.get('num_products')
-            if product_name:
-                product_details = scrape_ebay_product(product_name)
-                if product_details:
-                    if num_products:
-                        try:
-                            num_products = int(num_products)
-                            product_details = product_details[:num_products]
-                        except ValueError:
-                            pass
-                    return render_template('index.html', product_details=product_details, url=product_name, 
-                                         data_type='ebay', num_products=num_products or len(product_details))
-                else:
-                    return render_template('index.html', error="No products found on eBay.", data_type='ebay')
-            else:
-                return render_template('index.html', error="Please enter a product name.", data_type='ebay')
-
-        elif url and data_type == 'news':
-            num_headlines = request.form.get('num_headlines')
-            headlines = scrape_news_headlines(url)
-            if headlines:
-                if num_headlines:
-                    try:
-                        num_headlines = int(num_headlines)
-                        headlines = headlines[:num_headlines]
-                    except ValueError:
-                        pass
-                return render_template('index.html', headlines=headlines, url=url, 
-                                     data_type='news', num_headlines=num_headlines or len(headlines))
-            else:
-                return render_template('index.html', error="No verified headlines found on this page.", url=url, data_type='news')
+    return render_template('index.html', tables=None, images=None, movie_data=None, video_data=None, headlines=None, pdf_links=None, product_details=None, error=None)
 
-        elif url and data_type == 'pdf':
-            pdf_links = scrape_pdf_links(url)
-            if pdf_links:
-                return render_template('index.html', pdf_links=pdf_links, url=url, data_type='pdf')
-            else:
-                return render_template('index.html', error="No PDF files found on this page.", url=url, data_type='pdf')
+# Each data_type the form offers; a view returns the template context for its result
 
-    return render_template('index.html', tables=None, images=None, movie_data=None, video_data=None, headlines=None, pdf_links=None, product_details=None, error=None)
+@register_scraper('table', 'Table', {'tables': 'list of tables, each a list of rows of cell strings',
+                                     'selected_tables': 'table indexes picked for display'},
+                  extractor=TableExtractor)
+def table_view(url, form):
+    tables = scrape_tables(url)
+    if not tables:
+        return {'error': "No tables found on this page.", 'url': url, 'data_type': 'table'}
+    if 'table_number' in form:
+        selected_tables = [int(i) for i in form.getlist('table_number')]
+        return {'tables': tables, 'url': url, 'selected_tables': selected_tables, 'data_type': 'table'}
+    return {'tables': tables, 'url': url, 'data_type': 'table'}
+
+@register_scraper('image', 'Image', {'images': 'list of image URLs', 'image_format': 'all | png | jpg',
+                                     'num_images': 'number shown'},
+                  extractor=ImageExtractor)
+def image_view(url, form):
+    image_format = form.get('image_format', 'all')
+    num_images = parse_limit(form.get('num_images'))
+    images = scrape_images(url, image_format, num_images)
+    if images:
+        images, media_info = media.checked_media(images, 'image')
+    if not images:
+        return {'error': "No images found on this page.", 'url': url, 'data_type': 'image'}
+    return {'images': images, 'url': url, 'data_type': 'image', 'image_format': image_format,
+            'num_images': num_images or len(images), 'media_info': media_info}
+
+@register_scraper('movie', 'Movie', {'movie_data': 'name, poster_url, year, rating, plot, genre'})
+def movie_view(url, form):
+    movie_data = scrape_movie_details(url)
+    if "error" in movie_data:
+        return {'error': movie_data["error"], 'data_type': 'movie'}
+    return {'movie_data': movie_data, 'data_type': 'movie'}
+
+@register_scraper('video', 'Video', {'video_data': 'list of video URLs', 'video_format': 'all | mp4 | webm | ogg',
+                                     'num_videos': 'number shown'},
+                  extractor=VideoExtractor)
+def video_view(url, form):
+    video_format = form.get('video_format', 'all')
+    num_videos = parse_limit(form.get('num_videos'))
+    video_data = scrape_videos(url, video_format, num_videos)
+    if video_data:
+        video_data, media_info = media.checked_media(video_data, 'video')
+    if not video_data:
+        return {'error': "No videos found on this page.", 'url': url, 'data_type': 'video'}
+    return {'video_data': video_data, 'url': url, 'data_type': 'video', 'video_format': video_format,
+            'num_videos': num_videos or len(video_data), 'media_info': media_info}
+
+@register_scraper('ebay', 'e-Bay Product', {'product_details': 'list of title, link, image_url, price, rating',
+                                            'num_products': 'number shown'})
+def ebay_view(product_name, form):
+    # The 'url' field carries the product name
+    num_products = parse_limit(form.get('num_products'))
+    product_details = scrape_ebay_product(product_name, num_products or DEFAULT_PRODUCTS)
+    if not product_details:
+        return {'error': "No products found on eBay.", 'data_type': 'ebay'}
+    return {'product_details': product_details, 'url': product_name, 'data_type': 'ebay',
+            'num_products': num_products or len(product_details)}
+
+@register_scraper('news', 'News Headlines', {'headlines': 'list of headline strings', 'num_headlines': 'number shown'},
+                  extractor=HeadlineExtractor)
+def news_view(url, form):
+    num_headlines = parse_limit(form.get('num_headlines'))
+    headlines = scrape_news_headlines(url, num_headlines)
+    if not headlines:
+        return {'error': "No verified headlines found on this page.", 'url': url, 'data_type': 'news'}
+    return {'headlines': headlines, 'url': url, 'data_type': 'news', 'num_headlines': num_headlines or len(headlines)}
+
+@register_scraper('pdf', 'PDF Files', {'pdf_links': 'list of url, name',
+                                       'pdf_job_id': 'set instead when the Selenium fallback runs as a job'},
+                  extractor=PdfLinkExtractor,
+                  backends=('selenium', 'webdriver_manager'))
+def pdf_view(url, form):
+    try:
+        pdf_links = static_pdf_links(url)
+    except requests.exceptions.RequestException as e:
+        return {'error': f"Could not fetch this page: {e}", 'url': url, 'data_type': 'pdf'}
+    if pdf_links:
+        remember('pdf', url, pdf_links)
+        return {'pdf_links': pdf_links, 'url': url, 'data_type': 'pdf'}
+    # Nothing in the static HTML: the browser fallback is slow, so it runs as a job the page polls
+    try:
+        job, _ = job_queue.submit('scrape', {'url': url, 'data_type': 'pdf'})
+    except JobQueueFull as e:
+        return {'error': str(e), 'url': url, 'data_type': 'pdf'}
+    return {'pdf_job_id': job.id, 'url': url, 'data_type': 'pdf'}
+
+@register_scraper('all', 'Everything on the Page', {'tables': 'as for table', 'images': 'as for image',
+                                                    'video_data': 'as for video', 'headlines': 'as for news',
+                                                    'pdf_links': 'as for pdf'})
+def everything_view(url, form):
+    results = scrape_everything(url)
+    if results is None:
+        return {'error': "Could not fetch this page.", 'url': url, 'data_type': 'all'}
+    images, image_info = media.checked_media(results['images:all'], 'image')
+    video_data, video_info = media.checked_media(results['videos:all'], 'video')
+    return {'url': url, 'data_type': 'all', 'tables': results['tables'], 'images': images,
+            'video_data': video_data, 'headlines': results['headlines'],
+            'pdf_links': results['pdf_links'], 'image_format': 'all', 'video_format': 'all',
+            'media_info': dict(image_info, **video_info)}
+
+@app.route('/api/scrapers')
+def api_scrapers():
+    """Registered data types with their output schema, plus worker start-up and backend import costs."""
+    return jsonify({'success': True, 'scrapers': [scraper.describe() for scraper in SCRAPERS.values()],
+                    'startup': startup_report()})
 
 @app.route('/extract_pdf_info', methods=['POST'])
 def extract_pdf_info():
-    """Extract text and metadata from a PDF URL."""
+    """Extract text and metadata from a PDF URL.
+
+    Optional form fields: ``pages`` selects a page range such as ``1-5,9``;
+    ``stream=1`` returns NDJSON (metadata first, then one line per page as
+    it is extracted) instead of a single JSON document.
+    """
     pdf_url = request.form.get('pdf_url')
     try:
-        # Download the PDF
-        response = requests.get(pdf_url, timeout=10)
-        response.raise_for_status()
-        
-        # Save PDF temporarily
-        temp_file = 'temp.pdf'
-        with open(temp_file, 'wb') as f:
-            f.write(response.content)
-        
-        # Extract text and metadata using pdfplumber
-        with pdfplumber.open(temp_file) as pdf:
-            # Extract text
-            text = ""
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-            
-            # Extract metadata (if available)
-            metadata = pdf.metadata if pdf.metadata else {}
-            title = metadata.get('Title', 'N/A')
-            author = metadata.get('Author', 'N/A')
-            page_count = len(pdf.pages)
-        
-        # Clean up
-        os.remove(temp_file)
-        
-        return jsonify({
-            'success': True,
-            'text': text,  # Return full text
-            'title': title,
-            'author': author,
-            'page_count': page_count
-        })
+        # Served from the content cache when this PDF was extracted before
+        info, page_indexes, page_texts = extract_pdf(pdf_url, request.form.get('pages'))
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
-def scrape_tables(url):
+    if request.form.get('stream') == '1':
+        def generate():
+            pages = []
+            try:
+                yield json.dumps(dict(info, success=True, pages=len(page_indexes))) + '\n'
+                for number, page_text in page_texts:
+                    pages.append([number, page_text])
+                    yield json.dumps({'page': number, 'text': page_text}) + '\n'
+                remember_pdf_text(pdf_url, info, pages)
+                yield json.dumps({'done': True}) + '\n'
+            except Exception as e:
+                yield json.dumps({'success': False, 'error': str(e)}) + '\n'
+            finally:
+                page_texts.close()
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    try:
+        pages = [[number, page_text] for number, page_text in page_texts]
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
+    finally:
+        page_texts.close()
+    remember_pdf_text(pdf_url, info, pages)
+    text = ''.join(page_text + "\n" for _, page_text in pages if page_text)
+
+    return jsonify({
+        'success': True,
+        'text': text,  # Return full text
+        'title': info['title'],
+        'author': info['author'],
+        'page_count': info['page_count']
+    })
+
+API_QUERY_TYPES = ('movie', 'ebay')  # take ?q= (a name) instead of ?url=
+API_OPTIONS = {'image': ('image_format',), 'video': ('video_format',), 'ebay': ('num_products',)}
+
+@app.route('/api/v1')
+def api_v1_index():
+    """The v1 endpoints and the schema of the items each returns."""
+    endpoints = {data_type: {'path': f'/api/v1/{data_type}', 'param': 'q' if data_type in API_QUERY_TYPES else 'url',
+                             'options': list(API_OPTIONS.get(data_type, ())), 'item': api.ITEM_SCHEMAS[data_type]}
+                 for data_type in SCRAPERS}
+    endpoints['pdf_info'] = {'path': '/api/v1/pdf_info', 'param': 'url', 'options': ['pages'],
+                             'item': api.ITEM_SCHEMAS['pdf_info']}
+    return jsonify({'success': True, 'api_version': api.API_VERSION, 'endpoints': endpoints,
+                    'paging': {'limit': f"1-{api.MAX_PAGE_SIZE}, default {api.DEFAULT_PAGE_SIZE}",
+                               'cursor': "next_cursor from the previous page"}})
+
+@app.route('/api/v1/pdf_info')
+def api_v1_pdf_info():
+    """PDF metadata plus its page text, a page of pages at a time: ?url=...&pages=1-5&limit=&cursor="""
+    pdf_url = request.args.get('url', '').strip()
+    if not pdf_url:
+        return jsonify({'success': False, 'error': "Missing 'url'."}), 400
+    try:
+        limit = api.page_size(request.args.get('limit'))
+    except ValueError:
+        return jsonify({'success': False, 'error': "'limit' must be an integer."}), 400
+    try:
+        info, page_indexes, page_texts = extract_pdf(pdf_url, request.args.get('pages'))
+        try:
+            pages = [[number, page_text] for number, page_text in page_texts]
+        finally:
+            page_texts.close()
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 502
+    remember_pdf_text(pdf_url, info, pages)
+    items = [{'page': number, 'text': page_text} for number, page_text in pages]
+    document = {'title': info['title'], 'author': info['author'], 'page_count': info['page_count']}
+    try:
+        return api.paged_response(request, 'pdf_info', {'url': pdf_url, 'pages': request.args.get('pages')}, items,
+                                  limit, request.args.get('cursor'), document=document)
+    except api.CursorError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+
+@app.route('/api/v1/<data_type>')
+def api_v1_scrape(data_type):
+    """One scraper's result as a stable, paginated JSON document (see /api/v1 for item schemas).
+
+    ?url= (or ?q= for movie and ebay), the scraper's options, ?limit= and
+    ?cursor=. Unchanged results revalidate to 304 through the ETag.
+    """
+    if data_type not in SCRAPERS:
+        return jsonify({'success': False, 'error': f"Unsupported data_type: {data_type}"}), 404
+    param = 'q' if data_type in API_QUERY_TYPES else 'url'
+    target = request.args.get(param, '').strip()
+    if not target:
+        return jsonify({'success': False, 'error': f"Missing '{param}'."}), 400
+    options = {name: request.args[name] for name in API_OPTIONS.get(data_type, ()) if name in request.args}
+    if (options.get('image_format', 'all') not in ImageExtractor.allowed_formats
+            or options.get('video_format', 'all') not in ('all',) + tuple(VideoExtractor.allowed_formats)):
+        return jsonify({'success': False, 'error': "Unsupported image_format or video_format."}), 400
+    try:
+        limit = api.page_size(request.args.get('limit'))
+        result = scrape_for_batch(target, data_type, options)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except MovieNotFound as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except requests.exceptions.RequestException as e:
+        return jsonify({'success': False, 'error': str(e)}), 502
+    remember(data_type, target, result)
+    try:
+        return api.paged_response(request, data_type, dict(options, **{param: target}), api.items_for(data_type, result),
+                                  limit, request.args.get('cursor'))
+    except api.CursorError as e:
+        return jsonify({'success': False, 'error': str(e)}), 409
+
+MAX_BATCH_SIZE = 500
+PAGE_DATA_TYPES = ('table', 'image', 'video', 'news', 'pdf', 'all')
+
+@app.route('/api/batch', methods=['POST'])
+def api_batch():
+    """Scrape many URLs (or movie/product names) concurrently, streaming NDJSON results as they finish."""
+    payload = request.get_json(silent=True) or {}
+    targets = payload.get('urls') or []
+    data_type = payload.get('data_type')
+    options = payload.get('options') or {}
+    if data_type not in PAGE_DATA_TYPES + ('movie', 'ebay'):
+        return jsonify({'success': False, 'error': f"Unsupported data_type: {data_type}"}), 400
+    if not isinstance(targets, list) or not targets or not all(isinstance(t, str) and t for t in targets):
+        return jsonify({'success': False, 'error': "'urls' must be a non-empty list of strings."}), 400
+    if len(targets) > MAX_BATCH_SIZE:
+        return jsonify({'success': False, 'error': f"At most {MAX_BATCH_SIZE} URLs per batch."}), 400
+
+    if data_type == 'movie':
+        host = lambda target: 'www.imdb.com'
+    elif data_type == 'ebay':
+        host = lambda target: 'www.ebay.com'
+    else:
+        host = host_of
+
+    def generate():
+        for item in run_batch(targets, lambda target: scrape_for_batch(target, data_type, options), host=host):
+            if item['success']:
+                remember(data_type, item['target'], item['result'])
+            yield json.dumps(item) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def remember_pdf_text(pdf_url, info, pages):
+    result_store.record('pdf_text', pdf_url, {'title': info['title'], 'author': info['author'],
+                                              'page_count': info['page_count'], 'pages': pages})
+
+def scrape_for_batch(target, data_type, options):
+    """Run one batch item, raising on failure instead of returning None."""
+    if data_type == 'movie':
+        return lookup_movie(target)
+    if data_type == 'ebay':
+        return list(iter_ebay_products(target, int(options.get('num_products', DEFAULT_PRODUCTS))))
+
+    response = fetch_page(target, profile='browser' if data_type in ('news', 'pdf', 'all') else 'default')
+    response.raise_for_status()
+    if data_type == 'all':
+        return extract_page(response, [extractor(target) for extractor in EXTRACTORS.values()])
+    if data_type == 'image':
+        extractor = ImageExtractor(target, options.get('image_format', 'all'))
+    elif data_type == 'video':
+        extractor = VideoExtractor(target, options.get('video_format', 'all'))
+    else:
+        extractor = EXTRACTORS[data_type](target)
+    return extract_page(response, [extractor])[extractor.key]
+
+@app.route('/api/ebay')
+def api_ebay():
+    """Stream eBay listings as NDJSON while result pages are still being fetched."""
+    product_name = request.args.get('q', '').strip()
+    if not product_name:
+        return jsonify({'success': False, 'error': "Please enter a product name."}), 400
+    try:
+        count = int(request.args.get('count', DEFAULT_PRODUCTS))
+    except ValueError:
+        return jsonify({'success': False, 'error': "'count' must be an integer."}), 400
+
+    def generate():
+        products = []
+        try:
+            for product in iter_ebay_products(product_name, count):
+                products.append(product)
+                yield json.dumps(product) + '\n'
+            remember('ebay', product_name, products)
+        except requests.RequestException as e:
+            yield json.dumps({'success': False, 'error': f"Failed to fetch eBay page: {e}"}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/movies', methods=['POST'])
+def api_movies():
+    """Resolve a list of movie names concurrently, streaming NDJSON records (cached ones first)."""
+    payload = request.get_json(silent=True) or {}
+    names = payload.get('names') or []
+    if not isinstance(names, list) or not names or not all(isinstance(n, str) and n.strip() for n in names):
+        return jsonify({'success': False, 'error': "'names' must be a non-empty list of strings."}), 400
+    if len(names) > MAX_BATCH_SIZE:
+        return jsonify({'success': False, 'error': f"At most {MAX_BATCH_SIZE} names per request."}), 400
+
+    # One lookup per distinct normalized name
+    unique_names = list({normalize_query(name): name for name in names}.values())
+
+    def generate():
+        uncached = []
+        for index, name in enumerate(unique_names):
+            record = cached_movie(name)
+            if record is None:
+                uncached.append(name)
+            else:
+                yield json.dumps({'index': index, 'target': name, 'success': True, 'result': record, 'cached': True}) + '\n'
+        for item in run_batch(uncached, lookup_movie, host=lambda name: 'www.imdb.com', host_delay=0.1):
+            item['index'] = unique_names.index(item['target'])
+            if item['success']:
+                remember('movie', item['target'], item['result'])
+            yield json.dumps(item) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/news/monitor', methods=['GET', 'POST', 'DELETE'])
+def api_news_monitor():
+    """Register (POST) or drop (DELETE) monitored news URLs; GET returns headlines first seen after ?since=<event id>."""
+    if request.method == 'GET':
+        try:
+            since = int(request.args.get('since', 0))
+        except ValueError:
+            return jsonify({'success': False, 'error': "'since' must be an event id."}), 400
+        events = news_monitor.events(since)
+        return jsonify({'success': True, 'events': events, 'last_id': events[-1]['id'] if events else since,
+                        'feeds': news_monitor.feeds()})
+
+    payload = request.get_json(silent=True) or {}
+    urls = payload.get('urls') or []
+    if not isinstance(urls, list) or not urls or not all(isinstance(u, str) and u.startswith(('http://', 'https://')) for u in urls):
+        return jsonify({'success': False, 'error': "'urls' must be a non-empty list of http(s) URLs."}), 400
+    if request.method == 'DELETE':
+        removed = [url for url in urls if news_monitor.unregister(url)]
+        return jsonify({'success': True, 'removed': removed})
+    try:
+        interval = float(payload.get('interval', 300))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': "'interval' must be a number of seconds."}), 400
+    for url in urls:
+        news_monitor.register(url, interval)
+    return jsonify({'success': True, 'feeds': news_monitor.feeds()})
+
+def run_scrape_job(job, params):
+    """Background version of a batch item: one URL (or name) and data type."""
+    if params.get('data_type') not in PAGE_DATA_TYPES + ('movie', 'ebay'):
+        raise ValueError(f"Unsupported data_type: {params.get('data_type')}")
+    result = scrape_for_batch(params['url'], params['data_type'], params.get('options') or {})
+    if params['data_type'] == 'pdf' and not result:
+        # Same fallback as scrape_pdf_links: links added by scripts need a real browser
+        job.report(stage='selenium')
+        job.check()
+        result = browser_pdf_links(params['url']) or []
+    remember(params['data_type'], params['url'], result)
+    return result
+
+def run_pdf_info_job(job, params):
+    """Background version of /extract_pdf_info; reports each page as it is extracted."""
+    info, page_indexes, page_texts = extract_pdf(params['pdf_url'], params.get('pages'))
+    job.report(pages=len(page_indexes))
+    pages = []
     try:
-        response = requests.get(url, timeout=10)
+        for number, page_text in page_texts:
+            job.check()
+            pages.append([number, page_text])
+            job.report(page=number)
+    finally:
+        page_texts.close()
+    remember_pdf_text(params['pdf_url'], info, pages)
+    text = [page_text + "\n" for _, page_text in pages if page_text]
+    return {'text': ''.join(text), 'title': info['title'], 'author': info['author'], 'page_count': info['page_count']}
+
+def run_crawl_job(job, params):
+    """Background crawl: every discovery is reported as progress, the summary and documents are the result."""
+    found = []
+    for event in crawl(params['url'], **crawl_options(params)):
+        job.check()
+        job.report(**event)
+        if event['type'] in ('pdf', 'image', 'video'):
+            found.append(event)
+    return {'summary': event, 'found': found}
+
+job_queue.register('scrape', run_scrape_job)
+job_queue.register('pdf_info', run_pdf_info_job)
+job_queue.register('crawl', run_crawl_job)
+
+def crawl_options(params):
+    """Crawl keyword arguments from a JSON body; raises ValueError on bad values."""
+    collect = params.get('collect') or []
+    if not isinstance(collect, list) or not set(collect) <= {'image', 'video'}:
+        raise ValueError("'collect' may only list 'image' and 'video'.")
+    return {
+        'max_depth': int(params.get('max_depth', DEFAULT_DEPTH)),
+        'max_pages': int(params.get('max_pages', DEFAULT_PAGES)),
+        'same_domain': bool(params.get('same_domain', True)),
+        'collect': tuple(collect),
+    }
+
+@app.route('/api/crawl', methods=['POST'])
+def api_crawl():
+    """Crawl a site breadth-first from a seed URL, streaming NDJSON discovery events (PDFs, pages, media).
+
+    Body: {"url": ..., "max_depth": 2, "max_pages": 100, "same_domain": true, "collect": ["image", "video"]}.
+    robots.txt is always respected. For long crawls submit a "crawl" job to /api/jobs instead.
+    """
+    payload = request.get_json(silent=True) or {}
+    seed = payload.get('url')
+    if not isinstance(seed, str) or not seed.startswith(('http://', 'https://')):
+        return jsonify({'success': False, 'error': "'url' must be an http(s) URL."}), 400
+    try:
+        options = crawl_options(payload)
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    def generate():
+        try:
+            for event in crawl(seed, **options):
+                yield json.dumps(event) + '\n'
+        except Exception as e:
+            yield json.dumps({'type': 'error', 'success': False, 'error': str(e)}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/jobs', methods=['POST'])
+def api_submit_job():
+    """Queue a slow scrape and return its job id at once.
+
+    Body: {"type": "scrape", "params": {"url": ..., "data_type": "pdf", "options": {...}}}
+    {"type": "pdf_info", "params": {"pdf_url": ..., "pages": "1-5"}} or {"type": "crawl",
+    "params": {"url": ..., "max_pages": 100, ...}} (see /api/crawl), with an
+    optional "timeout" in seconds. An identical job already in flight is reused.
+    """
+    payload = request.get_json(silent=True) or {}
+    kind = payload.get('type')
+    params = payload.get('params') or {}
+    if kind not in job_queue.kinds:
+        return jsonify({'success': False, 'error': f"Unsupported job type: {kind}"}), 400
+    if not isinstance(params, dict) or not params.get('pdf_url' if kind == 'pdf_info' else 'url'):
+        return jsonify({'success': False, 'error': "Missing job parameters."}), 400
+    try:
+        timeout = float(payload.get('timeout', DEFAULT_JOB_TIMEOUT))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': "'timeout' must be a number of seconds."}), 400
+    try:
+        job, coalesced = job_queue.submit(kind, params, timeout)
+    except JobQueueFull as e:
+        return jsonify({'success': False, 'error': str(e)}), 503
+    return jsonify({'success': True, 'job_id': job.id, 'status': job.status, 'coalesced': coalesced}), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET', 'DELETE'])
+def api_job(job_id):
+    """Job status and result; DELETE cancels. ?stream=1 streams NDJSON status/progress lines until it finishes."""
+    if request.method == 'DELETE':
+        if not job_queue.cancel(job_id):
+            return jsonify({'success': False, 'error': "No such job in progress."}), 404
+        return jsonify({'success': True, 'job': job_queue.record(job_id)})
+
+    record = job_queue.record(job_id)
+    if record is None:
+        return jsonify({'success': False, 'error': "No such job."}), 404
+    if request.args.get('stream') != '1':
+        return jsonify({'success': True, 'job': record})
+
+    def generate():
+        job = job_queue.get(job_id)
+        version, last_seq, last_status = -1, 0, None
+        while True:
+            if job is not None:
+                previous, version = version, job.wait(version, timeout=15)
+                current = job.to_dict()
+                idle = version == previous
+            else:
+                # Running in another worker process: poll the shared store
+                time.sleep(1)
+                current = job_queue.record(job_id)
+                idle = True
+                if current is None:
+                    yield json.dumps({'id': job_id, 'status': 'gone', 'error': "Job record expired."}) + '\n'
+                    return
+            for event in current.pop('progress', []):
+                if event['seq'] > last_seq:
+                    last_seq = event['seq']
+                    yield json.dumps({'progress': event}) + '\n'
+            if current['status'] not in ('queued', 'running'):
+                yield json.dumps(current) + '\n'
+                return
+            if current['status'] != last_status or idle:
+                # Status changes, plus a keep-alive line while nothing happens
+                last_status = current['status']
+                yield json.dumps({'status': current['status']}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/results/search')
+def api_search_results():
+    """Full-text search over stored headlines, table rows, PDF pages, listings and movies: ?q=...&kind=&limit=&offset="""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'success': False, 'error': "Missing 'q'."}), 400
+    try:
+        limit = min(int(request.args.get('limit', 20)), 200)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'success': False, 'error': "'limit' and 'offset' must be integers."}), 400
+    started = time.perf_counter()
+    hits = result_store.search(query, kind=request.args.get('kind'), limit=limit, offset=offset)
+    return jsonify({'success': True, 'results': hits, 'took_ms': round((time.perf_counter() - started) * 1000, 2)})
+
+@app.route('/api/results')
+@app.route('/api/results/<int:result_id>')
+def api_results(result_id=None):
+    """One stored result by id, or the stored results for ?url= (a URL, movie or product name), newest first."""
+    if result_id is not None:
+        result = result_store.get(result_id)
+        if result is None:
+            return jsonify({'success': False, 'error': "No such result."}), 404
+        return jsonify({'success': True, 'result': result})
+    url = request.args.get('url')
+    if not url:
+        return jsonify({'success': False, 'error': "Missing 'url'."}), 400
+    return jsonify({'success': True, 'results': result_store.history(url, kind=request.args.get('kind'))})
+
+@app.route('/export/table')
+def export_table():
+    """Export one table as streamed CSV or NDJSON (row by row), or as typed columns (format=columns)."""
+    url = request.args.get('url')
+    export_format = request.args.get('format', 'csv')
+    if not url:
+        return jsonify({'success': False, 'error': "Missing 'url'."}), 400
+    if export_format not in ('csv', 'ndjson', 'columns'):
+        return jsonify({'success': False, 'error': f"Unsupported format: {export_format}"}), 400
+    try:
+        table_number = int(request.args.get('table_number', 0))
+    except ValueError:
+        return jsonify({'success': False, 'error': "'table_number' must be an integer."}), 400
+    try:
+        response = fetch_page(url)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        tables = soup.find_all('table')
-        table_data = []
-        for table in tables:
-            rows = table.find_all('tr')
-            table_rows = []
-            for row in rows:
-                columns = row.find_all('td')
-                columns = [col.text.strip() for col in columns]
-                if columns:
-                    table_rows.append(columns)
-            if table_rows:
-                table_data.append(table_rows)
-        return table_data
+    except requests.exceptions.RequestException as e:
+        return jsonify({'success': False, 'error': str(e)}), 502
+    tables = data_tables(response.content)
+    if not 0 <= table_number < len(tables):
+        return jsonify({'success': False, 'error': f"Table {table_number} not found; page has {len(tables)} tables."}), 404
+    table = tables[table_number]
+
+    if export_format == 'columns':
+        return jsonify(dict(columnar(table), success=True))
+    if export_format == 'csv':
+        lines, mimetype = csv_lines(table), 'text/csv'
+    else:
+        lines, mimetype = ndjson_lines(table), 'application/x-ndjson'
+    filename = f"table_{table_number + 1}.{'csv' if export_format == 'csv' else 'ndjson'}"
+    return Response(stream_with_context(lines), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+@app.route('/media/thumb')
+def media_thumb():
+    """A scaled-down copy of an image from the on-disk thumbnail cache (?url=...&w=256), with a strong ETag."""
+    url = request.args.get('url', '')
+    if not url.startswith(('http://', 'https://')):
+        return jsonify({'success': False, 'error': "'url' must be an http(s) URL."}), 400
+    width = request.args.get('w', media.DEFAULT_THUMB_WIDTH, type=int)
+    try:
+        body, content_type, etag = media.thumbnail(url, width)
+    except media.ThumbnailError as e:
+        return jsonify({'success': False, 'error': str(e)}), 415
+    except requests.exceptions.RequestException as e:
+        return jsonify({'success': False, 'error': str(e)}), 502
+    response = Response(body, mimetype=content_type)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = int(media.thumbnail_cache.ttl)
+    # The bytes come from another site: never let them run as a page of ours
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    response.headers['Content-Security-Policy'] = "default-src 'none'; style-src 'unsafe-inline'; sandbox"
+    return response.make_conditional(request)
+
+@app.route('/api/media/probe', methods=['POST'])
+def api_media_probe():
+    """Status, content type and size of image/video URLs, probed concurrently without downloading them.
+
+    Body: {"urls": [...], "kind": "image" | "video"}.
+    """
+    payload = request.get_json(silent=True) or {}
+    urls = payload.get('urls') or []
+    kind = payload.get('kind', 'image')
+    if kind not in ('image', 'video'):
+        return jsonify({'success': False, 'error': "'kind' must be 'image' or 'video'."}), 400
+    if not isinstance(urls, list) or not urls or not all(isinstance(u, str) and u.startswith(('http://', 'https://'))
+                                                         for u in urls):
+        return jsonify({'success': False, 'error': "'urls' must be a non-empty list of http(s) URLs."}), 400
+    if len(urls) > MAX_BATCH_SIZE:
+        return jsonify({'success': False, 'error': f"At most {MAX_BATCH_SIZE} URLs per request."}), 400
+    results = media.probe_media(urls)
+    return jsonify({'success': True, 'media': [dict(results[url], matches=media.matches(results[url], kind))
+                                               for url in dict.fromkeys(urls)]})
+
+@app.route('/stats')
+def stats():
+    """Connection pool, page cache and browser pool counters."""
+    return jsonify(dict(fetcher.stats(), browsers=driver_pool.stats(), pdf_cache=pdf_cache.stats(),
+                        movie_cache=movie_cache.stats(), news_monitor=news_monitor.stats(),
+                        jobs=job_queue.stats(), results=result_store.stats(), media=media.stats()))
+
+metrics.registry.collect_stats('connections', lambda: {name: value for name, value in fetcher.stats().items()
+                                                      if name in ('reuse_hits', 'reuse_misses')})
+metrics.registry.collect_stats('page_cache', lambda: fetcher.page_cache.stats() if fetcher.page_cache else {})
+metrics.registry.collect_stats('browsers', driver_pool.stats)
+metrics.registry.collect_stats('pdf_cache', pdf_cache.stats)
+metrics.registry.collect_stats('movie_cache', movie_cache.stats)
+metrics.registry.collect_stats('news_monitor', news_monitor.stats)
+metrics.registry.collect_stats('jobs', job_queue.stats)
+metrics.registry.collect_stats('results', result_store.stats)
+metrics.registry.collect_stats('media_probes', media.probe_cache.stats)
+metrics.registry.collect_stats('thumbnails', media.thumbnail_cache.stats)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus text exposition: phase/scrape/request histograms plus cache, pool and job gauges."""
+    return Response(metrics.registry.expose(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/metrics/profiles')
+@app.route('/metrics/profiles/<profile_id>')
+def sampling_profiles(profile_id=None):
+    """Recent ?profile=1 samples; one profile is returned in folded-stack form for flame graph tools."""
+    if profile_id is None:
+        return jsonify({'success': True, 'enabled': PROFILING_ENABLED, 'profiles': metrics.list_profiles()})
+    profile = metrics.get_profile(profile_id)
+    if profile is None:
+        return jsonify({'success': False, 'error': "No such profile."}), 404
+    return Response(profile['folded'], mimetype='text/plain')
+
+@metrics.timed_scraper
+def scrape_tables(url):
+    try:
+        tables = extract_url(url, [TableExtractor(url)])['tables']
+    except requests.exceptions.RequestException:
+        return None
+    remember('table', url, tables)
+    return tables
+
+@metrics.timed_scraper
+def scrape_images(url, image_format, limit=None):
+    """Image URLs on a page; with a limit, parsing and the download stop once enough are found."""
+    try:
+        extractor = ImageExtractor(url, image_format, limit)
+        return extract_url(url, [extractor])[extractor.key]
     except requests.exceptions.RequestException:
         return None
 
-def scrape_images(url, image_format):
+@metrics.timed_scraper
+def scrape_everything(url):
+    """Fetch and parse a page once, running every page extractor in the same walk."""
     try:
-        response = requests.get(url, timeout=10)
+        response = fetch_page(url, profile='browser')
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        images = soup.find_all('img')
-        allowed_formats = {'png': ['.png'], 'jpg': ['.jpg', '.jpeg'], 'all': ['.png', '.jpg', '.jpeg']}
-        image_urls = []
-        for img in images:
-            img_url = img.get('src')
-            if img_url and any(img_url.endswith(ext) for ext in allowed_formats[image_format]):
-                if img_url.startswith('http'):
-                    image_urls.append(img_url)
-                else:
-                    base_url = url.rsplit('/', 1)[0]
-                    full_url = os.path.join(base_url, img_url)
-                    image_urls.append(full_url)
-        return image_urls
+        results = extract_page(response, [extractor(url) for extractor in EXTRACTORS.values()])
     except requests.exceptions.RequestException:
         return None
+    remember('all', url, results)
+    return results
 
+@metrics.timed_scraper
 def scrape_movie_details(movie_name):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
     try:
-        search_url = f"https://www.imdb.com/find?q={movie_name.replace(' ', '+')}&ref_=nv_sr_sm"
-        search_response = requests.get(search_url, headers=headers, timeout=10)
-        search_response.raise_for_status()
-        search_soup = BeautifulSoup(search_response.content, 'html.parser')
-        first_result = search_soup.select_one('.ipc-metadata-list-summary-item a.ipc-metadata-list-summary-item__t')
-        if not first_result:
-            return {"error": "No movie found with that name."}
-        movie_url = "https://www.imdb.com" + first_result['href']
-        movie_response = requests.get(movie_url, headers=headers, timeout=10)
-        movie_response.raise_for_status()
-        soup = BeautifulSoup(movie_response.content, 'html.parser')
-        title = soup.select_one('h1').text.strip()
-        poster = soup.select_one('img.ipc-image')
-        poster_url = poster['src'] if poster else "N/A"
-        year_elem = soup.select_one('a[href*="/releaseinfo"]')
-        year = year_elem.text.strip() if year_elem else "N/A"
-        rating_elem = soup.select_one('div[data-testid="hero-rating-bar__aggregate-rating__score"] span')
-        rating = rating_elem.text.strip() + "/10" if rating_elem else "N/A"
-        plot_elem = soup.select_one('[data-testid="plot"]')
-        plot = plot_elem.text.strip() if plot_elem else "N/A"
-        genre_elem = soup.select_one('.ipc-chip.ipc-chip--on-baseAlt .ipc-chip__text')
-        genre = genre_elem.text.strip() if genre_elem else "N/A"
-        return {
-            "name": title,
-            "poster_url": poster_url,
-            "year": year,
-            "rating": rating,
-            "plot": plot,
-            "genre": genre
-        }
+        movie = lookup_movie(movie_name)
+        remember('movie', movie_name, movie)
+        return movie
+    except MovieNotFound as e:
+        return {"error": str(e)}
     except requests.exceptions.RequestException as e:
         return {"error": f"Network error occurred: {e}"}
     except Exception as e:
         return {"error": f"An error occurred: {e}"}
 
-def scrape_videos(url, video_format):
+@metrics.timed_scraper
+def scrape_videos(url, video_format, limit=None):
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        videos = soup.find_all('video')
-        video_urls = []
-        for video in videos:
-            video_sources = video.find_all('source')
-            for source in video_sources:
-                video_url = source.get('src')
-                if video_url:
-                    if video_format != 'all' and not video_url.endswith(video_format):
-                        continue
-                    if video_url.startswith('http'):
-                        video_urls.append(video_url)
-                    else:
-                        base_url = url.rsplit('/', 1)[0]
-                        full_url = os.path.join(base_url, video_url)
-                        video_urls.append(full_url)
-        return video_urls
+        extractor = VideoExtractor(url, video_format, limit)
+        return extract_url(url, [extractor])[extractor.key]
     except requests.exceptions.RequestException:
         return None
 
-def scrape_news_headlines(url):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
+@metrics.timed_scraper
+def scrape_news_headlines(url, limit=None):
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        headlines = soup.find_all(['h1', 'h2', 'h3'])
-        if not headlines:
-            headlines = soup.find_all('a', class_=lambda x: x and ('excerpt' in x.lower() or 'title' in x.lower() or 'headline' in x.lower()))
-        if not headlines:
-            headlines = soup.find_all('a')
-        def is_valid_headline(text):
-            if len(text) < 15:
-                return False
-            non_headline_phrases = [
-                'home', 'about', 'contact', 'login', 'register', "today's gallery", "The Daily Star - Bangladesh News, Political News, Bangladesh Economy & Videos, Breaking News"
-            ]
-            if any(phrase.lower() in text.lower() for phrase in non_headline_phrases):
-                return False
-            if re.search(r'\d', text) or re.search(r'[A-Z][a-z]+', text):
-                return True
-            return True
-        headline_texts = []
-        for headline in headlines:
-            text = headline.get_text().strip()
-            if text and is_valid_headline(text) and text not in headline_texts:
-                headline_texts.append(text)
-        return headline_texts if headline_texts else None
+        headlines = extract_url(url, [HeadlineExtractor(url, limit)], profile='browser')['headlines']
     except requests.exceptions.RequestException:
         return None
+    remember('news', url, headlines)
+    return headlines
 
-def scrape_ebay_product(product_name):
-    search_url = f"https://www.ebay.com/sch/i.html?_nkw={product_name.replace(' ', '+')}&_sop=12"
-    
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.5",
-        "Referer": "https://www.ebay.com/"
-    }
-    
+@metrics.timed_scraper
+def scrape_ebay_product(product_name, num_products=DEFAULT_PRODUCTS):
+    """Collect up to num_products unique listings across eBay result pages."""
     try:
-        response = requests.get(search_url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        product_details = []
-        product_listings = soup.find_all('li', {'class': 's-item s-item__pl-on-bottom'})
-
-        if not product_listings:
-            print(f"No listings found for '{product_name}'. Check selector or eBay response.")
-            print(f"Response snippet: {response.text[:500]}")
-            return []
-
-        for product in product_listings[2:]:
-            try:
-                title = product.find('div', {'class': 's-item__title'}).text.strip()
-                link = product.find('a', {'class': 's-item__link'})['href']
-                
-                # Improved image extraction
-                image_elem = product.find('img')
-                image_url = None
-                if image_elem:
-                    # Check multiple possible attributes for the image source
-                    image_url = image_elem.get('src') or image_elem.get('data-src') or image_elem.get('srcset')
-                    if image_url and 'srcset' in image_elem.attrs:
-                        # Handle srcset by taking the first URL
-                        image_url = image_url.split(',')[0].split()[0]
-                    if image_url and not image_url.startswith('http'):
-                        image_url = f"https:{image_url}"
-                # Fallback if no image is found
-                image_url = image_url if image_url else "https://via.placeholder.com/150?text=No+Image"
-
-                price = product.find('span', {'class': 's-item__price'}).text.strip() if product.find('span', {'class': 's-item__price'}) else 'Price not available'
-                rating = product.find('div', {'class': 'x-star-rating'}).text.strip() if product.find('div', {'class': 'x-star-rating'}) else 'No rating'
-                
-                product_details.append({
-                    "title": title,
-                    "link": link,
-                    "image_url": image_url,
-                    "price": price,
-                    "rating": rating
-                })
-                print(f"Extracted image URL: {image_url}")  # Debug output
-
-            except AttributeError as e:
-                print(f"Error parsing product: {e}")
-                continue
-
+        product_details = list(iter_ebay_products(product_name, num_products))
         if not product_details:
-            print(f"No valid product details extracted for '{product_name}'.")
-        
-        return product_details[:100]  # Limit to 10 results
-
+            logger.info(f"No valid product details extracted for '{product_name}'.")
+        remember('ebay', product_name, product_details)
+        return product_details
     except requests.RequestException as e:
-        print(f"Failed to fetch eBay page for '{product_name}': {e}")
+        logger.error(f"Failed to fetch eBay page for '{product_name}': {e}")
         return []
 
+@metrics.timed_scraper
 def scrape_pdf_links(url):
     """Scrape a webpage for PDF links, first with BS4, then with Selenium if no PDFs are found."""
     # First, try with BeautifulSoup (faster for static content)
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        pdf_links = []
-        
-        # Check <a> tags
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            if href.lower().endswith('.pdf') and href.startswith(('http://', 'https://')):
-                pdf_name = href.split('/')[-1].split('?')[0]  # Extract the PDF name, remove query params
-                pdf_links.append({'url': href, 'name': pdf_name})
-        
-        # Check <source> tags
-        for source in soup.find_all('source', src=True):
-            src = source['src']
-            if src.lower().endswith('.pdf') and src.startswith(('http://', 'https://')):
-                pdf_name = src.split('/')[-1].split('?')[0]  # Extract the PDF name, remove query params
-                pdf_links.append({'url': src, 'name': pdf_name})
-        
-        # Remove duplicates based on URL
-        seen_urls = set()
-        unique_pdf_links = []
-        for link in pdf_links:
-            if link['url'] not in seen_urls:
-                seen_urls.add(link['url'])
-                unique_pdf_links.append(link)
-        
-        if unique_pdf_links:
-            logger.info(f"Found {len(unique_pdf_links)} PDFs with BeautifulSoup")
-            return unique_pdf_links
-    
+        unique_pdf_links = static_pdf_links(url)
     except requests.exceptions.RequestException as e:
         logger.error(f"BS4 request failed: {e}")
         return None
+    if unique_pdf_links:
+        logger.info(f"Found {len(unique_pdf_links)} PDFs with BeautifulSoup")
+        remember('pdf', url, unique_pdf_links)
+        return unique_pdf_links
 
     # If no PDFs found with BS4, fall back to Selenium
     logger.info("No PDFs found with BS4, falling back to Selenium")
-    
-    options = Options()
-     
-    options.add_argument("--headless") # Use the proper headless mode
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-
-    driver = None
     try:
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-        driver.set_page_load_timeout(30)  # Increase page load timeout
-        logger.info(f"Navigating to URL: {url}")
+        unique_pdf_links = browser_pdf_links(url)
+        remember('pdf', url, unique_pdf_links)
+        return unique_pdf_links
+    except PoolTimeout as e:
+        logger.error(f"No Selenium browser available: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"Error scraping PDFs with Selenium: {e}")
+        return None
+
+def static_pdf_links(url):
+    """PDF links in the page's HTML as served, without running its scripts. Raises on network errors."""
+    response = fetch_page(url, profile='browser')
+    response.raise_for_status()
+    return extract_page(response, [PdfLinkExtractor(url)])['pdf_links']
+
+def browser_pdf_links(url):
+    """PDF links after rendering the page in a pooled browser (raises PoolTimeout when none is free)."""
+    with driver_pool.driver() as driver:
+        return selenium_pdf_links(driver, url)
+
+def selenium_pdf_links(driver, url):
+    """Load a page in a pooled browser, reveal hidden document lists and collect PDF links."""
+    By = lazy_import('selenium.webdriver.common.by').By
+    WebDriverWait = lazy_import('selenium.webdriver.support.ui').WebDriverWait
+    EC = lazy_import('selenium.webdriver.support.expected_conditions')
+    logger.info(f"Navigating to URL: {url}")
+    with metrics.span('selenium_page'):
         driver.get(url)
 
-        # Wait for the page to load and check for any button that might reveal PDFs (e.g., "Documents", "Resources", etc.)
-        try:
-            # Look for buttons that might reveal PDFs (e.g., "Documents", "Resources", "Show More")
-            potential_buttons = driver.find_elements(By.XPATH, "//button[contains(text(), 'Documents') or contains(text(), 'Resources') or contains(text(), 'Show More')]")
-            for button in potential_buttons:
-                try:
-                    logger.info(f"Clicking button with text: {button.text}")
-                    button.click()
-                    WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.TAG_NAME, "a"))
-                    )  # Wait for any <a> tags to appear
-                    break  # Stop after clicking the first relevant button
-                except Exception as e:
-                    logger.warning(f"Could not click button '{button.text}': {e}")
-        except Exception as e:
-            logger.warning(f"No relevant buttons found to click: {e}")
+    # Wait for the page to load and check for any button that might reveal PDFs (e.g., "Documents", "Resources", etc.)
+    try:
+        # Look for buttons that might reveal PDFs (e.g., "Documents", "Resources", "Show More")
+        potential_buttons = driver.find_elements(By.XPATH, "//button[contains(text(), 'Documents') or contains(text(), 'Resources') or contains(text(), 'Show More')]")
+        for button in potential_buttons:
+            try:
+                logger.info(f"Clicking button with text: {button.text}")
+                button.click()
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.TAG_NAME, "a"))
+                )  # Wait for any <a> tags to appear
+                break  # Stop after clicking the first relevant button
+            except Exception as e:
+                logger.warning(f"Could not click button '{button.text}': {e}")
+    except Exception as e:
+        logger.warning(f"No relevant buttons found to click: {e}")
 
-        # Wait for any <a> tags to ensure the page is fully loaded
-        try:
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.TAG_NAME, "a"))
-            )
-            logger.info("Page loaded successfully with Selenium")
-        except Exception as e:
-            logger.error(f"Failed to load page with Selenium: {e}")
-            return None
-
-        # Parse the page source with BeautifulSoup
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        
-        pdf_links = []
-        
-        # Check all <a> tags for PDF links
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            if href.lower().endswith('.pdf') and href.startswith(('http://', 'https://')):
-                pdf_name = href.split('/')[-1].split('?')[0]  # Extract the PDF name, remove query params
-                pdf_links.append({'url': href, 'name': pdf_name})
-        
-        # Check <source> tags
-        for source in soup.find_all('source', src=True):
-            src = source['src']
-            if src.lower().endswith('.pdf') and src.startswith(('http://', 'https://')):
-                pdf_name = src.split('/')[-1].split('?')[0]  # Extract the PDF name, remove query params
-                pdf_links.append({'url': src, 'name': pdf_name})
-        
-        # Remove duplicates based on URL
-        seen_urls = set()
-        unique_pdf_links = []
-        for link in pdf_links:
-            if link['url'] not in seen_urls:
-                seen_urls.add(link['url'])
-                unique_pdf_links.append(link)
-        
-        if unique_pdf_links:
-            logger.info(f"Found {len(unique_pdf_links)} PDFs with Selenium")
-        else:
-            logger.info("No PDFs found with Selenium")
-        
-        return unique_pdf_links if unique_pdf_links else None
-    
+    # Wait for any <a> tags to ensure the page is fully loaded
+    try:
+        WebDriverWait(driver, 15).until(
+            EC.presence_of_element_located((By.TAG_NAME, "a"))
+        )
+        logger.info("Page loaded successfully with Selenium")
     except Exception as e:
-        logger.error(f"Error scraping PDFs with Selenium: {e}")
+        logger.error(f"Failed to load page with Selenium: {e}")
         return None
-    finally:
-        if driver:
-            driver.quit()
-            logger.info("Selenium driver closed")
+
+    # Parse the page source with BeautifulSoup
+    unique_pdf_links = run_extractors(driver.page_source, [PdfLinkExtractor(url)])['pdf_links']
+
+    if unique_pdf_links:
+        logger.info(f"Found {len(unique_pdf_links)} PDFs with Selenium")
+    else:
+        logger.info("No PDFs found with Selenium")
+
+    return unique_pdf_links if unique_pdf_links else None
+
+mark_ready()
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
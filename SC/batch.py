@@ -0,0 +1,85 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_WORKERS = 16
+PER_HOST = 2
+HOST_DELAY = 0.25  # seconds between request starts on the same host
+
+
+def host_of(target):
+    return urlsplit(target).netloc.lower() or target
+
+
+def _timed(scrape, target):
+    started = time.monotonic()
+    result = scrape(target)
+    return result, time.monotonic() - started
+
+
+def run_batch(targets, scrape, host=host_of, max_workers=MAX_WORKERS,
+              per_host=PER_HOST, host_delay=HOST_DELAY, deadline=None):
+    """Scrape targets concurrently and yield one result dict per target as it finishes.
+
+    At most ``max_workers`` scrapes run at once and at most ``per_host`` per
+    host, with request starts on a host spaced ``host_delay`` seconds apart
+    (or a callable giving the spacing for each host name).
+    Exceptions raised by ``scrape`` are reported on the item instead of
+    ending the batch. With a ``deadline`` (a time.monotonic() value) the
+    batch stops there: targets still running or not yet started are
+    abandoned without waiting for them.
+    """
+    queues = {}
+    for index, target in enumerate(targets):
+        queues.setdefault(host(target), deque()).append((index, target))
+    active = {name: 0 for name in queues}
+    delays = {name: host_delay(name) if callable(host_delay) else host_delay for name in queues}
+    next_start = {name: 0.0 for name in queues}
+    running = {}
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch')
+    try:
+        while queues or running:
+            # Start everything the global, per-host and politeness limits allow
+            now = time.monotonic()
+            wake_at = None
+            for name in list(queues):
+                while (len(running) < max_workers and active[name] < per_host
+                       and next_start[name] <= now and queues[name]):
+                    index, target = queues[name].popleft()
+                    future = executor.submit(_timed, scrape, target)
+                    running[future] = (index, target, name)
+                    active[name] += 1
+                    next_start[name] = now + delays[name]
+                if not queues[name]:
+                    del queues[name]
+                elif active[name] < per_host and next_start[name] > now:
+                    wake_at = next_start[name] if wake_at is None else min(wake_at, next_start[name])
+
+            if deadline is not None:
+                if time.monotonic() >= deadline:
+                    return
+                wake_at = deadline if wake_at is None else min(wake_at, deadline)
+            timeout = None if wake_at is None else max(wake_at - time.monotonic(), 0)
+            if not running:
+                time.sleep(timeout or 0)
+                continue
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, target, name = running.pop(future)
+                active[name] -= 1
+                item = {'index': index, 'target': target}
+                try:
+                    result, elapsed = future.result()
+                    item.update(success=True, result=result, elapsed=round(elapsed, 3))
+                except Exception as e:
+                    logger.warning(f"Batch item {target} failed: {e}")
+                    item.update(success=False, error=str(e), error_type=type(e).__name__)
+                yield item
+    finally:
+        # Client went away or we finished: drop anything not yet started
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1 @@
+"""Offline benchmarks for the scrapers. Run from SC/: ``python -m bench.run --help``."""
@@ -0,0 +1,203 @@
+import functools
+import json
+import random
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+WORDS = ('market', 'election', 'storm', 'budget', 'river', 'council', 'festival', 'transport', 'hospital',
+         'harvest', 'minister', 'schools', 'record', 'energy', 'protest', 'bridge', 'court', 'exports')
+
+
+def _words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def tables_page(tables=5, rows=200, cols=6, seed=0):
+    rng = random.Random(seed)
+    parts = ['<html><head><title>Tables</title></head><body>']
+    for t in range(tables):
+        parts.append(f'<h2>Table {t + 1}</h2><table><thead><tr>')
+        parts.extend(f'<th>Column {c + 1}</th>' for c in range(cols))
+        parts.append('</tr></thead><tbody>')
+        for r in range(rows):
+            parts.append('<tr>')
+            parts.extend(f'<td>{rng.randint(0, 100000)}</td>' if c % 2 else f'<td>{_words(rng, 2)}</td>'
+                         for c in range(cols))
+            parts.append('</tr>')
+        parts.append('</tbody></table>')
+    parts.append('</body></html>')
+    return ''.join(parts)
+
+
+def images_page(images=2000, links=2000, pdfs=50, seed=0):
+    rng = random.Random(seed)
+    parts = ['<html><body><div class="gallery">']
+    for i in range(images):
+        ext = rng.choice(('png', 'jpg', 'jpeg', 'gif', 'webp'))
+        src = f'/media/{i}.{ext}' if i % 3 else f'https://cdn.example.com/media/{i}.{ext}'
+        parts.append(f'<figure><img src="{src}" alt="{_words(rng, 3)}"><figcaption>{_words(rng, 5)}</figcaption></figure>')
+    parts.append('</div><ul>')
+    for i in range(links):
+        parts.append(f'<li><a href="/page/{i}.html">{_words(rng, 4)}</a></li>')
+    for i in range(pdfs):
+        href = f'docs/report-{i}.pdf' if i % 2 else f'https://files.example.com/report-{i}.pdf'
+        parts.append(f'<li><a href="{href}">Report {i}</a></li>')
+    parts.append('</ul></body></html>')
+    return ''.join(parts)
+
+
+def news_page(headlines=500, links=3000, seed=0):
+    rng = random.Random(seed)
+    parts = ['<html><body><nav>']
+    parts.extend(f'<a href="/section/{i}">{_words(rng, 1)}</a>' for i in range(links))
+    parts.append('</nav><main>')
+    for i in range(headlines):
+        parts.append(f'<article><h2><a href="/story/{i}">{_words(rng, 8).capitalize()}</a></h2>'
+                     f'<p>{_words(rng, 40)}</p></article>')
+    parts.append('</main></body></html>')
+    return ''.join(parts)
+
+
+def ebay_page(listings=60, page=1):
+    """An eBay search result page shaped like the markup ebay.parse_product reads."""
+    rng = random.Random(page)
+    parts = ['<html><body><ul class="srp-results">']
+    for i in range(listings + 2):  # the first two entries are placeholders on eBay too
+        item = page * 1000 + i
+        parts.append(
+            '<li class="s-item s-item__pl-on-bottom"><div class="s-item__wrapper">'
+            f'<div class="s-item__image"><img src="https://i.ebayimg.com/images/g/{item}/s-l500.jpg"></div>'
+            f'<a class="s-item__link" href="https://www.ebay.com/itm/{item}?hash=item{item}">'
+            f'<div class="s-item__title">{_words(rng, 6).title()}</div></a>'
+            f'<span class="s-item__price">${rng.randint(5, 900)}.{rng.randint(0, 99):02d}</span>'
+            f'<div class="x-star-rating">{rng.randint(1, 5)} out of 5 stars</div>'
+            + ('<span class="s-item__detail">' + _words(rng, 20) + '</span>') * 3
+            + '</div></li>')
+    parts.append('</ul></body></html>')
+    return ''.join(parts)
+
+
+def imdb_title_page(seed=0):
+    """An IMDb title page with the JSON-LD block and hero markup movies.py reads."""
+    rng = random.Random(seed)
+    data = {
+        '@type': 'Movie', 'name': _words(rng, 3).title(), 'image': 'https://m.media-amazon.com/poster.jpg',
+        'datePublished': '2010-07-16', 'description': _words(rng, 30), 'genre': ['Action', 'Sci-Fi'],
+        'aggregateRating': {'ratingValue': 8.8},
+    }
+    filler = ''.join(f'<div class="ipc-chip"><span>{_words(rng, 3)}</span></div>' for _ in range(3000))
+    return (f'<html><head><script type="application/ld+json">{json.dumps(data)}</script></head><body>'
+            f'<h1>{data["name"]}</h1><img class="ipc-image" src="{data["image"]}">'
+            f'<a href="/title/tt1/releaseinfo">2010</a>'
+            f'<div data-testid="hero-rating-bar__aggregate-rating__score"><span>8.8</span></div>'
+            f'<span data-testid="plot">{data["description"]}</span>'
+            f'<div class="ipc-chip ipc-chip--on-baseAlt"><span class="ipc-chip__text">Action</span></div>'
+            f'{filler}</body></html>')
+
+
+def make_pdf(pages=20, lines_per_page=40, tag=''):
+    """A minimal valid PDF with text on every page. A different tag gives a different file (and SHA-256)."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = ' '.join(f"{4 + 2 * i} 0 R" for i in range(pages))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i in range(pages):
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode())
+        lines = ' '.join(f"(Page {i + 1} line {j} lorem ipsum dolor sit amet consectetur) '"
+                         for j in range(lines_per_page))
+        text = f"BT /F1 9 Tf 40 760 Td 11 TL {lines} ET"
+        objects.append(f"<< /Length {len(text)} >>\nstream\n{text}\nendstream".encode())
+    body = bytearray(f"%PDF-1.4\n%{tag}\n".encode())
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += f"{number} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(body)
+    body += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    body += ''.join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    body += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(body)
+
+
+def _int(params, name, default):
+    return int(params.get(name, default))
+
+
+@functools.lru_cache(maxsize=64)
+def render(path, query):
+    """(content_type, body) for a fixture path; sizes come from the query string."""
+    params = dict(parse_qsl(query))
+    html = 'text/html; charset=utf-8'
+    if path == '/tables':
+        return html, tables_page(_int(params, 'tables', 5), _int(params, 'rows', 200), _int(params, 'cols', 6)).encode()
+    if path == '/images':
+        return html, images_page(_int(params, 'images', 2000), _int(params, 'links', 2000), _int(params, 'pdfs', 50)).encode()
+    if path == '/news':
+        return html, news_page(_int(params, 'headlines', 500), _int(params, 'links', 3000)).encode()
+    if path == '/sch/i.html':
+        return html, ebay_page(_int(params, 'listings', 60), _int(params, '_pgn', 1)).encode()
+    if path == '/title':
+        return html, imdb_title_page().encode()
+    if path == '/doc.pdf':
+        return 'application/pdf', make_pdf(_int(params, 'pages', 20), tag=params.get('tag', ''))
+    return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        page = render(parts.path, parts.query)
+        if page is None:
+            self.send_error(404)
+            return
+        content_type, body = page
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Scrapers with a limit hang up mid-body on purpose
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FixtureServer:
+    """Serves the synthetic pages on 127.0.0.1 from a background thread.
+
+    Use as a context manager; url('/tables?rows=500') gives an absolute URL.
+    """
+
+    def __init__(self, port=0):
+        self._server = _Server(('127.0.0.1', port), _Handler)
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path):
+        return self.base_url + path
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fixture-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,292 @@
+"""Benchmark the scrapers against local fixture pages and write the results as JSON.
+
+Run from SC/:
+
+    python -m bench.run                       # full run, results in bench/results/
+    python -m bench.run --quick --only table  # smaller pages, fewer repeats, one group
+    python -m bench.run --compare bench/results/<earlier>.json
+
+Page and PDF caches are disabled (PDFs are re-tagged per run for the cold
+numbers) unless --page-cache is given, so each run measures fetch + parse.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from bench.fixtures import FixtureServer, render
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+PARSERS = ('html.parser', 'lxml', 'html5lib')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def measure(name, run, repeat, group, params=None, items=None, size=None, setup=None):
+    """Time `run` repeat times (after one warm-up), then once more under tracemalloc for peak memory.
+
+    `items(result)` counts what a run produced, for throughput; `size` is the
+    input size in bytes, for MB/s. `setup(i)` runs before each call, untimed.
+    """
+    if setup:
+        setup(-1)
+    result = run()
+    timings = []
+    for i in range(repeat):
+        if setup:
+            setup(i)
+        started = time.perf_counter()
+        result = run()
+        timings.append(time.perf_counter() - started)
+
+    if setup:
+        setup(repeat)
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    timings.sort()
+    mean = sum(timings) / len(timings)
+    produced = items(result) if items else None
+    entry = {
+        'name': name,
+        'group': group,
+        'params': params or {},
+        'runs': repeat,
+        'latency_ms': {
+            'mean': round(mean * 1000, 3),
+            'min': round(timings[0] * 1000, 3),
+            'p50': round(percentile(timings, 0.50) * 1000, 3),
+            'p90': round(percentile(timings, 0.90) * 1000, 3),
+            'p99': round(percentile(timings, 0.99) * 1000, 3),
+            'max': round(timings[-1] * 1000, 3),
+        },
+        'throughput': {
+            'runs_per_s': round(1 / mean, 2),
+            'items': produced,
+            'items_per_s': round(produced / mean, 1) if produced else None,
+            'mb_per_s': round(size / mean / 1e6, 2) if size else None,
+        },
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+    print(f"{name:<40} p50 {entry['latency_ms']['p50']:>9.2f} ms  p99 {entry['latency_ms']['p99']:>9.2f} ms  "
+          f"peak {entry['peak_memory_kb']:>9.0f} KB", flush=True)
+    return entry
+
+
+def scraper_benchmarks(server, sizes, repeat):
+    """End-to-end scrape_* functions over HTTP, as the Flask views call them."""
+    import app
+    import ebay
+
+    table_query = f"tables={sizes['tables']}&rows={sizes['rows']}&cols=6"
+    image_query = f"images={sizes['images']}&links={sizes['links']}&pdfs=50"
+    news_query = f"headlines={sizes['headlines']}&links={sizes['links']}"
+    size_of = lambda path, query: len(render(path, query)[1])
+
+    yield measure('scrape_tables', lambda: app.scrape_tables(server.url(f'/tables?{table_query}')), repeat,
+                  'scrapers', {'tables': sizes['tables'], 'rows': sizes['rows']},
+                  items=lambda tables: sum(len(t) for t in tables), size=size_of('/tables', table_query))
+    yield measure('scrape_images', lambda: app.scrape_images(server.url(f'/images?{image_query}'), 'all'), repeat,
+                  'scrapers', {'images': sizes['images']}, items=len, size=size_of('/images', image_query))
+    yield measure('scrape_images(limit=20)', lambda: app.scrape_images(server.url(f'/images?{image_query}'), 'all', 20),
+                  repeat, 'scrapers', {'images': sizes['images'], 'limit': 20}, items=len)
+    yield measure('scrape_news_headlines', lambda: app.scrape_news_headlines(server.url(f'/news?{news_query}')), repeat,
+                  'scrapers', {'headlines': sizes['headlines']}, items=len, size=size_of('/news', news_query))
+    yield measure('scrape_pdf_links', lambda: app.scrape_pdf_links(server.url(f'/images?{image_query}')), repeat,
+                  'scrapers', {'links': sizes['links'], 'pdfs': 50}, items=len, size=size_of('/images', image_query))
+
+    original_search_url = ebay.search_url
+    ebay.search_url = lambda product_name, page=1: server.url(f'/sch/i.html?_nkw=bench&_pgn={page}')
+    try:
+        yield measure('scrape_ebay_product', lambda: app.scrape_ebay_product('bench', sizes['products']), repeat,
+                      'scrapers', {'products': sizes['products']}, items=len)
+    finally:
+        ebay.search_url = original_search_url
+
+
+def movie_benchmarks(repeat):
+    """IMDb title parsing (JSON-LD fast path and the CSS fallback) on a fixture page, no network."""
+    from movies import movie_from_json_ld, movie_from_css
+
+    page = render('/title', '')[1]
+    text = page.decode('utf-8')
+    yield measure('movie_from_json_ld', lambda: movie_from_json_ld(text), repeat, 'movies', size=len(page))
+    yield measure('movie_from_css', lambda: movie_from_css(page), repeat, 'movies', size=len(page))
+
+
+def pdf_benchmarks(server, sizes, repeat):
+    """/extract_pdf_info through the Flask test client: cold (new file every run) and warm (cached)."""
+    import app
+
+    client = app.app.test_client()
+    pages = sizes['pdf_pages']
+    state = {'tag': 'warm'}
+
+    def extract():
+        response = client.post('/extract_pdf_info', data={'pdf_url': server.url(f"/doc.pdf?pages={pages}&tag={state['tag']}")})
+        payload = response.get_json()
+        if not payload.get('success'):
+            raise RuntimeError(payload.get('error'))
+        return payload
+
+    def new_file(i):
+        state['tag'] = f"cold-{time.time_ns()}-{i}"
+
+    yield measure('extract_pdf_info (cold)', extract, repeat, 'pdf', {'pages': pages},
+                  items=lambda payload: payload['page_count'], setup=new_file)
+    state['tag'] = 'warm'
+    yield measure('extract_pdf_info (cached)', extract, repeat, 'pdf', {'pages': pages},
+                  items=lambda payload: payload['page_count'])
+
+
+def parser_benchmarks(sizes, repeat):
+    """The single-pass extractor engine over in-memory markup with each installed BeautifulSoup backend."""
+    import extractors
+    from extractors import (EXTRACTORS, TableExtractor, ImageExtractor, HeadlineExtractor, PdfLinkExtractor,
+                            run_extractors)
+
+    url = 'http://bench.local/page'
+    pages = {
+        'tables': (render('/tables', f"tables={sizes['tables']}&rows={sizes['rows']}&cols=6")[1],
+                   lambda: [TableExtractor(url)]),
+        'images': (render('/images', f"images={sizes['images']}&links={sizes['links']}&pdfs=50")[1],
+                   lambda: [ImageExtractor(url)]),
+        'news': (render('/news', f"headlines={sizes['headlines']}&links={sizes['links']}")[1],
+                 lambda: [HeadlineExtractor(url)]),
+        'pdf_links': (render('/images', f"images={sizes['images']}&links={sizes['links']}&pdfs=50")[1],
+                      lambda: [PdfLinkExtractor(url)]),
+        'all': (render('/images', f"images={sizes['images']}&links={sizes['links']}&pdfs=50")[1],
+                lambda: [extractor(url) for extractor in EXTRACTORS.values()]),
+    }
+    original = extractors.PARSER
+    try:
+        for parser in available_parsers():
+            extractors.PARSER = parser
+            for page_name, (markup, make) in pages.items():
+                yield measure(f'parse {page_name} [{parser}]', lambda: run_extractors(markup, make()), repeat,
+                              'parsers', {'parser': parser, 'page': page_name}, size=len(markup))
+    finally:
+        extractors.PARSER = original
+
+
+def available_parsers():
+    found = []
+    for parser in PARSERS:
+        module = 'html.parser' if parser == 'html.parser' else parser
+        try:
+            __import__(module)
+            found.append(parser)
+        except ImportError:
+            pass
+    return found
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline_path, results):
+    """Print p50 latency changes against an earlier results file."""
+    with open(baseline_path) as f:
+        baseline = {entry['name']: entry for entry in json.load(f)['results']}
+    print(f"\nCompared with {baseline_path} (p50, negative is faster):")
+    for entry in results:
+        before = baseline.get(entry['name'])
+        if before is None:
+            print(f"  {entry['name']:<40} new")
+            continue
+        old, new = before['latency_ms']['p50'], entry['latency_ms']['p50']
+        change = (new - old) / old * 100 if old else 0.0
+        flag = '  <-- slower' if change > 10 else ''
+        print(f"  {entry['name']:<40} {old:>9.2f} -> {new:>9.2f} ms  {change:+6.1f}%{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10, help="timed runs per benchmark (default 10)")
+    parser.add_argument('--quick', action='store_true', help="smaller fixtures and 3 runs, for a smoke check")
+    parser.add_argument('--only', action='append', choices=('scrapers', 'movies', 'pdf', 'parsers'),
+                        help="run only these groups (repeatable)")
+    parser.add_argument('--page-cache', action='store_true', help="leave the page cache on")
+    parser.add_argument('--output', help="results file (default bench/results/bench-<timestamp>.json)")
+    parser.add_argument('--compare', help="earlier results file to diff against")
+    args = parser.parse_args(argv)
+
+    # Caches would turn every timed run after the first into a cache hit
+    if not args.page_cache:
+        os.environ['SCRAPER_CACHE'] = 'off'
+    scratch = tempfile.mkdtemp(prefix='scraper-bench-')
+    os.environ['SCRAPER_PDF_CACHE_DIR'] = os.path.join(scratch, 'pdf_cache')
+    os.environ['SCRAPER_MOVIE_CACHE'] = os.path.join(scratch, 'movies.sqlite3')
+    # The result store's writer thread would compete for the GIL inside timed runs
+    os.environ['SCRAPER_RESULTS'] = 'off'
+    os.environ['SCRAPER_RESULTS_DB'] = os.path.join(scratch, 'results.sqlite3')
+    os.environ['SCRAPER_THUMB_CACHE_DIR'] = os.path.join(scratch, 'thumbnails')
+    import logging
+    import app  # noqa: F401  (configures logging)
+    import extractors
+    logging.getLogger().setLevel(logging.WARNING)
+
+    repeat = 3 if args.quick else args.repeat
+    if args.quick:
+        sizes = {'tables': 2, 'rows': 50, 'images': 300, 'links': 300, 'headlines': 100, 'products': 60, 'pdf_pages': 8}
+    else:
+        sizes = {'tables': 10, 'rows': 500, 'images': 3000, 'links': 3000, 'headlines': 800, 'products': 200,
+                 'pdf_pages': 60}
+    groups = args.only or ['scrapers', 'movies', 'pdf', 'parsers']
+
+    results = []
+    with FixtureServer() as server:
+        if 'scrapers' in groups:
+            results.extend(scraper_benchmarks(server, sizes, repeat))
+        if 'movies' in groups:
+            results.extend(movie_benchmarks(repeat))
+        if 'pdf' in groups:
+            results.extend(pdf_benchmarks(server, sizes, repeat))
+        if 'parsers' in groups:
+            results.extend(parser_benchmarks(sizes, repeat))
+
+    report = {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'git_revision': git_revision(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'parsers': available_parsers(),
+            'default_parser': extractors.PARSER,
+            'page_cache': args.page_cache,
+            'repeat': repeat,
+            'sizes': sizes,
+            'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"bench-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {output}")
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+import re
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, unquote
+from urllib.robotparser import RobotFileParser
+import logging
+
+import requests
+
+from fetcher import fetch, iter_body, peek_page, headers_for
+from batch import run_batch, host_of
+from extractors import LinkExtractor, ImageExtractor, VideoExtractor, run_extractors
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEPTH = 2
+MAX_DEPTH = 5
+DEFAULT_PAGES = 100
+MAX_PAGES = 1000
+CRAWL_PER_HOST = 4
+CRAWL_HOST_DELAY = 0.1  # raised to a host's Crawl-delay when its robots.txt sets one
+MAX_PAGE_BYTES = 5 * 1024 * 1024
+ROBOTS_TTL = 3600
+
+PDF_TYPES = ('application/pdf', 'application/x-pdf')
+HTML_TYPES = ('text/html', 'application/xhtml+xml')
+# Links with these extensions are never HTML, so they are not fetched as pages
+_SKIP_EXTENSIONS = re.compile(
+    r'\.(?:jpe?g|png|gif|webp|svg|ico|bmp|tiff?|css|js|json|xml|rss|zip|gz|tgz|rar|7z|tar|exe|dmg|msi|'
+    r'mp[34]|m4[av]|webm|ogg|ogv|avi|mov|wmv|flv|mkv|wav|flac|woff2?|ttf|eot|docx?|xlsx?|pptx?|csv|txt)$', re.I)
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+MEDIA_EXTRACTORS = {'image': ImageExtractor, 'video': VideoExtractor}
+
+
+def canonicalize_url(url):
+    """Normalize a URL for frontier dedupe: lowercase scheme/host, no default port,
+    fragment or tracking parameters, sorted query. Returns None for non-http(s) URLs."""
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS or not parts.hostname:
+        return None
+    host = parts.hostname.lower()
+    netloc = host if port in (None, _DEFAULT_PORTS[scheme]) else f"{host}:{port}"
+    path = re.sub(r'/{2,}', '/', parts.path) or '/'
+    query = urlencode(sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not name.lower().startswith('utm_')))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+
+def site_of(url):
+    host = (urlsplit(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def in_scope(url, site):
+    host = site_of(url)
+    return host == site or host.endswith('.' + site)
+
+
+class RobotsCache:
+    """robots.txt rules per origin, fetched once and kept for ROBOTS_TTL seconds.
+
+    As in urllib.robotparser, a robots.txt answered with 401 or 403 disallows
+    everything and a missing one (other 4xx) allows everything. One that
+    cannot be fetched allows everything too, but the failure is logged.
+    """
+
+    def __init__(self, profile='browser', ttl=ROBOTS_TTL):
+        self.profile = profile
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._parsers = {}
+
+    def _parser(self, url):
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            cached = self._parsers.get(origin)
+        if cached and time.monotonic() - cached[1] < self.ttl:
+            return cached[0]
+        parser = RobotFileParser(origin + '/robots.txt')
+        try:
+            response = fetch(origin + '/robots.txt', profile=self.profile, timeout=10)
+            if response.status_code in (401, 403):
+                logger.info(f"robots.txt for {origin} is forbidden ({response.status_code}); not crawling it")
+                parser.disallow_all = True
+            elif response.status_code >= 400:
+                parser.allow_all = True
+            else:
+                parser.parse(response.text.splitlines())
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Could not fetch robots.txt for {origin}: {e}")
+            parser.allow_all = True
+        with self._lock:
+            self._parsers[origin] = (parser, time.monotonic())
+        return parser
+
+    def allowed(self, url):
+        user_agent = headers_for(self.profile).get('User-Agent', '*')
+        return self._parser(url).can_fetch(user_agent, url)
+
+    def crawl_delay(self, url):
+        user_agent = headers_for(self.profile).get('User-Agent', '*')
+        return self._parser(url).crawl_delay(user_agent)
+
+
+robots = RobotsCache()
+
+
+def pdf_name(url):
+    return unquote(urlsplit(url).path.rstrip('/').rsplit('/', 1)[-1]) or url
+
+
+def visit(url, collect=(), profile='browser'):
+    """Fetch one frontier URL. Returns {'kind': 'pdf'|'page'|'other', ...}.
+
+    The response is opened as a stream, so a PDF recognised by its
+    Content-Type is recorded without downloading its body.
+    """
+    response = peek_page(url, profile)
+    if response is None:
+        response = fetch(url, profile=profile, stream=True)
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        if response.status_code != 200 or content_type not in HTML_TYPES:
+            response.close()
+            if response.status_code == 200 and content_type in PDF_TYPES:
+                return {'kind': 'pdf', 'url': response.url, 'size': response.headers.get('Content-Length')}
+            return {'kind': 'other', 'status': response.status_code, 'content_type': content_type}
+        response._content = b''.join(iter_body(response, MAX_PAGE_BYTES))
+        response._content_consumed = True
+
+    base = response.url or url
+    extractors = [LinkExtractor(base)]
+    extractors += [MEDIA_EXTRACTORS[name](base) for name in collect if name in MEDIA_EXTRACTORS]
+    results = run_extractors(response.content, extractors)
+    return {'kind': 'page', 'url': base, 'results': results}
+
+
+def crawl(seed, max_depth=DEFAULT_DEPTH, max_pages=DEFAULT_PAGES, same_domain=True,
+          collect=(), respect_robots=True, per_host=CRAWL_PER_HOST, profile='browser'):
+    """Breadth-first crawl from seed, yielding discovery events as they happen.
+
+    Each depth level is fetched concurrently through run_batch (per-host
+    limits apply, and each host is spaced by the Crawl-delay of its own
+    robots.txt); at most ``max_pages`` URLs are fetched in total. Events are dicts with a ``type`` of 'page', 'pdf', 'image',
+    'video', 'skipped' or 'error', followed by a final 'done' summary.
+    PDFs are found both by link extension and by the Content-Type of
+    fetched URLs; linked PDFs are reported without being fetched.
+    """
+    started = time.monotonic()
+    max_depth = max(0, min(int(max_depth), MAX_DEPTH))
+    max_pages = max(1, min(int(max_pages), MAX_PAGES))
+    seed = canonicalize_url(seed)
+    if seed is None:
+        raise ValueError("Seed must be an http(s) URL.")
+    site = site_of(seed)
+    seen = {seed}
+    parents = {}
+    found = {'pdf': set(), 'image': set(), 'video': set()}
+    level = [seed]
+    fetched = 0
+
+    def report(kind, url, page):
+        key = canonicalize_url(url) or url
+        if key in found[kind]:
+            return None
+        found[kind].add(key)
+        event = {'type': kind, 'url': url, 'found_on': page}
+        if kind == 'pdf':
+            event['name'] = pdf_name(url)
+        return event
+
+    delays = {}  # host -> seconds between request starts, from that host's own robots.txt
+
+    untried = []
+    for depth in range(max_depth + 1):
+        targets = []
+        for position, url in enumerate(level):
+            if fetched + len(targets) >= max_pages:
+                untried = level[position:]
+                break
+            if respect_robots and not robots.allowed(url):
+                yield {'type': 'skipped', 'url': url, 'reason': 'robots.txt'}
+                continue
+            targets.append(url)
+            name = host_of(url)
+            if name not in delays:
+                delays[name] = CRAWL_HOST_DELAY
+                if respect_robots:
+                    delays[name] = max(CRAWL_HOST_DELAY, robots.crawl_delay(url) or 0)
+        fetched += len(targets)
+        next_level = []
+
+        for item in run_batch(targets, lambda url: visit(url, collect, profile),
+                              per_host=per_host, host_delay=delays.get):
+            url = item['target']
+            if not item['success']:
+                yield {'type': 'error', 'url': url, 'depth': depth, 'error': item['error']}
+                continue
+            outcome = item['result']
+            if outcome['kind'] == 'pdf':
+                event = report('pdf', outcome['url'], parents.get(url))
+                if event:
+                    yield dict(event, detected_by='content-type', size=outcome['size'])
+                continue
+            if outcome['kind'] != 'page':
+                yield {'type': 'skipped', 'url': url, 'reason': outcome['content_type'] or f"HTTP {outcome['status']}"}
+                continue
+
+            results = outcome['results']
+            yield {'type': 'page', 'url': url, 'depth': depth, 'links': len(results['links'])}
+            for kind in ('image', 'video'):
+                for media_url in results.get(f'{kind}s:all') or []:
+                    event = report(kind, media_url, url)
+                    if event:
+                        yield event
+            for link in results['links']:
+                canonical = canonicalize_url(link)
+                if canonical is None or canonical in seen:
+                    continue
+                path = urlsplit(canonical).path
+                if path.lower().endswith('.pdf'):
+                    # Linked documents are reported wherever they live, without fetching them
+                    seen.add(canonical)
+                    event = report('pdf', link, url)
+                    if event:
+                        yield dict(event, detected_by='extension')
+                    continue
+                if depth == max_depth or (same_domain and not in_scope(canonical, site)):
+                    continue
+                if _SKIP_EXTENSIONS.search(path):
+                    continue
+                seen.add(canonical)
+                parents[canonical] = url
+                next_level.append(canonical)
+
+        level = next_level
+        if not level or untried:
+            break
+
+    yield {'type': 'done', 'pages': fetched, 'pdfs': len(found['pdf']), 'images': len(found['image']),
+           'videos': len(found['video']), 'frontier_left': len(untried) + (len(level) if untried else 0),
+           'elapsed': round(time.monotonic() - started, 3)}
@@ -0,0 +1,218 @@
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+import logging
+
+import metrics
+from fetcher import BROWSER_USER_AGENT
+from scrapers import lazy_import
+
+logger = logging.getLogger(__name__)
+
+PAGE_LOAD_TIMEOUT = 30
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """Raised when no driver frees up within the checkout timeout."""
+
+
+def resolve_driver_path():
+    """Resolve the chromedriver binary once per process (CHROMEDRIVER_PATH skips webdriver_manager)."""
+    global _driver_path
+    if _driver_path is None:
+        with _driver_path_lock:
+            if _driver_path is None:
+                path = os.environ.get('CHROMEDRIVER_PATH')
+                if not path:
+                    path = lazy_import('webdriver_manager.chrome').ChromeDriverManager().install()
+                logger.info(f"Using chromedriver at {path}")
+                _driver_path = path
+    return _driver_path
+
+
+def chrome_options():
+    options = lazy_import('selenium.webdriver.chrome.options').Options()
+    options.add_argument("--headless") # Use the proper headless mode
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument(f"user-agent={BROWSER_USER_AGENT}")
+    return options
+
+
+def create_chrome_driver():
+    with metrics.span('selenium_startup'):
+        webdriver = lazy_import('selenium.webdriver')
+        service = lazy_import('selenium.webdriver.chrome.service').Service(resolve_driver_path())
+        driver = webdriver.Chrome(service=service, options=chrome_options())
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    return driver
+
+
+class DriverPool:
+    """Bounded pool of reusable headless browsers.
+
+    Drivers are created lazily up to ``size``. Callers past that wait up to
+    ``checkout_timeout`` seconds for one to be checked back in. A driver is
+    reset (cookies, storage, extra tabs) on checkin, health checked again
+    on checkout, and replaced after ``max_uses`` checkouts or when either
+    check fails.
+    """
+
+    def __init__(self, size=2, max_uses=50, checkout_timeout=60, factory=create_chrome_driver):
+        self.size = size
+        self.max_uses = max_uses
+        self.checkout_timeout = checkout_timeout
+        self.factory = factory
+        self._idle = []
+        self._uses = {}
+        self._total = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {'created': 0, 'recycled': 0, 'crashed': 0, 'checkouts': 0,
+                       'waits': 0, 'timeouts': 0, 'wait_seconds': 0.0}
+
+    def checkout(self, timeout=None):
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        started = time.monotonic()
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Driver pool is closed")
+                    if self._idle:
+                        driver = self._idle.pop()
+                        break
+                    if self._total < self.size:
+                        # Reserve the slot, build the driver outside the lock
+                        self._total += 1
+                        driver = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeout(f"No browser available within {timeout}s")
+                    waited = True
+                    self._cond.wait(remaining)
+            # A browser can die while idle; check before handing it out
+            if driver is None or self.is_healthy(driver):
+                break
+            logger.warning("Discarding idle browser that no longer responds")
+            with self._cond:
+                self._uses.pop(id(driver), None)
+                self._total -= 1
+                self._stats['crashed'] += 1
+                self._cond.notify()
+            self._quit(driver)
+        with self._cond:
+            self._stats['checkouts'] += 1
+            if waited:
+                self._stats['waits'] += 1
+                self._stats['wait_seconds'] += time.monotonic() - started
+
+        if driver is None:
+            try:
+                driver = self.factory()
+            except Exception:
+                with self._cond:
+                    self._total -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._stats['created'] += 1
+                self._uses[id(driver)] = 0
+        with self._cond:
+            self._uses[id(driver)] += 1
+        return driver
+
+    def checkin(self, driver, healthy=True):
+        if healthy:
+            healthy = self._reset(driver)
+        with self._cond:
+            uses = self._uses.get(id(driver), 0)
+            retire = not healthy or uses >= self.max_uses or self._closed
+            if retire:
+                self._uses.pop(id(driver), None)
+                self._total -= 1
+                self._stats['recycled' if healthy else 'crashed'] += 1
+            else:
+                self._idle.append(driver)
+            self._cond.notify()
+        if retire:
+            self._quit(driver)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        driver = self.checkout(timeout)
+        healthy = True
+        try:
+            yield driver
+        except Exception:
+            healthy = self.is_healthy(driver)
+            raise
+        finally:
+            self.checkin(driver, healthy)
+
+    @staticmethod
+    def is_healthy(driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _reset(self, driver):
+        """Clear state left by the previous user; False if the browser no longer responds."""
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.delete_all_cookies()
+            driver.execute_script("try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}")
+            driver.get('about:blank')
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding browser that failed to reset: {e}")
+            return False
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+            logger.info("Selenium driver closed")
+        except Exception as e:
+            logger.warning(f"Error closing Selenium driver: {e}")
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._cond.notify_all()
+        for driver in idle:
+            self._quit(driver)
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats['size'] = self.size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._total - len(self._idle)
+        return stats
+
+
+driver_pool = DriverPool(
+    size=int(os.environ.get('SCRAPER_BROWSERS', 2)),
+    max_uses=int(os.environ.get('SCRAPER_BROWSER_MAX_USES', 50)),
+    checkout_timeout=float(os.environ.get('SCRAPER_BROWSER_WAIT', 60)),
+)
+atexit.register(driver_pool.close)
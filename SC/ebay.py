@@ -0,0 +1,119 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote_plus
+import logging
+
+from fetcher import fetch_page
+from extractors import parse_html
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRODUCTS = 100
+MAX_PAGES = 10
+PAGE_CONCURRENCY = 3
+LISTINGS_PER_PAGE = 60  # eBay's default page size, used to guess how many pages to request up front
+
+_ITEM_ID = re.compile(r'/itm/(?:[^/?]+/)?(\d+)')
+
+
+def search_url(product_name, page=1):
+    url = f"https://www.ebay.com/sch/i.html?_nkw={quote_plus(product_name)}&_sop=12"
+    return url if page == 1 else f"{url}&_pgn={page}"
+
+
+def item_id(link):
+    match = _ITEM_ID.search(link)
+    return match.group(1) if match else link.split('?')[0]
+
+
+def parse_product(product):
+    """Turn one s-item <li> into a product dict; raises AttributeError on incomplete listings."""
+    title = product.find('div', {'class': 's-item__title'}).text.strip()
+    link = product.find('a', {'class': 's-item__link'})['href']
+
+    # Improved image extraction
+    image_elem = product.find('img')
+    image_url = None
+    if image_elem:
+        # Check multiple possible attributes for the image source
+        image_url = image_elem.get('src') or image_elem.get('data-src') or image_elem.get('srcset')
+        if image_url and 'srcset' in image_elem.attrs:
+            # Handle srcset by taking the first URL
+            image_url = image_url.split(',')[0].split()[0]
+        if image_url and not image_url.startswith('http'):
+            image_url = f"https:{image_url}"
+    # Fallback if no image is found
+    image_url = image_url if image_url else "https://via.placeholder.com/150?text=No+Image"
+
+    price_elem = product.find('span', {'class': 's-item__price'})
+    rating_elem = product.find('div', {'class': 'x-star-rating'})
+    return {
+        "title": title,
+        "link": link,
+        "image_url": image_url,
+        "price": price_elem.text.strip() if price_elem else 'Price not available',
+        "rating": rating_elem.text.strip() if rating_elem else 'No rating'
+    }
+
+
+def fetch_listings(product_name, page):
+    response = fetch_page(search_url(product_name, page), profile='ebay')
+    response.raise_for_status()
+    soup = parse_html(response.content, tags=('li',))
+    listings = soup.find_all('li', {'class': 's-item s-item__pl-on-bottom'})
+    if not listings and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("No listings on page %d for %r. Response snippet: %s", page, product_name, response.text[:500])
+    # The first two entries are eBay placeholders, not real results
+    return listings[2:]
+
+
+def iter_ebay_products(product_name, count=DEFAULT_PRODUCTS, max_pages=MAX_PAGES):
+    """Yield up to `count` unique products across result pages, fetched a few pages at a time.
+
+    Pages are requested concurrently but consumed in order; parsing stops as
+    soon as `count` products have been yielded and pages not yet started
+    are cancelled. Listings repeated across pages are skipped by item ID.
+    """
+    wanted_pages = -(-count // LISTINGS_PER_PAGE)
+    seen = set()
+    produced = 0
+    next_page = 1
+    pending = []
+    executor = ThreadPoolExecutor(max_workers=PAGE_CONCURRENCY, thread_name_prefix='ebay')
+    try:
+        while produced < count:
+            while next_page <= min(wanted_pages, max_pages) and len(pending) < PAGE_CONCURRENCY:
+                pending.append((next_page, executor.submit(fetch_listings, product_name, next_page)))
+                next_page += 1
+            if not pending:
+                return
+            page, future = pending.pop(0)
+            try:
+                listings = future.result()
+            except Exception as e:
+                if page == 1:
+                    raise
+                logger.warning("Stopping at eBay page %d for %r: %s", page, product_name, e)
+                return
+            if not listings:
+                return
+            for product in listings:
+                try:
+                    details = parse_product(product)
+                except (AttributeError, KeyError, TypeError) as e:
+                    logger.debug("Error parsing product: %s", e)
+                    continue
+                key = item_id(details['link'])
+                if key in seen:
+                    continue
+                seen.add(key)
+                logger.debug("Extracted image URL: %s", details['image_url'])
+                yield details
+                produced += 1
+                if produced >= count:
+                    return
+            # Still short: make sure enough further pages are queued for what is left
+            wanted_pages = max(wanted_pages, page + -(-(count - produced) // LISTINGS_PER_PAGE))
+    finally:
+        # Don't wait for pages we no longer need
+        executor.shutdown(wait=False, cancel_futures=True)
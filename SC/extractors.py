@@ -0,0 +1,519 @@
+import codecs
+import os
+import re
+import time
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit, unquote
+import logging
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+import fetcher
+import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _pick_parser():
+    preferred = os.environ.get('SCRAPER_PARSER')
+    if preferred:
+        return preferred
+    try:
+        import lxml  # noqa: F401
+        return 'lxml'
+    except ImportError:
+        return 'html.parser'
+
+
+# Fastest available BeautifulSoup backend; lxml is optional
+PARSER = _pick_parser()
+
+
+def parse_html(markup, tags=None):
+    """Parse markup with the preferred backend, materializing only `tags` (and their subtrees) if given."""
+    parse_only = SoupStrainer(list(tags)) if tags else None
+    return BeautifulSoup(markup, PARSER, parse_only=parse_only)
+
+
+class Extractor:
+    """Collects one kind of data while the engine walks a parsed page.
+
+    Subclasses list the tag names they care about in ``tags``; the engine
+    calls handle() for each matching element in document order and result()
+    once the walk is done. ``key`` identifies the result in the page cache.
+    Extractors given a ``limit`` report ``done`` once they have enough, which
+    lets the engine stop parsing (and downloading) early.
+    """
+    name = None
+    tags = ()
+
+    def __init__(self, url, limit=None):
+        self.url = url
+        self.limit = limit
+
+    @property
+    def key(self):
+        return self.name
+
+    @property
+    def done(self):
+        return False
+
+    def handle(self, element):
+        raise NotImplementedError
+
+    def result(self):
+        raise NotImplementedError
+
+
+class TableExtractor(Extractor):
+    name = 'tables'
+    tags = ('table',)
+
+    def __init__(self, url):
+        super().__init__(url)
+        self.table_data = []
+
+    def handle(self, table):
+        table_rows = []
+        for row in table.find_all('tr'):
+            columns = [col.text.strip() for col in row.find_all('td')]
+            if columns:
+                table_rows.append(columns)
+        if table_rows:
+            self.table_data.append(table_rows)
+
+    def result(self):
+        return self.table_data
+
+
+def media_path(url):
+    """Lowercased URL path, for matching file extensions without the query string."""
+    return unquote(urlsplit(url).path).lower()
+
+
+def best_srcset_candidate(srcset):
+    """The largest candidate in a srcset ("a.jpg 480w, b.jpg 960w" or "a.jpg 1x, b.jpg 2x")."""
+    best, best_size = None, -1.0
+    for candidate in srcset.split(','):
+        parts = candidate.split()
+        if not parts:
+            continue
+        size = 1.0
+        if len(parts) > 1 and parts[1][:-1].replace('.', '', 1).isdigit():
+            size = float(parts[1][:-1])
+        if size > best_size:
+            best, best_size = parts[0], size
+    return best
+
+
+class MediaExtractor(Extractor):
+    """Base for image and video extractors: resolves each found URL against the page (honouring
+    <base href>), keeps those whose path has an allowed extension and drops duplicates."""
+    extensions = ()
+
+    def __init__(self, url, limit=None):
+        super().__init__(url, limit)
+        self.base = url
+        self.media_urls = []
+        self._seen = set()
+
+    def add(self, target, declared_type=None):
+        if not target or target.strip().startswith(('data:', 'blob:', 'javascript:')):
+            return
+        media_url = urljoin(self.base, target.strip()).split('#')[0]
+        if not media_url.startswith(('http://', 'https://')) or media_url in self._seen:
+            return
+        if self.accepts(media_url, declared_type):
+            self._seen.add(media_url)
+            self.media_urls.append(media_url)
+
+    def handle(self, element):
+        if element.name == 'base':
+            if element.get('href') and self.base == self.url:
+                self.base = urljoin(self.url, element['href'].strip())
+            return
+        self.handle_media(element)
+
+    def accepts(self, media_url, declared_type):
+        return media_path(media_url).endswith(self.extensions)
+
+    def handle_media(self, element):
+        raise NotImplementedError
+
+    @property
+    def done(self):
+        return self.limit is not None and len(self.media_urls) >= self.limit
+
+    def result(self):
+        return self.media_urls[:self.limit]
+
+
+class ImageExtractor(MediaExtractor):
+    name = 'images'
+    tags = ('base', 'img')
+    allowed_formats = {'png': ['.png'], 'jpg': ['.jpg', '.jpeg'], 'all': ['.png', '.jpg', '.jpeg']}
+    # Lazy-loading scripts keep the real image here and a placeholder in src
+    lazy_attributes = ('data-src', 'data-lazy-src', 'data-original')
+
+    def __init__(self, url, image_format='all', limit=None):
+        super().__init__(url, limit)
+        self.image_format = image_format
+        self.extensions = tuple(self.allowed_formats[image_format])
+
+    @property
+    def key(self):
+        return f'images:{self.image_format}'
+
+    def handle_media(self, element):
+        srcset = element.get('data-srcset') or element.get('srcset')
+        candidates = [element.get(name) for name in self.lazy_attributes]
+        candidates += [srcset and best_srcset_candidate(srcset), element.get('src')]
+        for candidate in candidates:
+            before = len(self.media_urls)
+            self.add(candidate)
+            if len(self.media_urls) > before:
+                break
+
+
+class VideoExtractor(MediaExtractor):
+    name = 'videos'
+    tags = ('base', 'video')
+    allowed_formats = {'mp4': ['.mp4', '.m4v'], 'webm': ['.webm'], 'ogg': ['.ogg', '.ogv']}
+
+    def __init__(self, url, video_format='all', limit=None):
+        super().__init__(url, limit)
+        self.video_format = video_format
+        self.extensions = tuple(self.allowed_formats.get(video_format, ['.' + video_format]))
+
+    def accepts(self, media_url, declared_type):
+        # Anything inside <video> is a video; a format filter matches the extension or the source's type
+        if self.video_format == 'all':
+            return True
+        return super().accepts(media_url, declared_type) or declared_type == f'video/{self.video_format}'
+
+    @property
+    def key(self):
+        return f'videos:{self.video_format}'
+
+    def handle_media(self, video):
+        self.add(video.get('src') or video.get('data-src'))
+        for source in video.find_all('source'):
+            self.add(source.get('src') or source.get('data-src'), (source.get('type') or '').split(';')[0].strip())
+
+
+NON_HEADLINE_PHRASES = (
+    'home', 'about', 'contact', 'login', 'register', "today's gallery", "The Daily Star - Bangladesh News, Political News, Bangladesh Economy & Videos, Breaking News"
+)
+_NON_HEADLINE = re.compile('|'.join(re.escape(phrase) for phrase in NON_HEADLINE_PHRASES), re.IGNORECASE)
+_HEADLINE_CLASS = re.compile('excerpt|title|headline', re.IGNORECASE)
+
+
+def is_valid_headline(text):
+    if len(text) < 15:
+        return False
+    return not _NON_HEADLINE.search(text)
+
+
+def _headline_class(css_class):
+    return bool(css_class) and _HEADLINE_CLASS.search(css_class) is not None
+
+
+class HeadlineExtractor(Extractor):
+    """Headings first; falls back to headline-classed links, then to every link."""
+    name = 'headlines'
+    tags = ('h1', 'h2', 'h3', 'a')
+
+    def __init__(self, url, limit=None):
+        super().__init__(url, limit)
+        self.saw_heading = False
+        self.heading_texts = []
+        self._seen = set()
+        self.classed_links = []
+        self.links = []
+
+    def _add_text(self, texts, seen, element):
+        text = element.get_text().strip()
+        if text and text not in seen and is_valid_headline(text):
+            seen.add(text)
+            texts.append(text)
+
+    def handle(self, element):
+        if element.name != 'a':
+            # Any heading on the page means links are never used
+            self.saw_heading = True
+            self.classed_links = self.links = []
+            self._add_text(self.heading_texts, self._seen, element)
+            return
+        if self.saw_heading:
+            return
+        self.links.append(element)
+        if any(_headline_class(c) for c in element.get('class') or ()):
+            self.classed_links.append(element)
+
+    @property
+    def done(self):
+        return self.limit is not None and len(self.heading_texts) >= self.limit
+
+    def result(self):
+        if self.saw_heading:
+            headline_texts = self.heading_texts
+        else:
+            headline_texts = []
+            seen = set()
+            for link in self.classed_links or self.links:
+                self._add_text(headline_texts, seen, link)
+        headline_texts = headline_texts[:self.limit]
+        return headline_texts if headline_texts else None
+
+
+class PdfLinkExtractor(Extractor):
+    name = 'pdf_links'
+    tags = ('a', 'source')
+
+    def __init__(self, url):
+        super().__init__(url)
+        self.anchor_links = []
+        self.source_links = []
+
+    def _link(self, target):
+        # Relative and protocol-relative links are resolved against the page
+        target = urljoin(self.url, target.strip())
+        path = urlsplit(target).path
+        if path.lower().endswith('.pdf') and target.startswith(('http://', 'https://')):
+            pdf_name = unquote(path.rsplit('/', 1)[-1])
+            return {'url': target.split('#')[0], 'name': pdf_name}
+        return None
+
+    def handle(self, element):
+        if element.name == 'a':
+            link = element.get('href') and self._link(element['href'])
+            if link:
+                self.anchor_links.append(link)
+        else:
+            link = element.get('src') and self._link(element['src'])
+            if link:
+                self.source_links.append(link)
+
+    def result(self):
+        # <a> links first, then <source>, without duplicate URLs
+        seen_urls = set()
+        unique_pdf_links = []
+        for link in self.anchor_links + self.source_links:
+            if link['url'] not in seen_urls:
+                seen_urls.add(link['url'])
+                unique_pdf_links.append(link)
+        return unique_pdf_links
+
+
+class LinkExtractor(Extractor):
+    """Every followable link on a page, resolved to an absolute URL (honouring <base href>)."""
+    name = 'links'
+    tags = ('base', 'a', 'area', 'iframe', 'frame', 'embed')
+
+    def __init__(self, url, limit=None):
+        super().__init__(url, limit)
+        self.base = url
+        self.links = []
+
+    def handle(self, element):
+        if element.name == 'base':
+            if element.get('href') and self.base == self.url:
+                self.base = urljoin(self.url, element['href'].strip())
+            return
+        target = element.get('href') or element.get('src')
+        if not target or target.startswith(('#', 'javascript:', 'mailto:', 'tel:', 'data:')):
+            return
+        link = urljoin(self.base, target.strip()).split('#')[0]
+        if link.startswith(('http://', 'https://')):
+            self.links.append(link)
+
+    def result(self):
+        return list(dict.fromkeys(self.links))
+
+
+EXTRACTORS = {
+    'table': TableExtractor,
+    'image': ImageExtractor,
+    'video': VideoExtractor,
+    'news': HeadlineExtractor,
+    'pdf': PdfLinkExtractor,
+}
+
+
+def run_extractors(markup, extractors):
+    """Parse markup once and feed every extractor in a single walk. Returns {key: result}."""
+    if not extractors:
+        return {}
+    wanted = {}
+    for extractor in extractors:
+        for tag in extractor.tags:
+            wanted.setdefault(tag, []).append(extractor)
+    limited = all(extractor.limit is not None for extractor in extractors)
+    with metrics.span('parse'):
+        soup = parse_html(markup, wanted)
+    with metrics.span('extract'):
+        for element in soup.find_all(list(wanted)):
+            for extractor in wanted[element.name]:
+                if not extractor.done:
+                    extractor.handle(element)
+            if limited and all(extractor.done for extractor in extractors):
+                break
+        return {extractor.key: extractor.result() for extractor in extractors}
+
+
+def extract_page(response, extractors):
+    """Run extractors over a fetched page, reusing results cached on the page and storing new ones.
+
+    A cached full result also answers a limited request (it is sliced);
+    limited results themselves are never stored.
+    """
+    entry = getattr(response, 'cache_entry', None)
+    results = {}
+    pending = []
+    for extractor in extractors:
+        if entry is not None and extractor.key in entry.results:
+            cached = entry.results[extractor.key]
+            results[extractor.key] = cached[:extractor.limit] if extractor.limit and cached else cached
+        else:
+            pending.append(extractor)
+    fresh = run_extractors(response.content, pending)
+    if entry is not None:
+        for extractor in pending:
+            result = fresh[extractor.key]
+            if result is not None and extractor.limit is None:
+                fetcher.page_cache.save_result(response.cache_key, entry, extractor.key, result)
+    results.update(fresh)
+    return results
+
+
+VOID_TAGS = frozenset(['base', 'img', 'source'])
+
+
+class StreamElement:
+    """The slice of a bs4 Tag the extractors use, built while the HTML is still arriving."""
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = {key: value or '' for key, value in attrs}
+        if 'class' in self.attrs:
+            self.attrs['class'] = self.attrs['class'].split()
+        self.children = []
+        self.text_parts = []
+
+    def get(self, key, default=None):
+        return self.attrs.get(key, default)
+
+    def __getitem__(self, key):
+        return self.attrs[key]
+
+    def find_all(self, name):
+        return [child for child in self.children if child.name == name]
+
+    def get_text(self):
+        return ''.join(self.text_parts)
+
+    @property
+    def text(self):
+        return self.get_text()
+
+
+class StreamingExtractorParser(HTMLParser):
+    """Feeds extractors from an incremental parse; ``finished`` flips once every limited extractor is done.
+
+    Supports the element-level extractors (images, videos, headlines, PDF
+    links); tables still need the full tree.
+    """
+
+    def __init__(self, extractors):
+        super().__init__(convert_charrefs=True)
+        self.extractors = extractors
+        self.wanted = {}
+        for extractor in extractors:
+            for tag in extractor.tags:
+                self.wanted.setdefault(tag, []).append(extractor)
+        self.limited = all(extractor.limit is not None for extractor in extractors)
+        self.finished = False
+        self._open = []
+
+    def _emit(self, element):
+        for extractor in self.wanted[element.name]:
+            if not extractor.done:
+                extractor.handle(element)
+        if self.limited and all(extractor.done for extractor in self.extractors):
+            self.finished = True
+
+    def handle_starttag(self, tag, attrs):
+        if self.finished:
+            return
+        if tag == 'source':
+            for element in self._open:
+                if element.name == 'video':
+                    element.children.append(StreamElement(tag, attrs))
+        if tag not in self.wanted:
+            return
+        element = StreamElement(tag, attrs)
+        if tag in VOID_TAGS:
+            self._emit(element)
+        else:
+            self._open.append(element)
+
+    def handle_endtag(self, tag):
+        for position in range(len(self._open) - 1, -1, -1):
+            if self._open[position].name == tag:
+                # Anything still open inside it is implicitly closed too
+                closed = self._open[position:]
+                del self._open[position:]
+                for element in reversed(closed):
+                    self._emit(element)
+                return
+
+    def handle_data(self, data):
+        for element in self._open:
+            element.text_parts.append(data)
+
+
+def stream_extractors(url, extractors, profile='default', max_bytes=None):
+    """Download and parse a page chunk by chunk, stopping as soon as the limited extractors are satisfied."""
+    response = fetcher.fetch(url, profile=profile, stream=True)
+    started = time.perf_counter()
+    try:
+        response.raise_for_status()
+        encoding = response.encoding if 'charset' in response.headers.get('Content-Type', '').lower() else 'utf-8'
+        try:
+            decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        except LookupError:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        parser = StreamingExtractorParser(extractors)
+        received = 0
+        for chunk in fetcher.iter_body(response, max_bytes):
+            received += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            if parser.finished:
+                logger.debug("Stopped %s after %d bytes", url, received)
+                break
+        else:
+            parser.feed(decoder.decode(b'', final=True))
+            parser.close()
+    finally:
+        response.close()
+        # Download and parse are interleaved here, so they are timed together
+        metrics.record('stream_parse', time.perf_counter() - started)
+    return {extractor.key: extractor.result() for extractor in extractors}
+
+
+def extract_url(url, extractors, profile='default'):
+    """Fetch a page and run extractors over it.
+
+    When every extractor has a limit and the page is not already cached,
+    the body is streamed into an incremental parser and the download is
+    cut off once the limits are met.
+    """
+    if all(extractor.limit is not None for extractor in extractors):
+        response = fetcher.peek_page(url, profile)
+        if response is None:
+            return stream_extractors(url, extractors, profile)
+    else:
+        response = fetcher.fetch_page(url, profile=profile)
+    response.raise_for_status()
+    return extract_page(response, extractors)
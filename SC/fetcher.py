@@ -0,0 +1,270 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+import logging
+
+import metrics
+from page_cache import CacheEntry, cache_from_env
+
+logger = logging.getLogger(__name__)
+
+BROWSER_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+# Header profiles shared by every scraper. 'default' keeps the stock requests headers.
+HEADER_PROFILES = {
+    'default': {},
+    'browser': {
+        "User-Agent": BROWSER_USER_AGENT
+    },
+    'ebay': {
+        "User-Agent": BROWSER_USER_AGENT,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.5",
+        "Referer": "https://www.ebay.com/"
+    },
+}
+
+DEFAULT_TIMEOUT = float(os.environ.get('SCRAPER_TIMEOUT', 10))
+MAX_BODY_BYTES = int(os.environ.get('SCRAPER_MAX_BODY_BYTES', 20 * 1024 * 1024))
+CHUNK_SIZE = 16 * 1024
+
+# Retry/backoff and pool sizing, overridable through the environment or configure()
+_config = {
+    'retries': int(os.environ.get('SCRAPER_RETRIES', 2)),
+    'backoff_factor': float(os.environ.get('SCRAPER_BACKOFF', 0.3)),
+    'pool_connections': int(os.environ.get('SCRAPER_POOL_HOSTS', 32)),
+    'pool_maxsize': int(os.environ.get('SCRAPER_POOL_MAXSIZE', 10)),
+}
+
+_lock = threading.Lock()
+_session = None
+_requests_per_host = {}
+page_cache = cache_from_env()
+
+# Response headers worth keeping with a cached page
+_CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+class BodyTooLarge(requests.exceptions.RequestException):
+    pass
+
+
+def _build_session():
+    retry = Retry(
+        total=_config['retries'],
+        backoff_factor=_config['backoff_factor'],
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=_config['pool_connections'],
+        pool_maxsize=_config['pool_maxsize'],
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def get_session():
+    """Return the process-wide session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def configure(**options):
+    """Change retry/pool settings and rebuild the shared session."""
+    global _session
+    unknown = set(options) - set(_config)
+    if unknown:
+        raise ValueError(f"Unknown fetcher options: {', '.join(sorted(unknown))}")
+    with _lock:
+        _config.update(options)
+        old_session, _session = _session, None
+        _requests_per_host.clear()
+    if old_session is not None:
+        old_session.close()
+
+
+def headers_for(profile):
+    try:
+        return HEADER_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown header profile: {profile}")
+
+
+def fetch(url, profile='default', timeout=None, headers=None, **kwargs):
+    """GET a URL through the shared pooled session using a named header profile."""
+    request_headers = dict(headers_for(profile))
+    if headers:
+        request_headers.update(headers)
+    host = urlsplit(url).netloc.lower()
+    with _lock:
+        _requests_per_host[host] = _requests_per_host.get(host, 0) + 1
+    started = time.perf_counter()
+    try:
+        response = get_session().get(url, headers=request_headers,
+                                     timeout=timeout or DEFAULT_TIMEOUT, **kwargs)
+    except requests.exceptions.RequestException:
+        metrics.upstream_requests.inc(profile=profile, status='error')
+        raise
+    # response.elapsed stops at the headers; without stream=True the rest is the body download
+    metrics.record('connect', response.elapsed.total_seconds())
+    metrics.upstream_requests.inc(profile=profile, status=f'{response.status_code // 100}xx')
+    if not kwargs.get('stream'):
+        metrics.record('download', max(time.perf_counter() - started - response.elapsed.total_seconds(), 0))
+        metrics.fetched_bytes.inc(len(response.content))
+    return response
+
+
+def head(url, profile='default', timeout=None, headers=None):
+    """HEAD a URL through the shared session, following redirects."""
+    request_headers = dict(headers_for(profile))
+    if headers:
+        request_headers.update(headers)
+    host = urlsplit(url).netloc.lower()
+    with _lock:
+        _requests_per_host[host] = _requests_per_host.get(host, 0) + 1
+    try:
+        response = get_session().head(url, headers=request_headers, timeout=timeout or DEFAULT_TIMEOUT,
+                                      allow_redirects=True)
+    except requests.exceptions.RequestException:
+        metrics.upstream_requests.inc(profile=profile, status='error')
+        raise
+    metrics.record('connect', response.elapsed.total_seconds())
+    metrics.upstream_requests.inc(profile=profile, status=f'{response.status_code // 100}xx')
+    return response
+
+
+def iter_body(response, max_bytes=None):
+    """Yield decoded body chunks, raising BodyTooLarge once more than max_bytes arrive."""
+    max_bytes = max_bytes or MAX_BODY_BYTES
+    declared = response.headers.get('Content-Length')
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        response.close()
+        raise BodyTooLarge(f"Response is {declared} bytes, limit is {max_bytes}", response=response)
+    received = 0
+    try:
+        for chunk in response.iter_content(CHUNK_SIZE):
+            received += len(chunk)
+            if received > max_bytes:
+                response.close()
+                raise BodyTooLarge(f"Response exceeds the {max_bytes} byte limit", response=response)
+            yield chunk
+    finally:
+        metrics.fetched_bytes.inc(received)
+
+
+def fetch_capped(url, profile='default', timeout=None, headers=None, max_bytes=None):
+    """Like fetch(), but reads the body in chunks and refuses bodies over max_bytes."""
+    response = fetch(url, profile=profile, timeout=timeout, headers=headers, stream=True)
+    with metrics.span('download'):
+        response._content = b''.join(iter_body(response, max_bytes))
+    response._content_consumed = True
+    return response
+
+
+def _response_from_entry(entry):
+    response = requests.Response()
+    response.status_code = entry.status_code
+    response.url = entry.url
+    response.headers = CaseInsensitiveDict(entry.headers)
+    response.encoding = entry.encoding
+    response._content = entry.content
+    return response
+
+
+def fetch_page(url, profile='default', timeout=None):
+    """GET a page through the page cache.
+
+    Fresh entries are returned without a request; stale ones are revalidated
+    with If-None-Match / If-Modified-Since. The returned response carries
+    ``cache_key`` and ``cache_entry`` so callers can reuse extracted results
+    stored on the entry (see extractors.extract_page).
+    """
+    if page_cache is None:
+        return fetch_capped(url, profile=profile, timeout=timeout)
+
+    key = page_cache.key(url, profile)
+    entry, fresh = page_cache.lookup(key)
+    if entry is not None and fresh:
+        page_cache.record('hits', entry.size)
+        response = _response_from_entry(entry)
+    else:
+        conditional = {}
+        if entry is not None:
+            if entry.etag:
+                conditional['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                conditional['If-Modified-Since'] = entry.last_modified
+        response = fetch_capped(url, profile=profile, timeout=timeout, headers=conditional)
+        if entry is not None and response.status_code == 304:
+            page_cache.refresh(key, entry)
+            page_cache.record('revalidated', entry.size)
+            response = _response_from_entry(entry)
+        else:
+            page_cache.record('misses', len(response.content))
+            if response.status_code != 200:
+                return response
+            kept = {name: response.headers[name] for name in _CACHED_HEADERS if name in response.headers}
+            entry = CacheEntry(url, response.status_code, kept, response.content, encoding=response.encoding)
+            page_cache.store(key, entry)
+    response.cache_key = key
+    response.cache_entry = entry
+    return response
+
+
+def peek_page(url, profile='default'):
+    """Return the cached page if it is still fresh, without touching the network; otherwise None."""
+    if page_cache is None:
+        return None
+    key = page_cache.key(url, profile)
+    entry, fresh = page_cache.lookup(key)
+    if entry is None or not fresh:
+        return None
+    page_cache.record('hits', entry.size)
+    response = _response_from_entry(entry)
+    response.cache_key = key
+    response.cache_entry = entry
+    return response
+
+
+def stats():
+    """Connection reuse per host: requests issued vs. new connections opened."""
+    session = get_session()
+    opened = {}
+    # One adapter is mounted for both http:// and https://; count each of its pools once
+    for adapter in {id(adapter): adapter for adapter in session.adapters.values()}.values():
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = pool.host if pool.port in (None, 80, 443) else f"{pool.host}:{pool.port}"
+            opened[host] = opened.get(host, 0) + pool.num_connections
+
+    with _lock:
+        per_host = dict(_requests_per_host)
+    hosts = {}
+    for host, count in per_host.items():
+        misses = min(opened.get(host, 0), count)
+        hosts[host] = {'requests': count, 'reuse_hits': count - misses, 'reuse_misses': misses}
+    return {
+        'hosts': hosts,
+        'reuse_hits': sum(h['reuse_hits'] for h in hosts.values()),
+        'reuse_misses': sum(h['reuse_misses'] for h in hosts.values()),
+        'config': dict(_config),
+        'page_cache': page_cache.stats() if page_cache is not None else None,
+    }
@@ -0,0 +1,321 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.environ.get('SCRAPER_JOB_WORKERS', 4))
+MAX_QUEUED = 200
+DEFAULT_TIMEOUT = 300
+MAX_TIMEOUT = 1800
+JOB_TTL = 3600  # finished jobs are kept this long for polling
+MAX_PROGRESS = 1000
+CANCEL_POLL_INTERVAL = 1.0  # how often a running job looks for a cancel from another worker
+
+ACTIVE = ('queued', 'running')
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobTimeout(JobCancelled):
+    pass
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+    """One submitted unit of work. Job functions receive it to report progress and check for cancellation."""
+
+    def __init__(self, kind, params, key, timeout, store=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.key = key
+        self.timeout = timeout
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.progress = []
+        self._progress_seq = 0
+        self.coalesced = 0
+        self.version = 0
+        self.future = None
+        self._deadline = None
+        self._cancel_requested = False
+        self._store = store
+        self._next_store_check = 0.0
+        self._changed = threading.Condition()
+
+    def check(self):
+        """Raise JobCancelled or JobTimeout if the job should stop. Call between steps of long work."""
+        if self._store is not None and time.monotonic() >= self._next_store_check:
+            self._next_store_check = time.monotonic() + CANCEL_POLL_INTERVAL
+            if self._store.cancel_requested(self.id):
+                self._cancel_requested = True
+        if self._cancel_requested:
+            raise JobCancelled("Job was cancelled.")
+        if self._deadline is not None and time.monotonic() > self._deadline:
+            raise JobTimeout(f"Job exceeded its {self.timeout:g}s timeout.")
+
+    def report(self, **event):
+        """Record a progress event that pollers and streams will see. Events are numbered by 'seq'."""
+        with self._changed:
+            self._progress_seq += 1
+            self.progress.append(dict(event, seq=self._progress_seq))
+            if len(self.progress) > MAX_PROGRESS:
+                del self.progress[0]
+            self.version += 1
+            self._changed.notify_all()
+
+    def _update(self, **fields):
+        with self._changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.version += 1
+            self._changed.notify_all()
+        if self._store is not None:
+            self._store.save(self.to_dict())
+
+    def wait(self, version, timeout):
+        """Block until the job changes past `version` or finishes, at most `timeout` seconds."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version > version or self.status not in ACTIVE, timeout)
+            return self.version
+
+    def to_dict(self, progress=True):
+        with self._changed:
+            data = {
+                'id': self.id,
+                'type': self.kind,
+                'params': self.params,
+                'status': self.status,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'timeout': self.timeout,
+                'coalesced': self.coalesced,
+                'result': self.result,
+                'error': self.error,
+            }
+            if progress:
+                data['progress'] = list(self.progress)
+            return data
+
+
+class SqliteJobStore:
+    """Job records in SQLite, so every worker process can poll or cancel any job.
+
+    A job still runs in the process that accepted it; other processes only
+    read its record and set its cancel flag.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT, record TEXT, "
+                             "cancel_requested INTEGER DEFAULT 0, updated_at REAL)")
+
+    def save(self, record):
+        with self._lock, self._db:
+            self._db.execute("INSERT INTO jobs (id, status, record, updated_at) VALUES (?, ?, ?, ?) "
+                             "ON CONFLICT(id) DO UPDATE SET status = excluded.status, record = excluded.record, "
+                             "updated_at = excluded.updated_at",
+                             (record['id'], record['status'], json.dumps(record), time.time()))
+
+    def load(self, job_id):
+        with self._lock:
+            row = self._db.execute("SELECT status, record FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(json.loads(row[1]), status=row[0]) if row else None
+
+    def request_cancel(self, job_id):
+        with self._lock, self._db:
+            cursor = self._db.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN ('queued', 'running')",
+                                      (job_id,))
+        return cursor.rowcount > 0
+
+    def cancel_requested(self, job_id):
+        with self._lock:
+            row = self._db.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def prune(self, before):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM jobs WHERE status NOT IN ('queued', 'running') AND updated_at < ?", (before,))
+
+    def mark_abandoned(self, older_than):
+        """Fail jobs whose worker stopped updating them (it exited or was restarted)."""
+        with self._lock, self._db:
+            self._db.execute("UPDATE jobs SET status = 'failed', updated_at = ? WHERE status IN ('queued', 'running') "
+                             "AND updated_at < ?", (time.time(), older_than))
+
+
+class JobQueue:
+    """Runs registered job types on a bounded thread pool and keeps their status for polling.
+
+    Identical submissions (same type and parameters) made while one is
+    queued or running are coalesced onto that job. Cancellation and
+    timeouts are immediate for queued jobs; a running job is marked
+    cancelled / timed out at once and its function is asked to stop at its
+    next ``job.check()`` — its eventual result is discarded. CPU-heavy
+    functions do their own process-pool fan-out (see pdf_extract), so
+    these threads mostly wait on I/O.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, store=None, max_queued=MAX_QUEUED, ttl=JOB_TTL):
+        self.store = store
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self._handlers = {}
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        self._inflight = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self._stats = {'submitted': 0, 'coalesced': 0, 'done': 0, 'failed': 0, 'cancelled': 0, 'timeout': 0}
+        if store is not None:
+            store.mark_abandoned(time.time() - MAX_TIMEOUT)
+
+    def register(self, kind, handler):
+        """Register handler(job, params) for a job type."""
+        self._handlers[kind] = handler
+
+    @property
+    def kinds(self):
+        return sorted(self._handlers)
+
+    def submit(self, kind, params, timeout=DEFAULT_TIMEOUT):
+        """Queue a job, or join an identical one in flight. Returns (job, coalesced)."""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job type: {kind}")
+        timeout = min(float(timeout), MAX_TIMEOUT)
+        key = hashlib.sha1(json.dumps([kind, params], sort_keys=True).encode('utf-8')).hexdigest()
+        self._prune()
+        with self._lock:
+            existing = self._inflight.get(key)
+            if existing is not None and existing.status in ACTIVE:
+                existing.coalesced += 1
+                self._stats['coalesced'] += 1
+                return existing, True
+            if sum(job.status == 'queued' for job in self._inflight.values()) >= self.max_queued:
+                raise JobQueueFull(f"More than {self.max_queued} jobs are waiting; try again later.")
+            job = Job(kind, params, key, timeout, self.store)
+            self._jobs[job.id] = job
+            self._inflight[key] = job
+            self._stats['submitted'] += 1
+        if self.store is not None:
+            self.store.save(job.to_dict())
+        job.future = self._executor.submit(self._run, job)
+        return job, False
+
+    def get(self, job_id):
+        """The local Job object, or None if it belongs to another process (see record())."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def record(self, job_id):
+        """Job status as a dict, from this process or the shared store."""
+        job = self.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return self.store.load(job_id) if self.store is not None else None
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job. Returns False if it is unknown or already finished."""
+        job = self.get(job_id)
+        if job is None:
+            return self.store.request_cancel(job_id) if self.store is not None else False
+        if job.status not in ACTIVE:
+            return False
+        job._cancel_requested = True
+        if job.future is not None:
+            job.future.cancel()
+        self._finish(job, 'cancelled', error="Job was cancelled.")
+        return True
+
+    def _run(self, job):
+        with self._lock:
+            if job.status != 'queued':
+                return
+            job.status = 'running'
+        job._deadline = time.monotonic() + job.timeout
+        job._update(status='running', started_at=time.time())
+        watchdog = threading.Timer(job.timeout, self._expire, (job,))
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            job.check()
+            result = self._handlers[job.kind](job, job.params)
+            self._finish(job, 'done', result=result)
+        except JobTimeout as e:
+            self._finish(job, 'timeout', error=str(e))
+        except JobCancelled as e:
+            self._finish(job, 'cancelled', error=str(e))
+        except Exception as e:
+            logger.warning(f"Job {job.id} ({job.kind}) failed: {e}")
+            self._finish(job, 'failed', error=str(e))
+        finally:
+            watchdog.cancel()
+
+    def _expire(self, job):
+        job._cancel_requested = True
+        self._finish(job, 'timeout', error=f"Job exceeded its {job.timeout:g}s timeout.")
+
+    def _finish(self, job, status, result=None, error=None):
+        with self._lock:
+            # First outcome wins: a late result after cancel/timeout is dropped
+            if job.status not in ACTIVE:
+                return
+            # Set together with the status, so _prune never sees a finished job without finished_at
+            job.status = status
+            job.finished_at = time.time()
+            if self._inflight.get(job.key) is job:
+                del self._inflight[job.key]
+            self._stats[status] += 1
+        job._update(status=status, result=result, error=error, finished_at=job.finished_at)
+
+    def _prune(self):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job.status not in ACTIVE and job.finished_at < cutoff]:
+                del self._jobs[job_id]
+        if self.store is not None:
+            self.store.prune(cutoff)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats,
+                        queued=sum(job.status == 'queued' for job in self._inflight.values()),
+                        running=sum(job.status == 'running' for job in self._inflight.values()),
+                        kept=len(self._jobs),
+                        backend='sqlite' if self.store is not None else 'memory')
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def queue_from_env():
+    """SCRAPER_JOBS=memory (default) keeps jobs in this process; sqlite shares them via SCRAPER_JOBS_DB."""
+    backend = os.environ.get('SCRAPER_JOBS', 'memory').lower()
+    if backend == 'sqlite':
+        path = os.environ.get('SCRAPER_JOBS_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.jobs.sqlite3'))
+        return JobQueue(store=SqliteJobStore(path))
+    return JobQueue()
+
+
+job_queue = queue_from_env()
@@ -0,0 +1,336 @@
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import logging
+
+import fetcher
+import metrics
+from batch import run_batch
+from scrapers import lazy_import
+
+logger = logging.getLogger(__name__)
+
+PROBE_TIMEOUT = 5
+PROBE_PER_HOST = 6
+PROBE_TTL = 3600
+MAX_PROBES_KEPT = 20000
+# How long a page view waits on probes; whatever is still unprobed is shown as found
+PROBE_BUDGET = float(os.environ.get('SCRAPER_MEDIA_PROBE_BUDGET', 1.5))
+
+# Thumbnail widths are snapped to these so the cache holds a few sizes per image, not one per request
+THUMB_WIDTHS = (64, 128, 256, 512)
+DEFAULT_THUMB_WIDTH = 256
+MAX_SOURCE_BYTES = 15 * 1024 * 1024
+MAX_PASSTHROUGH_BYTES = 512 * 1024  # originals we cannot resize (SVG, no Pillow) are served only up to this
+
+# Content types accepted as a match besides image/* and video/*
+_GENERIC_TYPES = ('', 'application/octet-stream', 'binary/octet-stream')
+_VIDEO_TYPES = ('application/ogg', 'application/x-mpegurl', 'application/vnd.apple.mpegurl', 'application/dash+xml')
+# Leading bytes of the image formats a thumbnail source may be when its server does not say image/*
+_IMAGE_SIGNATURES = ((b'\x89PNG\r\n\x1a\n', 'image/png'), (b'\xff\xd8\xff', 'image/jpeg'), (b'GIF87a', 'image/gif'),
+                     (b'GIF89a', 'image/gif'), (b'BM', 'image/bmp'), (b'\x00\x00\x01\x00', 'image/x-icon'))
+
+
+class ThumbnailError(Exception):
+    pass
+
+
+def _content_type(response):
+    return response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+
+
+def sniff_image_type(content):
+    """The image type given by the first bytes of content, or None if they are not a known image format."""
+    if content[:4] == b'RIFF' and content[8:12] == b'WEBP':
+        return 'image/webp'
+    return next((content_type for magic, content_type in _IMAGE_SIGNATURES if content.startswith(magic)), None)
+
+
+def _int(value):
+    return int(value) if value and value.isdigit() else None
+
+
+class ProbeCache:
+    """Recent probe results per URL, kept PROBE_TTL seconds (least recently used dropped past max_entries)."""
+
+    def __init__(self, ttl=PROBE_TTL, max_entries=MAX_PROBES_KEPT):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'probes': 0, 'range_fallbacks': 0, 'errors': 0}
+
+    def get(self, url):
+        with self._lock:
+            cached = self._entries.get(url)
+            if cached is None or time.monotonic() - cached[1] > self.ttl:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(url)
+            self._stats['hits'] += 1
+            return cached[0]
+
+    def put(self, url, result):
+        with self._lock:
+            self._entries[url] = (result, time.monotonic())
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+
+probe_cache = ProbeCache()
+
+
+def probe(url, profile='browser'):
+    """Status, type and size of a media URL without downloading it.
+
+    Uses HEAD, falling back to a one-byte range GET for servers that refuse
+    HEAD or leave out Content-Type / Content-Length. The result is cached
+    (see probe_media).
+    """
+    probe_cache.count('probes')
+    response = fetcher.head(url, profile=profile, timeout=PROBE_TIMEOUT)
+    result = {'url': url, 'final_url': response.url, 'status': response.status_code,
+              'content_type': _content_type(response), 'size': _int(response.headers.get('Content-Length')),
+              'method': 'HEAD'}
+    if response.status_code in (403, 405, 501) or (response.ok and (not result['content_type'] or result['size'] is None)):
+        probe_cache.count('range_fallbacks')
+        ranged = fetcher.fetch(url, profile=profile, timeout=PROBE_TIMEOUT, headers={'Range': 'bytes=0-0'}, stream=True)
+        ranged.close()
+        size = _int(ranged.headers.get('Content-Length'))
+        if ranged.status_code == 206:
+            size = _int(ranged.headers.get('Content-Range', '').rpartition('/')[2])
+        result.update(final_url=ranged.url, status=ranged.status_code, method='GET range',
+                      content_type=_content_type(ranged) or result['content_type'], size=size or result['size'])
+    probe_cache.put(url, result)
+    return result
+
+
+def matches(result, kind):
+    """Whether a probe found a reachable file of the expected kind ('image' or 'video')."""
+    if result.get('status') is None or result['status'] >= 400:
+        return False
+    content_type = result.get('content_type') or ''
+    if content_type.startswith(kind + '/') or content_type in _GENERIC_TYPES:
+        return True
+    return kind == 'video' and content_type in _VIDEO_TYPES
+
+
+def probe_media(urls, profile='browser', budget=None, per_host=PROBE_PER_HOST):
+    """Probe URLs concurrently (per-host limits apply). Returns {url: probe result}.
+
+    With a ``budget`` in seconds, probes still running when it runs out are
+    abandoned (not waited for) and their URLs are missing from the result;
+    an abandoned probe still caches its result when it finishes.
+    """
+    results = {}
+    missing = []
+    for url in dict.fromkeys(urls):
+        cached = probe_cache.get(url)
+        if cached is not None:
+            results[url] = cached
+        else:
+            missing.append(url)
+    if not missing or budget == 0:
+        return results
+    deadline = None if budget is None else time.monotonic() + budget
+    with metrics.span('media_probe'):
+        for item in run_batch(missing, lambda url: probe(url, profile), per_host=per_host, host_delay=0,
+                              deadline=deadline):
+            if item['success']:
+                results[item['target']] = item['result']
+            else:
+                probe_cache.count('errors')
+                results[item['target']] = {'url': item['target'], 'status': None, 'error': item['error']}
+    return results
+
+
+def checked_media(urls, kind, profile='browser', budget=PROBE_BUDGET):
+    """Drop URLs a probe showed to be broken or of another type. Returns (urls, {url: probe})."""
+    results = probe_media(urls, profile, budget)
+    kept = [url for url in urls if url not in results or matches(results[url], kind)]
+    return kept, {url: results[url] for url in kept if url in results}
+
+
+class ThumbnailCache:
+    """Thumbnails on disk as <sha256>.bin + <sha256>.json, least recently used evicted past max_bytes."""
+
+    def __init__(self, directory, max_bytes=128 * 1024 * 1024, ttl=86400):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._index = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'resized': 0, 'passthrough': 0, 'evictions': 0}
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for name in os.listdir(directory):
+            if name.endswith('.bin'):
+                stat = os.stat(os.path.join(directory, name))
+                files.append((stat.st_mtime, name[:-4], stat.st_size))
+        for mtime, name, size in sorted(files):
+            self._index[name] = size
+
+    def _paths(self, name):
+        base = os.path.join(self.directory, name)
+        return base + '.bin', base + '.json'
+
+    @staticmethod
+    def _name(key):
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """(body, meta) for a fresh entry, or None."""
+        name = self._name(key)
+        with self._lock:
+            if name not in self._index:
+                self._stats['misses'] += 1
+                return None
+            body_path, meta_path = self._paths(name)
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                if time.time() - meta['stored_at'] > self.ttl:
+                    self._stats['misses'] += 1
+                    return None
+                with open(body_path, 'rb') as f:
+                    body = f.read()
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Dropping unreadable thumbnail {name}: {e}")
+                self._remove(name)
+                self._stats['misses'] += 1
+                return None
+            self._index.move_to_end(name)
+            try:
+                os.utime(body_path)
+            except OSError as e:
+                logger.debug(f"Cannot touch thumbnail {name}: {e}")
+            self._stats['hits'] += 1
+            return body, meta
+
+    def put(self, key, body, meta):
+        name = self._name(key)
+        body_path, meta_path = self._paths(name)
+        with self._lock:
+            with open(body_path + '.tmp', 'wb') as f:
+                f.write(body)
+            with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(dict(meta, stored_at=time.time()), f)
+            os.replace(body_path + '.tmp', body_path)
+            os.replace(meta_path + '.tmp', meta_path)
+            self._index.pop(name, None)
+            self._index[name] = len(body)
+            while self._index and sum(self._index.values()) > self.max_bytes:
+                old_name, _ = self._index.popitem(last=False)
+                self._remove(old_name)
+                self._stats['evictions'] += 1
+
+    def _remove(self, name):
+        self._index.pop(name, None)
+        for path in self._paths(name):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def record(self, event):
+        with self._lock:
+            self._stats[event] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._index), bytes_stored=sum(self._index.values()))
+
+
+thumbnail_cache = ThumbnailCache(
+    os.environ.get('SCRAPER_THUMB_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.thumbnails')),
+    max_bytes=int(os.environ.get('SCRAPER_THUMB_CACHE_MAX_BYTES', 128 * 1024 * 1024)),
+    ttl=float(os.environ.get('SCRAPER_THUMB_CACHE_TTL', 86400)),
+)
+
+
+def snap_width(width):
+    return next((size for size in THUMB_WIDTHS if size >= width), THUMB_WIDTHS[-1])
+
+
+def resize(content, width):
+    """Downscale image bytes to fit width x width. Returns (bytes, content_type), with a content_type
+    of None for images already that small, or None when Pillow is missing or cannot read the image."""
+    try:
+        Image = lazy_import('PIL.Image')
+    except ImportError:
+        return None
+    try:
+        with metrics.span('thumbnail'):
+            image = Image.open(io.BytesIO(content))
+            if image.width <= width and image.height <= width:
+                return content, None
+            image.draft('RGB', (width, width))  # JPEGs decode straight to a reduced scale
+            image.thumbnail((width, width))
+            output = io.BytesIO()
+            if image.mode in ('RGBA', 'LA', 'P'):
+                image.convert('RGBA').save(output, 'PNG')
+                return output.getvalue(), 'image/png'
+            image.convert('RGB').save(output, 'JPEG', quality=80)
+            return output.getvalue(), 'image/jpeg'
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.info(f"Cannot resize image ({e}); serving it as is")
+        return None
+
+
+def thumbnail(url, width=DEFAULT_THUMB_WIDTH, profile='browser'):
+    """A cached thumbnail of the image at url: (body, content_type, etag).
+
+    The original is downloaded once (at most MAX_SOURCE_BYTES), scaled
+    down with Pillow and kept in the on-disk cache. Images Pillow cannot
+    scale, or that are already small, are served unchanged if they are
+    small enough. Sources that are neither served as image/* nor start
+    like a known image format raise ThumbnailError.
+    """
+    width = snap_width(width)
+    key = f"{url}\0{width}"
+    cached = thumbnail_cache.get(key)
+    if cached is not None:
+        body, meta = cached
+        return body, meta['content_type'], meta['etag']
+
+    try:
+        response = fetcher.fetch_capped(url, profile=profile, max_bytes=MAX_SOURCE_BYTES)
+    except fetcher.BodyTooLarge as e:
+        raise ThumbnailError(str(e))
+    response.raise_for_status()
+    content_type = _content_type(response)
+    if not content_type.startswith('image/'):
+        # Only images are relayed; anything else would make this endpoint an open proxy
+        content_type = sniff_image_type(response.content)
+        if content_type is None:
+            raise ThumbnailError(f"Not an image: {_content_type(response) or 'no content type'}")
+
+    resized = resize(response.content, width)
+    if resized is not None and resized[1] is not None:
+        body, content_type = resized
+        thumbnail_cache.record('resized')
+    elif resized is not None or len(response.content) <= MAX_PASSTHROUGH_BYTES:
+        body = response.content
+        thumbnail_cache.record('passthrough')
+    else:
+        raise ThumbnailError(f"Cannot scale this image and it is over {MAX_PASSTHROUGH_BYTES} bytes")
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    thumbnail_cache.put(key, body, {'url': url, 'width': width, 'content_type': content_type, 'etag': etag})
+    return body, content_type, etag
+
+
+def stats():
+    return {'probes': probe_cache.stats(), 'thumbnails': thumbnail_cache.stats()}
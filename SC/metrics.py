@@ -0,0 +1,272 @@
+import collections
+import functools
+import itertools
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+import logging
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+PROFILE_INTERVAL = 0.005
+MAX_PROFILES = 20
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values = collections.defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            self._values[key] += amount
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_labels(self.label_names, key)} {_number(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                for bound, cumulative in zip(self.buckets, itertools.accumulate(counts)):
+                    lines.append(f'{self.name}_bucket{_labels(self.label_names, key, [("le", _number(bound))])} {cumulative}')
+                lines.append(f'{self.name}_sum{_labels(self.label_names, key)} {_number(total)}')
+                lines.append(f'{self.name}_count{_labels(self.label_names, key)} {count}')
+        return lines
+
+
+class Registry:
+    """Metrics plus collectors that turn other components' stats() dicts into gauges at scrape time."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help_text, labels=()):
+        metric = Counter(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help_text, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collect_stats(self, prefix, stats_function):
+        """Expose every numeric field of stats_function() as a gauge named scraper_<prefix>_<field>."""
+        self._collectors.append((prefix, stats_function))
+
+    def expose(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.expose())
+        for prefix, stats_function in self._collectors:
+            try:
+                stats = stats_function()
+            except Exception as e:
+                logger.warning(f"Metrics collector {prefix} failed: {e}")
+                continue
+            for field, value in sorted((stats or {}).items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f'scraper_{prefix}_{field}'
+                lines.append(f'# TYPE {name} gauge')
+                lines.append(f'{name} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+phase_seconds = registry.histogram(
+    'scraper_phase_seconds',
+    'Time spent per phase: connect (DNS, connect, TLS and time to first byte), download, parse, extract, '
+    'stream_parse (download and parse interleaved), render, selenium_startup, selenium_page, pdf_download, pdf_extract, '
+    'media_probe, thumbnail, compress',
+    labels=('phase',))
+scrape_seconds = registry.histogram('scraper_scrape_seconds', 'Duration of each scrape_* function', labels=('scraper',))
+request_seconds = registry.histogram('scraper_request_seconds', 'HTTP request duration by endpoint',
+                                     labels=('endpoint', 'method', 'status'))
+response_size = registry.histogram('scraper_response_size_bytes', 'Bytes returned by this app per endpoint',
+                                   labels=('endpoint',), buckets=SIZE_BUCKETS)
+fetched_bytes = registry.counter('scraper_fetched_bytes_total', 'Bytes downloaded from upstream sites')
+upstream_requests = registry.counter('scraper_upstream_requests_total', 'Upstream HTTP requests by status class',
+                                     labels=('profile', 'status'))
+
+
+_request_spans = threading.local()
+
+
+def begin_request():
+    """Start collecting this thread's spans for the Server-Timing header."""
+    _request_spans.spans = []
+
+
+def end_request():
+    spans = getattr(_request_spans, 'spans', None)
+    _request_spans.spans = None
+    return spans or []
+
+
+def _add_span(name, seconds):
+    spans = getattr(_request_spans, 'spans', None)
+    if spans is not None:
+        spans.append((name, seconds))
+
+
+def record(phase, seconds):
+    phase_seconds.observe(seconds, phase=phase)
+    _add_span(phase, seconds)
+
+
+@contextmanager
+def span(phase):
+    """Time a block as one occurrence of `phase`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - started)
+
+
+def timed_scraper(function):
+    """Record the duration of a scrape_* function under its name."""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - started
+            scrape_seconds.observe(seconds, scraper=function.__name__)
+            _add_span(function.__name__, seconds)
+    return wrapper
+
+
+def server_timing(spans):
+    """Server-Timing header value, summing repeated phases."""
+    totals = collections.OrderedDict()
+    for phase, seconds in spans:
+        totals[phase] = totals.get(phase, 0.0) + seconds
+    return ', '.join(f'{phase};dur={seconds * 1000:.1f}' for phase, seconds in totals.items())
+
+
+class SamplingProfiler:
+    """Samples one thread's stack every few milliseconds and counts collapsed stacks.
+
+    The output is the "folded" format flamegraph.pl and speedscope read:
+    one ``frame;frame;frame count`` line per distinct stack.
+    """
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self.started = None
+        self.elapsed = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def folded(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.samples.most_common())
+
+
+_profiles = collections.OrderedDict()
+_profile_ids = itertools.count(1)
+_profiles_lock = threading.Lock()
+
+
+def save_profile(profiler, label):
+    with _profiles_lock:
+        profile_id = str(next(_profile_ids))
+        _profiles[profile_id] = {'label': label, 'elapsed': profiler.elapsed,
+                                 'samples': sum(profiler.samples.values()), 'folded': profiler.folded()}
+        while len(_profiles) > MAX_PROFILES:
+            _profiles.popitem(last=False)
+    return profile_id
+
+
+def get_profile(profile_id):
+    with _profiles_lock:
+        return _profiles.get(profile_id)
+
+
+def list_profiles():
+    with _profiles_lock:
+        return [{'id': profile_id, 'label': p['label'], 'elapsed': p['elapsed'], 'samples': p['samples']}
+                for profile_id, p in _profiles.items()]
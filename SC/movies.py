@@ -0,0 +1,184 @@
+import html
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import quote_plus
+import logging
+
+from fetcher import fetch_page
+from extractors import parse_html
+
+logger = logging.getLogger(__name__)
+
+_TITLE_ID = re.compile(r'/title/(tt\d+)')
+_JSON_LD = re.compile(r'<script[^>]*type="application/ld\+json"[^>]*>(.*?)</script>', re.S | re.I)
+
+
+class MovieNotFound(Exception):
+    pass
+
+
+def normalize_query(name):
+    return ' '.join(re.sub(r'[^\w\s]', ' ', name.lower()).split())
+
+
+class MovieCache:
+    """Two-level TTL cache: normalized query -> IMDb title ID -> movie record.
+
+    Lookups hit an in-process dict first and fall back to SQLite, so a
+    repeat lookup in the same worker never touches the disk.
+    """
+
+    def __init__(self, path, ttl=7 * 24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._queries = {}
+        self._movies = {}
+        self._stats = {'hits': 0, 'misses': 0}
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS queries (query TEXT PRIMARY KEY, title_id TEXT, stored_at REAL)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS movies (title_id TEXT PRIMARY KEY, record TEXT, stored_at REAL)")
+
+    def _fresh(self, stored_at):
+        return time.time() - stored_at < self.ttl
+
+    def title_id(self, query):
+        with self._lock:
+            cached = self._queries.get(query)
+            if cached is None:
+                row = self._db.execute("SELECT title_id, stored_at FROM queries WHERE query = ?", (query,)).fetchone()
+                if row:
+                    cached = self._queries[query] = row
+            return cached[0] if cached and self._fresh(cached[1]) else None
+
+    def movie(self, title_id):
+        with self._lock:
+            cached = self._movies.get(title_id)
+            if cached is None:
+                row = self._db.execute("SELECT record, stored_at FROM movies WHERE title_id = ?", (title_id,)).fetchone()
+                if row:
+                    cached = self._movies[title_id] = (json.loads(row[0]), row[1])
+            if cached and self._fresh(cached[1]):
+                self._stats['hits'] += 1
+                return cached[0]
+            self._stats['misses'] += 1
+            return None
+
+    def store(self, query, title_id, record):
+        now = time.time()
+        with self._lock:
+            self._queries[query] = (title_id, now)
+            self._movies[title_id] = (record, now)
+            with self._db:
+                self._db.execute("INSERT OR REPLACE INTO queries VALUES (?, ?, ?)", (query, title_id, now))
+                self._db.execute("INSERT OR REPLACE INTO movies VALUES (?, ?, ?)", (title_id, json.dumps(record), now))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['queries'] = self._db.execute("SELECT COUNT(*) FROM queries").fetchone()[0]
+            stats['movies'] = self._db.execute("SELECT COUNT(*) FROM movies").fetchone()[0]
+        return stats
+
+
+movie_cache = MovieCache(
+    os.environ.get('SCRAPER_MOVIE_CACHE', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.movie_cache.sqlite3')),
+    ttl=float(os.environ.get('SCRAPER_MOVIE_CACHE_TTL', 7 * 24 * 3600)),
+)
+
+
+def search_title_id(movie_name):
+    if re.fullmatch(r'tt\d+', movie_name.strip()):
+        return movie_name.strip()
+    search_url = f"https://www.imdb.com/find?q={quote_plus(movie_name)}&ref_=nv_sr_sm"
+    search_response = fetch_page(search_url, profile='browser')
+    search_response.raise_for_status()
+    search_soup = parse_html(search_response.content)
+    first_result = search_soup.select_one('.ipc-metadata-list-summary-item a.ipc-metadata-list-summary-item__t')
+    match = first_result and _TITLE_ID.search(first_result['href'])
+    if not match:
+        raise MovieNotFound("No movie found with that name.")
+    return match.group(1)
+
+
+def movie_from_json_ld(page_text):
+    """Read the title's JSON-LD block without building a DOM. Returns None if it is missing or unusable."""
+    for block in _JSON_LD.findall(page_text):
+        try:
+            data = json.loads(block)
+        except ValueError:
+            continue
+        if not isinstance(data, dict) or not data.get('name'):
+            continue
+        rating = (data.get('aggregateRating') or {}).get('ratingValue')
+        genre = data.get('genre')
+        if isinstance(genre, list):
+            genre = genre[0] if genre else None
+        return {
+            "name": html.unescape(data['name']),
+            "poster_url": data.get('image') or "N/A",
+            "year": (data.get('datePublished') or '')[:4] or "N/A",
+            "rating": f"{rating}/10" if rating is not None else "N/A",
+            "plot": html.unescape(data['description']) if data.get('description') else "N/A",
+            "genre": genre or "N/A"
+        }
+    return None
+
+
+def movie_from_css(content):
+    soup = parse_html(content)
+    title_elem = soup.select_one('h1')
+    if title_elem is None:
+        raise MovieNotFound("Could not read the movie page.")
+    title = title_elem.text.strip()
+    poster = soup.select_one('img.ipc-image')
+    poster_url = poster['src'] if poster else "N/A"
+    year_elem = soup.select_one('a[href*="/releaseinfo"]')
+    year = year_elem.text.strip() if year_elem else "N/A"
+    rating_elem = soup.select_one('div[data-testid="hero-rating-bar__aggregate-rating__score"] span')
+    rating = rating_elem.text.strip() + "/10" if rating_elem else "N/A"
+    plot_elem = soup.select_one('[data-testid="plot"]')
+    plot = plot_elem.text.strip() if plot_elem else "N/A"
+    genre_elem = soup.select_one('.ipc-chip.ipc-chip--on-baseAlt .ipc-chip__text')
+    genre = genre_elem.text.strip() if genre_elem else "N/A"
+    return {
+        "name": title,
+        "poster_url": poster_url,
+        "year": year,
+        "rating": rating,
+        "plot": plot,
+        "genre": genre
+    }
+
+
+def cached_movie(movie_name):
+    """Return the cached record for a name without any network access, or None."""
+    title_id = movie_cache.title_id(normalize_query(movie_name))
+    return movie_cache.movie(title_id) if title_id else None
+
+
+def lookup_movie(movie_name):
+    """Resolve a movie name to its details, from cache when possible. Raises MovieNotFound or RequestException."""
+    query = normalize_query(movie_name)
+    title_id = movie_cache.title_id(query)
+    if title_id:
+        record = movie_cache.movie(title_id)
+        if record is not None:
+            return record
+    else:
+        title_id = search_title_id(movie_name)
+        record = movie_cache.movie(title_id)
+        if record is not None:
+            movie_cache.store(query, title_id, record)
+            return record
+
+    movie_response = fetch_page(f"https://www.imdb.com/title/{title_id}/", profile='browser')
+    movie_response.raise_for_status()
+    record = movie_from_json_ld(movie_response.text) or movie_from_css(movie_response.content)
+    movie_cache.store(query, title_id, record)
+    return record
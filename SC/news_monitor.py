@@ -0,0 +1,216 @@
+import hashlib
+import itertools
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+import logging
+
+from fetcher import fetch
+from extractors import HeadlineExtractor, run_extractors
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 300
+MIN_INTERVAL = 30
+MAX_EVENTS = 2000
+MAX_SEEN = 100000
+
+_WORD = re.compile(r'\w+')
+
+
+def normalize_headline(text):
+    return ' '.join(_WORD.findall(text.lower()))
+
+
+def headline_hash(text):
+    return hashlib.blake2b(normalize_headline(text).encode('utf-8'), digest_size=12).hexdigest()
+
+
+class MinHashIndex:
+    """Near-duplicate detection over word shingles with banded MinHash (LSH).
+
+    A headline is a near duplicate when it shares a band bucket with an
+    earlier one and their estimated Jaccard similarity reaches threshold.
+    """
+
+    def __init__(self, num_perm=128, bands=32, shingle=2, threshold=0.5, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        rng = random.Random(seed)
+        self._masks = [rng.getrandbits(64) for _ in range(num_perm)]
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle = shingle
+        self.threshold = threshold
+        self._buckets = {}
+        self._signatures = OrderedDict()
+
+    def signature(self, text):
+        words = normalize_headline(text).split()
+        size = min(self.shingle, len(words)) or 1
+        shingles = {' '.join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big') for s in shingles]
+        return tuple(min(h ^ mask for h in hashes) for mask in self._masks)
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def find_duplicate(self, signature):
+        for key in self._band_keys(signature):
+            for other in self._buckets.get(key, ()):
+                other_signature = self._signatures.get(other)
+                if other_signature is None:
+                    continue
+                matches = sum(a == b for a, b in zip(signature, other_signature))
+                if matches / len(signature) >= self.threshold:
+                    return other
+        return None
+
+    def add(self, item_id, signature):
+        self._signatures[item_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append(item_id)
+        if len(self._signatures) > MAX_SEEN:
+            old_id, old_signature = self._signatures.popitem(last=False)
+            for key in self._band_keys(old_signature):
+                bucket = self._buckets.get(key)
+                if bucket and old_id in bucket:
+                    bucket.remove(old_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+
+class NewsMonitor:
+    """Polls registered news pages and records headlines not seen before.
+
+    Each page is fetched with If-None-Match / If-Modified-Since from its
+    previous response, so unchanged pages cost a 304. Headlines are deduped
+    by a hash of their normalized text and, when near_duplicates is on, by
+    MinHash similarity so one story carried by several sites is reported
+    once. State lives in this process; each gunicorn worker polls on its own.
+    """
+
+    def __init__(self, near_duplicates=True):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._feeds = {}
+        self._seen = OrderedDict()
+        self._events = deque(maxlen=MAX_EVENTS)
+        self._event_ids = itertools.count(1)
+        self._minhash = MinHashIndex() if near_duplicates else None
+        self._stats = {'polls': 0, 'not_modified': 0, 'errors': 0, 'new': 0, 'duplicates': 0, 'near_duplicates': 0}
+
+    def register(self, url, interval=DEFAULT_INTERVAL):
+        interval = max(float(interval), MIN_INTERVAL)
+        with self._lock:
+            feed = self._feeds.setdefault(url, {'etag': None, 'last_modified': None, 'last_polled': None, 'last_error': None})
+            feed['interval'] = interval
+            feed['next_due'] = time.monotonic()
+        self._ensure_thread()
+        self._wakeup.set()
+
+    def unregister(self, url):
+        with self._lock:
+            return self._feeds.pop(url, None) is not None
+
+    def feeds(self):
+        with self._lock:
+            return {url: {'interval': feed['interval'], 'last_polled': feed['last_polled'], 'last_error': feed['last_error']}
+                    for url, feed in self._feeds.items()}
+
+    def events(self, since=0, limit=500):
+        """Events with id > since, oldest first."""
+        with self._lock:
+            return [event for event in self._events if event['id'] > since][:limit]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, feeds=len(self._feeds), seen=len(self._seen))
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='news-monitor', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            with self._lock:
+                due = [url for url, feed in self._feeds.items() if feed['next_due'] <= now]
+                for url in due:
+                    self._feeds[url]['next_due'] = now + self._feeds[url]['interval']
+                upcoming = [feed['next_due'] for feed in self._feeds.values()]
+            for url in due:
+                self.poll(url)
+            timeout = max(min(upcoming) - time.monotonic(), 0) if upcoming else None
+            self._wakeup.wait(timeout)
+
+    def poll(self, url):
+        """Fetch one page now and record any new headlines. Returns the new events."""
+        with self._lock:
+            feed = self._feeds.get(url)
+            if feed is None:
+                return []
+            conditional = {}
+            if feed['etag']:
+                conditional['If-None-Match'] = feed['etag']
+            if feed['last_modified']:
+                conditional['If-Modified-Since'] = feed['last_modified']
+        try:
+            response = fetch(url, profile='browser', headers=conditional)
+            if response.status_code == 304:
+                with self._lock:
+                    self._stats['polls'] += 1
+                    self._stats['not_modified'] += 1
+                    feed['last_polled'] = time.time()
+                return []
+            response.raise_for_status()
+            headlines = run_extractors(response.content, [HeadlineExtractor(url)])['headlines'] or []
+        except Exception as e:
+            logger.warning(f"News monitor failed to poll {url}: {e}")
+            with self._lock:
+                self._stats['errors'] += 1
+                feed['last_error'] = str(e)
+            return []
+
+        new_events = []
+        with self._lock:
+            self._stats['polls'] += 1
+            feed['etag'] = response.headers.get('ETag')
+            feed['last_modified'] = response.headers.get('Last-Modified')
+            feed['last_polled'] = time.time()
+            feed['last_error'] = None
+            for text in headlines:
+                digest = headline_hash(text)
+                if digest in self._seen:
+                    self._stats['duplicates'] += 1
+                    continue
+                self._seen[digest] = None
+                if len(self._seen) > MAX_SEEN:
+                    self._seen.popitem(last=False)
+                if self._minhash is not None:
+                    signature = self._minhash.signature(text)
+                    if self._minhash.find_duplicate(signature) is not None:
+                        self._stats['near_duplicates'] += 1
+                        continue
+                    self._minhash.add(digest, signature)
+                event = {
+                    'id': next(self._event_ids),
+                    'headline': text,
+                    'url': url,
+                    'seen_at': datetime.now(timezone.utc).isoformat(),
+                }
+                self._events.append(event)
+                new_events.append(event)
+            self._stats['new'] += len(new_events)
+        return new_events
+
+
+news_monitor = NewsMonitor()
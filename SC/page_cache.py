@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry:
+    """A cached page body plus its validators and any results extracted from it."""
+
+    def __init__(self, url, status_code, headers, content, encoding=None,
+                 stored_at=None, results=None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding
+        self.stored_at = stored_at if stored_at is not None else time.time()
+        self.results = results if results is not None else {}
+
+    @property
+    def etag(self):
+        return self.headers.get('ETag')
+
+    @property
+    def last_modified(self):
+        return self.headers.get('Last-Modified')
+
+    @property
+    def size(self):
+        return len(self.content)
+
+    def age(self, now=None):
+        return (now or time.time()) - self.stored_at
+
+    def meta(self):
+        return {
+            'url': self.url,
+            'status_code': self.status_code,
+            'headers': self.headers,
+            'encoding': self.encoding,
+            'stored_at': self.stored_at,
+            'results': self.results,
+        }
+
+
+class MemoryBackend:
+    """LRU dict bounded by entry count and total body bytes."""
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        self.delete(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= old.size
+            self.evictions += 1
+
+    def touch(self, key, entry):
+        # Entries are live objects here, nothing to write back
+        pass
+
+    def delete(self, key):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    @property
+    def bytes_stored(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskBackend:
+    """Stores each entry as <sha256>.body + <sha256>.json, evicting least recently used files past max_bytes."""
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+        # name -> body size, least recently used first; rebuilt from file mtimes so the bound holds across restarts
+        self._index = OrderedDict()
+        files = []
+        for name in os.listdir(directory):
+            if name.endswith('.body'):
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name[:-5], stat.st_size))
+        for mtime, name, size in sorted(files):
+            self._index[name] = size
+
+    def _paths(self, name):
+        base = os.path.join(self.directory, name)
+        return base + '.body', base + '.json'
+
+    @staticmethod
+    def _name(key):
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        name = self._name(key)
+        if name not in self._index:
+            return None
+        body_path, meta_path = self._paths(name)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                content = f.read()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable cache entry {name}: {e}")
+            self.delete(key)
+            return None
+        self._index.move_to_end(name)
+        try:
+            os.utime(body_path)  # the mtime orders entries when the index is rebuilt
+        except OSError as e:
+            # Another process may have evicted it since; the body is already read
+            logger.debug(f"Cannot touch cache entry {name}: {e}")
+        return CacheEntry(content=content, **meta)
+
+    def put(self, key, entry):
+        name = self._name(key)
+        body_path, meta_path = self._paths(name)
+        with open(body_path + '.tmp', 'wb') as f:
+            f.write(entry.content)
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(entry.meta(), f)
+        os.replace(body_path + '.tmp', body_path)
+        os.replace(meta_path + '.tmp', meta_path)
+        self._index.pop(name, None)
+        self._index[name] = entry.size
+        while self._index and self.bytes_stored > self.max_bytes:
+            old_name, _ = self._index.popitem(last=False)
+            self._remove_files(old_name)
+            self.evictions += 1
+
+    def touch(self, key, entry):
+        # Persist refreshed stored_at / newly attached results
+        name = self._name(key)
+        if name in self._index:
+            _, meta_path = self._paths(name)
+            with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(entry.meta(), f)
+            os.replace(meta_path + '.tmp', meta_path)
+
+    def _remove_files(self, name):
+        for path in self._paths(name):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def delete(self, key):
+        name = self._name(key)
+        if self._index.pop(name, None) is not None:
+            self._remove_files(name)
+
+    def clear(self):
+        for name in list(self._index):
+            self._remove_files(name)
+        self._index.clear()
+
+    @property
+    def bytes_stored(self):
+        return sum(self._index.values())
+
+    def __len__(self):
+        return len(self._index)
+
+
+class PageCache:
+    """TTL page cache keyed by URL + header profile.
+
+    Entries younger than ttl are served without touching the network. Older
+    entries that carry an ETag or Last-Modified are kept (up to max_stale) so
+    they can be revalidated with a conditional GET; a 304 reuses the cached
+    body and any results already extracted from it.
+    """
+
+    def __init__(self, backend, ttl=300, max_stale=24 * 3600):
+        self.backend = backend
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stores': 0, 'bytes_served': 0, 'bytes_fetched': 0}
+
+    @staticmethod
+    def key(url, profile):
+        return f"{profile} {url}"
+
+    def lookup(self, key):
+        """Return (entry, fresh). Expired entries without validators are dropped."""
+        with self._lock:
+            entry = self.backend.get(key)
+            if entry is None:
+                return None, False
+            age = entry.age()
+            if age < self.ttl:
+                return entry, True
+            if (entry.etag or entry.last_modified) and age < self.max_stale:
+                return entry, False
+            self.backend.delete(key)
+            return None, False
+
+    def store(self, key, entry):
+        with self._lock:
+            self.backend.put(key, entry)
+            self._stats['stores'] += 1
+
+    def refresh(self, key, entry):
+        with self._lock:
+            entry.stored_at = time.time()
+            self.backend.touch(key, entry)
+
+    def save_result(self, key, entry, name, result):
+        with self._lock:
+            entry.results[name] = result
+            self.backend.touch(key, entry)
+
+    def record(self, event, nbytes=0):
+        with self._lock:
+            self._stats[event] += 1
+            if event == 'misses':
+                self._stats['bytes_fetched'] += nbytes
+            else:
+                self._stats['bytes_served'] += nbytes
+
+    def clear(self):
+        with self._lock:
+            self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self.backend)
+            stats['bytes_stored'] = self.backend.bytes_stored
+            stats['evictions'] = self.backend.evictions
+        lookups = stats['hits'] + stats['revalidated'] + stats['misses']
+        stats['hit_ratio'] = (stats['hits'] + stats['revalidated']) / lookups if lookups else 0.0
+        return stats
+
+
+def cache_from_env():
+    """Build the page cache described by SCRAPER_CACHE (memory, disk or off)."""
+    kind = os.environ.get('SCRAPER_CACHE', 'memory').lower()
+    ttl = float(os.environ.get('SCRAPER_CACHE_TTL', 300))
+    max_bytes = int(os.environ.get('SCRAPER_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    if kind == 'off':
+        return None
+    if kind == 'disk':
+        directory = os.environ.get('SCRAPER_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.page_cache'))
+        return PageCache(DiskBackend(directory, max_bytes=max_bytes), ttl=ttl)
+    return PageCache(MemoryBackend(max_entries=int(os.environ.get('SCRAPER_CACHE_MAX_ENTRIES', 256)), max_bytes=max_bytes), ttl=ttl)
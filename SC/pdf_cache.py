@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PdfCache:
+    """On-disk cache of PDF extraction results keyed by the SHA-256 of the PDF bytes.
+
+    ``objects/<sha256>.json`` holds metadata and the text of every page
+    extracted so far. ``index.json`` maps each URL to the digest last seen
+    there, with the ETag/Last-Modified needed to revalidate it. Objects are
+    evicted least recently used once their total size passes max_bytes.
+
+    Worker processes may share the directory: sizes and ages are read from
+    the object files, and the index is reloaded whenever another process
+    has rewritten it. Two processes remembering URLs at the same moment can
+    still lose one of the entries, which only costs a later miss.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, ttl=3600):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, 'objects')
+        self.index_path = os.path.join(directory, 'index.json')
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'revalidated': 0, 'content_hits': 0, 'misses': 0,
+                       'bytes_saved': 0, 'evictions': 0}
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._index = {}
+        self._index_mtime = None
+        self._sync_index()
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest + '.json')
+
+    def _write_json(self, path, data):
+        # Per-process temp name, so two workers writing the same file never interleave
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _sync_index(self):
+        """Reload index.json if it changed on disk since this process last read or wrote it."""
+        try:
+            mtime = os.stat(self.index_path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._index_mtime:
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self._index = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable PDF cache index: {e}")
+            return
+        self._index_mtime = mtime
+
+    def _save_index(self):
+        self._write_json(self.index_path, self._index)
+        try:
+            self._index_mtime = os.stat(self.index_path).st_mtime_ns
+        except OSError:
+            self._index_mtime = None
+
+    def _objects(self):
+        """{digest: (size, mtime)} of the objects on disk now, skipping any removed while scanning."""
+        objects = {}
+        for entry in os.scandir(self.objects_dir):
+            if entry.name.endswith('.json'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                objects[entry.name[:-5]] = (stat.st_size, stat.st_mtime)
+        return objects
+
+    def lookup_url(self, url):
+        """Return (url_record, fresh) for a URL seen before, or (None, False)."""
+        with self._lock:
+            self._sync_index()
+            record = self._index.get(url)
+            if record is None or not os.path.exists(self._object_path(record['sha256'])):
+                return None, False
+            return dict(record), time.time() - record['checked_at'] < self.ttl
+
+    def remember_url(self, url, digest, headers):
+        with self._lock:
+            self._sync_index()
+            self._index[url] = {
+                'sha256': digest,
+                'etag': headers.get('ETag'),
+                'last_modified': headers.get('Last-Modified'),
+                'checked_at': time.time(),
+            }
+            self._save_index()
+
+    def get(self, digest):
+        with self._lock:
+            path = self._object_path(digest)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    document = json.load(f)
+            except FileNotFoundError:
+                return None
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable PDF cache object {digest}: {e}")
+                return None
+            try:
+                os.utime(path)
+            except OSError as e:
+                logger.debug(f"Cannot touch PDF cache object {digest}: {e}")
+            return document
+
+    def put(self, digest, document):
+        with self._lock:
+            self._write_json(self._object_path(digest), document)
+            self._evict()
+
+    def _evict(self):
+        objects = self._objects()
+        total = sum(size for size, _ in objects.values())
+        if total <= self.max_bytes:
+            return
+        for digest in sorted(objects, key=lambda d: objects[d][1]):
+            if total <= self.max_bytes:
+                break
+            total -= objects.pop(digest)[0]
+            try:
+                os.remove(self._object_path(digest))
+            except FileNotFoundError:
+                pass
+            self._stats['evictions'] += 1
+        self._sync_index()
+        self._index = {url: r for url, r in self._index.items() if r['sha256'] in objects}
+        self._save_index()
+
+    def record(self, event, bytes_saved=0):
+        with self._lock:
+            self._stats[event] += 1
+            self._stats['bytes_saved'] += bytes_saved
+
+    def stats(self):
+        with self._lock:
+            self._sync_index()
+            objects = self._objects()
+            stats = dict(self._stats)
+            stats['objects'] = len(objects)
+            stats['urls'] = len(self._index)
+            stats['bytes_stored'] = sum(size for size, _ in objects.values())
+        lookups = stats['hits'] + stats['revalidated'] + stats['content_hits'] + stats['misses']
+        stats['hit_ratio'] = (lookups - stats['misses']) / lookups if lookups else 0.0
+        return stats
+
+
+pdf_cache = PdfCache(
+    os.environ.get('SCRAPER_PDF_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.pdf_cache')),
+    max_bytes=int(os.environ.get('SCRAPER_PDF_CACHE_MAX_BYTES', 256 * 1024 * 1024)),
+    ttl=float(os.environ.get('SCRAPER_PDF_CACHE_TTL', 3600)),
+)
@@ -0,0 +1,241 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+import logging
+
+import metrics
+from fetcher import fetch
+from pdf_cache import pdf_cache
+from scrapers import lazy_import
+
+logger = logging.getLogger(__name__)
+
+MAX_PDF_BYTES = int(os.environ.get('SCRAPER_MAX_PDF_BYTES', 50 * 1024 * 1024))
+PARALLEL_MIN_PAGES = 24  # below this, extracting inline beats process start-up
+PAGES_PER_TASK = 8
+CHUNK_SIZE = 64 * 1024
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class PdfTooLarge(ValueError):
+    pass
+
+
+def _process_pool():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=int(os.environ.get('SCRAPER_PDF_WORKERS', os.cpu_count() or 2)))
+    return _executor
+
+
+def download_pdf(url, max_bytes=None, headers=None):
+    """Stream a PDF to a unique temp file, aborting past max_bytes.
+
+    Returns (path, sha256, response_headers, size); path is None when the
+    server answers a conditional request with 304.
+    """
+    max_bytes = max_bytes or MAX_PDF_BYTES
+    response = fetch(url, stream=True, headers=headers)
+    started = time.perf_counter()
+    try:
+        if response.status_code == 304:
+            return None, None, response.headers, 0
+        response.raise_for_status()
+        declared = response.headers.get('Content-Length')
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            raise PdfTooLarge(f"PDF is {int(declared)} bytes, limit is {max_bytes}")
+        fd, path = tempfile.mkstemp(suffix='.pdf')
+        digest = hashlib.sha256()
+        try:
+            written = 0
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    written += len(chunk)
+                    if written > max_bytes:
+                        raise PdfTooLarge(f"PDF exceeds the {max_bytes} byte limit")
+                    digest.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            os.remove(path)
+            raise
+        metrics.fetched_bytes.inc(written)
+        metrics.record('pdf_download', time.perf_counter() - started)
+        return path, digest.hexdigest(), response.headers, written
+    finally:
+        response.close()
+
+
+def parse_page_range(spec, page_count):
+    """Turn '1-3,7' (1-based, inclusive) into 0-based page indexes. Empty spec means every page."""
+    if not spec:
+        return list(range(page_count))
+    pages = []
+    seen = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, dash, end = part.partition('-')
+        try:
+            first = int(start) if start.strip() else 1
+            last = int(end) if end.strip() else (page_count if dash else first)
+        except ValueError:
+            raise ValueError(f"Invalid page range: {part}")
+        if first < 1 or last < first:
+            raise ValueError(f"Invalid page range: {part}")
+        for number in range(first, min(last, page_count) + 1):
+            if number not in seen:
+                seen.add(number)
+                pages.append(number - 1)
+    return pages
+
+
+def extract_page_texts(path, page_indexes):
+    """Extract text for the given pages of one PDF. Runs inside pool workers."""
+    results = []
+    with lazy_import('pdfplumber').open(path) as pdf:
+        for index in page_indexes:
+            results.append((index + 1, pdf.pages[index].extract_text() or ''))
+    return results
+
+
+def read_metadata(path):
+    with lazy_import('pdfplumber').open(path) as pdf:
+        metadata = pdf.metadata if pdf.metadata else {}
+        return {
+            'title': metadata.get('Title', 'N/A'),
+            'author': metadata.get('Author', 'N/A'),
+            'page_count': len(pdf.pages),
+        }
+
+
+def iter_page_texts(path, page_indexes):
+    """Yield (page_number, text) in page order, fanning large documents out to the process pool."""
+    if len(page_indexes) < PARALLEL_MIN_PAGES:
+        with lazy_import('pdfplumber').open(path) as pdf:
+            for index in page_indexes:
+                with metrics.span('pdf_extract'):
+                    text = pdf.pages[index].extract_text() or ''
+                yield index + 1, text
+        return
+    tasks = [page_indexes[i:i + PAGES_PER_TASK] for i in range(0, len(page_indexes), PAGES_PER_TASK)]
+    futures = [_process_pool().submit(extract_page_texts, path, task) for task in tasks]
+    try:
+        for future in futures:
+            # Time spent waiting on the pool, i.e. extraction not hidden behind earlier chunks
+            with metrics.span('pdf_extract'):
+                pages = future.result()
+            yield from pages
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _cached_pages(document, page_indexes):
+    for index in page_indexes:
+        yield index + 1, document['pages'][str(index + 1)]
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class ExtractedPages:
+    """Iterator over (page_number, text) that owns the downloaded PDF.
+
+    close() always removes the file, even if iteration never started (a
+    generator's finally would not run then); the file is also removed if
+    the object is dropped without being closed.
+    """
+
+    def __init__(self, path, pages):
+        self.path = path
+        self._pages = pages
+        self._finalizer = weakref.finalize(self, _remove, path)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._pages)
+
+    def close(self):
+        self._pages.close()
+        self._finalizer()
+
+
+def _extract_and_store(path, url, digest, headers, document, page_indexes):
+    """Extract the pages missing from the cached document, then store the merged result."""
+    pages = document['pages']
+    try:
+        missing = [index for index in page_indexes if str(index + 1) not in pages]
+        extracted = iter_page_texts(path, missing)
+        for index in page_indexes:
+            key = str(index + 1)
+            if key not in pages:
+                number, text = next(extracted)
+                pages[key] = text
+            yield index + 1, pages[key]
+        pdf_cache.put(digest, document)
+        pdf_cache.remember_url(url, digest, headers)
+    finally:
+        _remove(path)
+
+
+def extract_pdf(url, page_spec=None):
+    """Resolve a PDF's metadata and page text, skipping download and parse when cached.
+
+    Returns (info, page_indexes, pages) where pages lazily yields
+    (page_number, text). A URL checked within the cache TTL is served
+    without any request; an older one is revalidated with its ETag /
+    Last-Modified. Downloaded bytes whose SHA-256 is already cached skip
+    the parse.
+    """
+    url_record, fresh = pdf_cache.lookup_url(url)
+    document = pdf_cache.get(url_record['sha256']) if url_record else None
+    conditional = {}
+    if document is not None:
+        page_indexes = parse_page_range(page_spec, document['info']['page_count'])
+        complete = all(str(index + 1) in document['pages'] for index in page_indexes)
+        if complete and fresh:
+            pdf_cache.record('hits', document['pdf_bytes'])
+            return document['info'], page_indexes, _cached_pages(document, page_indexes)
+        if complete:
+            if url_record['etag']:
+                conditional['If-None-Match'] = url_record['etag']
+            if url_record['last_modified']:
+                conditional['If-Modified-Since'] = url_record['last_modified']
+
+    path, digest, headers, size = download_pdf(url, headers=conditional or None)
+    if path is None:
+        pdf_cache.remember_url(url, url_record['sha256'], headers)
+        pdf_cache.record('revalidated', document['pdf_bytes'])
+        return document['info'], page_indexes, _cached_pages(document, page_indexes)
+
+    try:
+        document = pdf_cache.get(digest)
+        if document is None:
+            document = {'info': read_metadata(path), 'pages': {}, 'pdf_bytes': size}
+        page_indexes = parse_page_range(page_spec, document['info']['page_count'])
+    except BaseException:
+        os.remove(path)
+        raise
+    if all(str(index + 1) in document['pages'] for index in page_indexes):
+        os.remove(path)
+        pdf_cache.remember_url(url, digest, headers)
+        pdf_cache.record('content_hits')
+        return document['info'], page_indexes, _cached_pages(document, page_indexes)
+    pdf_cache.record('misses')
+    return document['info'], page_indexes, ExtractedPages(
+        path, _extract_and_store(path, url, digest, headers, document, page_indexes))
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 200
+FLUSH_INTERVAL = 1.0
+MAX_PENDING = 10000
+MAX_DOCUMENTS = 5000  # searchable rows indexed per result
+PRUNE_INTERVAL = 3600
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS results (id INTEGER PRIMARY KEY, kind TEXT NOT NULL, url TEXT NOT NULL, "
+    "scraped_at REAL NOT NULL, first_seen REAL NOT NULL, content_hash TEXT NOT NULL, data TEXT NOT NULL, "
+    "UNIQUE (kind, url, content_hash))",
+    "CREATE INDEX IF NOT EXISTS results_url ON results (url, kind, scraped_at)",
+    "CREATE INDEX IF NOT EXISTS results_scraped_at ON results (scraped_at)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5(body, kind UNINDEXED, result_id UNINDEXED, "
+    "ref UNINDEXED, tokenize='unicode61 remove_diacritics 2')",
+)
+
+
+def documents_for(kind, data):
+    """Searchable (ref, text) pairs for one result: a headline, table row, PDF page, listing..."""
+    if kind == 'headlines':
+        return [(str(index), text) for index, text in enumerate(data)]
+    if kind == 'tables':
+        return [(f"{t + 1}:{r + 1}", ' | '.join(row)) for t, table in enumerate(data) for r, row in enumerate(table)]
+    if kind == 'pdf_text':
+        documents = [('title', f"{data.get('title', '')} {data.get('author', '')}")]
+        return documents + [(str(number), text) for number, text in data.get('pages', []) if text]
+    if kind == 'ebay':
+        return [(item.get('link', ''), f"{item.get('title', '')} {item.get('price', '')}") for item in data]
+    if kind == 'movie':
+        return [('movie', ' '.join(str(data.get(field, '')) for field in ('name', 'year', 'genre', 'plot')))]
+    if kind == 'pdf_links':
+        return [(link['url'], link['name']) for link in data]
+    return []
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query matching all of its words, the last one as a prefix.
+
+    Every word is quoted, so user input can't break the FTS syntax.
+    """
+    tokens = [f'"{token}"' for token in _TOKEN.findall(text)]
+    if tokens:
+        tokens[-1] += '*'
+    return ' '.join(tokens)
+
+
+class ResultStore:
+    """Scrape results in SQLite with an FTS5 index over their text.
+
+    record() only queues the result; a writer thread hashes, dedupes and
+    inserts queued results in batches, one transaction per batch, so
+    requests never wait on disk. Re-scraping identical content updates
+    the existing row's timestamp instead of adding a row. Results older
+    than ``retention_days`` (0 keeps everything) are pruned hourly. With
+    ``enabled`` false (SCRAPER_RESULTS=off) nothing new is recorded.
+    """
+
+    def __init__(self, path, retention_days=30, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, enabled=True):
+        self.path = path
+        self.enabled = enabled
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=MAX_PENDING)
+        self._stats = {'queued': 0, 'dropped': 0, 'inserted': 0, 'deduplicated': 0, 'batches': 0, 'pruned': 0,
+                       'errors': 0}
+        self._stats_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._reader = self._connect()
+        with self._reader:
+            for statement in SCHEMA:
+                self._reader.execute(statement)
+        self._writer = None
+        self._thread = None
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def record(self, kind, url, data):
+        """Queue a result for storage. Never blocks; drops (and counts) when the writer is far behind."""
+        if not data or not self.enabled:
+            return
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait((kind, url, data, time.time()))
+            self._count('queued')
+        except queue.Full:
+            self._count('dropped')
+
+    def _ensure_writer(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._stats_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='result-store', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        self._writer = self._connect()
+        next_prune = 0.0
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except sqlite3.Error as e:
+                logger.warning(f"Result store dropped a batch of {len(batch)}: {e}")
+                self._count('errors')
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if time.monotonic() >= next_prune:
+                next_prune = time.monotonic() + PRUNE_INTERVAL
+                self.prune()
+
+    def _write(self, batch):
+        with self._writer:
+            for kind, url, data, scraped_at in batch:
+                encoded = json.dumps(data, sort_keys=True)
+                digest = hashlib.sha256(f"{kind}\0{url}\0{encoded}".encode('utf-8')).hexdigest()
+                updated = self._writer.execute(
+                    "UPDATE results SET scraped_at = ? WHERE kind = ? AND url = ? AND content_hash = ?",
+                    (scraped_at, kind, url, digest))
+                if updated.rowcount:
+                    self._count('deduplicated')
+                    continue
+                result_id = self._writer.execute(
+                    "INSERT INTO results (kind, url, scraped_at, first_seen, content_hash, data) VALUES (?, ?, ?, ?, ?, ?)",
+                    (kind, url, scraped_at, scraped_at, digest, encoded)).lastrowid
+                self._writer.executemany(
+                    "INSERT INTO documents (body, kind, result_id, ref) VALUES (?, ?, ?, ?)",
+                    ((text, kind, result_id, ref) for ref, text in documents_for(kind, data)[:MAX_DOCUMENTS]))
+                self._count('inserted')
+        self._count('batches')
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far is written (for tests and shutdown)."""
+        if self._thread is None:
+            return
+        if timeout is None:
+            self._queue.join()
+            return
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def prune(self):
+        if not self.retention_days:
+            return 0
+        cutoff = time.time() - self.retention_days * 86400
+        db = self._writer or self._reader
+        with db:
+            db.execute("DELETE FROM documents WHERE result_id IN (SELECT id FROM results WHERE scraped_at < ?)", (cutoff,))
+            removed = db.execute("DELETE FROM results WHERE scraped_at < ?", (cutoff,)).rowcount
+        self._count('pruned', removed)
+        return removed
+
+    def search(self, text, kind=None, limit=20, offset=0):
+        """Best matches first: [{result_id, kind, url, scraped_at, ref, snippet}]."""
+        match = fts_query(text)
+        if not match:
+            return []
+        sql = ("SELECT documents.result_id, documents.kind, results.url, results.scraped_at, documents.ref, "
+               "snippet(documents, 0, '[', ']', '…', 12) FROM documents JOIN results ON results.id = documents.result_id "
+               "WHERE documents MATCH ?")
+        params = [match]
+        if kind:
+            sql += " AND documents.kind = ?"
+            params.append(kind)
+        sql += " ORDER BY rank LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        with self._read_lock:
+            rows = self._reader.execute(sql, params).fetchall()
+        return [{'result_id': row[0], 'kind': row[1], 'url': row[2], 'scraped_at': row[3], 'ref': row[4],
+                 'snippet': row[5]} for row in rows]
+
+    def get(self, result_id):
+        with self._read_lock:
+            row = self._reader.execute("SELECT id, kind, url, scraped_at, first_seen, content_hash, data FROM results "
+                                       "WHERE id = ?", (result_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def history(self, url, kind=None, limit=20):
+        """Stored results for a URL (or movie/product name), newest first."""
+        sql = "SELECT id, kind, url, scraped_at, first_seen, content_hash, data FROM results WHERE url = ?"
+        params = [url]
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        sql += " ORDER BY scraped_at DESC LIMIT ?"
+        params.append(limit)
+        with self._read_lock:
+            rows = self._reader.execute(sql, params).fetchall()
+        return [self._row(row) for row in rows]
+
+    @staticmethod
+    def _row(row):
+        return {'id': row[0], 'kind': row[1], 'url': row[2], 'scraped_at': row[3], 'first_seen': row[4],
+                'content_hash': row[5], 'data': json.loads(row[6])}
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats, pending=self._queue.qsize())
+        with self._read_lock:
+            stats['results'] = self._reader.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return stats
+
+
+result_store = ResultStore(
+    os.environ.get('SCRAPER_RESULTS_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.results.sqlite3')),
+    retention_days=float(os.environ.get('SCRAPER_RESULTS_RETENTION_DAYS', 30)),
+    enabled=os.environ.get('SCRAPER_RESULTS', 'on').lower() != 'off',
+)
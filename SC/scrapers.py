@@ -0,0 +1,121 @@
+import importlib
+import os
+import sys
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Imported on first use only; they dominate worker start-up time and memory
+HEAVY_BACKENDS = ('selenium', 'webdriver_manager', 'pdfplumber', 'PIL')
+
+_import_seconds = {}
+_import_lock = threading.Lock()
+_ready = {}
+
+
+class Scraper:
+    """One data_type the index form offers.
+
+    ``view(url, form)`` returns the template context for the result (or an
+    ``error``); ``schema`` documents the keys it fills in; ``backends`` lists
+    heavy modules it may load on first use.
+    """
+
+    def __init__(self, data_type, label, view, schema, extractor=None, backends=()):
+        self.data_type = data_type
+        self.label = label
+        self.view = view
+        self.schema = schema
+        self.extractor = extractor
+        self.backends = tuple(backends)
+
+    def describe(self):
+        return {
+            'data_type': self.data_type,
+            'label': self.label,
+            'schema': self.schema,
+            'extractor': self.extractor.__name__ if self.extractor else None,
+            'backends': {name: name in sys.modules for name in self.backends},
+        }
+
+
+SCRAPERS = {}
+
+
+def register(data_type, label, schema, extractor=None, backends=()):
+    """Decorator registering a view function as the handler for a data_type."""
+    def decorator(view):
+        if data_type in SCRAPERS:
+            raise ValueError(f"Scraper already registered for {data_type}")
+        SCRAPERS[data_type] = Scraper(data_type, label, view, schema, extractor, backends)
+        return view
+    return decorator
+
+
+def lazy_import(module_name):
+    """Import a module on first use and remember how long the first import took."""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    with _import_lock:
+        started = time.perf_counter()
+        module = importlib.import_module(module_name)
+        _import_seconds.setdefault(module_name, time.perf_counter() - started)
+    logger.info(f"Loaded {module_name} in {_import_seconds[module_name]:.3f}s")
+    return module
+
+
+def _process_age():
+    """Seconds since this process started (Linux), or None."""
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return round(uptime - start_ticks / os.sysconf('SC_CLK_TCK'), 3)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _rss_kb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def mark_ready():
+    """Record boot time and memory once the app module has finished importing."""
+    _ready.update(boot_seconds=_process_age(), rss_kb=_rss_kb(),
+                  heavy_loaded_at_boot=[name for name in HEAVY_BACKENDS if name in sys.modules])
+
+
+def startup_report():
+    """Boot time and base memory, plus which heavy backends are loaded now and what their import cost."""
+    prefixes = {name: [module for module in _import_seconds if module.split('.')[0] == name] for name in HEAVY_BACKENDS}
+    return {
+        'boot_seconds': _ready.get('boot_seconds'),
+        'rss_kb_at_boot': _ready.get('rss_kb'),
+        'heavy_loaded_at_boot': _ready.get('heavy_loaded_at_boot'),
+        'rss_kb': _rss_kb(),
+        'backends': {
+            name: {
+                'loaded': name in sys.modules,
+                'import_seconds': round(sum(_import_seconds[module] for module in prefixes[name]), 3)
+                if prefixes[name] else None,
+            }
+            for name in HEAVY_BACKENDS
+        },
+        'scrapers': list(SCRAPERS),
+    }
+
+
+if __name__ == '__main__':
+    # python scrapers.py: import the app the way a worker does and print the report
+    import json
+    import app  # noqa: F401
+    print(json.dumps(sys.modules['scrapers'].startup_report(), indent=2))
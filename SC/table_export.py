@@ -0,0 +1,179 @@
+import csv
+import io
+import json
+import re
+
+from extractors import parse_html
+
+_SPACES = re.compile(r'[\s\u00a0]')
+# Optional sign, digits (optionally comma-grouped in threes), optional decimals; no nan/inf/1_000.
+# No leading zeros besides a lone 0, so ZIP codes and IDs like 02134 or 007 stay strings.
+_NUMBER = re.compile(r'[+-]?(?:0|[1-9]\d{0,2}(?:,\d{3})+|[1-9]\d*)?(?:\.\d+)?')
+
+
+def data_tables(markup):
+    """Tables numbered the way TableExtractor numbers them: only those with at least one <td> row."""
+    soup = parse_html(markup, tags=('table',))
+    return [table for table in soup.find_all('table')
+            if any(row.find_all('td') for row in table.find_all('tr'))]
+
+
+def _span(cell, attribute):
+    try:
+        return max(1, min(int(cell.get(attribute, 1)), 1000))
+    except (TypeError, ValueError):
+        return 1
+
+
+def iter_table_rows(table):
+    """Yield (is_header, cells) for the table's own rows with colspan/rowspan expanded into a grid."""
+    pending = {}  # column -> [rows left, text] for cells spanning down from earlier rows
+    for row in table.find_all('tr'):
+        if row.find_parent('table') is not table:
+            continue  # row of a nested table
+        cells = row.find_all(['td', 'th'], recursive=False)
+        in_head = row.find_parent('thead') is not None
+        is_header = in_head or (bool(cells) and all(cell.name == 'th' for cell in cells))
+        values = []
+        column = 0
+
+        def fill_pending():
+            nonlocal column
+            while column in pending:
+                left, text = pending[column]
+                values.append(text)
+                if left == 1:
+                    del pending[column]
+                else:
+                    pending[column][0] = left - 1
+                column += 1
+
+        for cell in cells:
+            fill_pending()
+            text = cell.get_text(' ', strip=True)
+            rowspan = _span(cell, 'rowspan')
+            for _ in range(_span(cell, 'colspan')):
+                values.append(text)
+                if rowspan > 1:
+                    pending[column] = [rowspan - 1, text]
+                column += 1
+        fill_pending()
+        if values:
+            yield is_header, values
+
+
+def split_header(rows):
+    """Consume leading header rows; returns (column names, iterator over the remaining rows)."""
+    rows = iter(rows)
+    header_rows = []
+    first_data = None
+    for is_header, values in rows:
+        if is_header and first_data is None:
+            header_rows.append(values)
+            continue
+        first_data = values
+        break
+    width = max([len(r) for r in header_rows] + [len(first_data or [])])
+    names = []
+    for index in range(width):
+        parts = []
+        for header in header_rows:
+            if index < len(header) and header[index] and header[index] not in parts:
+                parts.append(header[index])
+        names.append(' / '.join(parts) or f'column_{index + 1}')
+    names = unique_names(names)
+
+    def body():
+        if first_data is not None:
+            yield first_data
+        for _, values in rows:
+            yield values
+    return names, body()
+
+
+def unique_names(names):
+    """Suffix repeated column names (name, name_2, ...) so keyed rows lose no cells."""
+    seen = set()
+    result = []
+    for name in names:
+        candidate, number = name, 1
+        while candidate in seen:
+            number += 1
+            candidate = f'{name}_{number}'
+        seen.add(candidate)
+        result.append(candidate)
+    return result
+
+
+def _extra_name(names):
+    # Name for a column past the header, unlike any existing one
+    number = len(names) + 1
+    while f'column_{number}' in names:
+        number += 1
+    return f'column_{number}'
+
+
+def csv_lines(table):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    names, rows = split_header(iter_table_rows(table))
+    writer.writerow(names)
+    yield buffer.getvalue()
+    for values in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        yield buffer.getvalue()
+
+
+def ndjson_lines(table):
+    names, rows = split_header(iter_table_rows(table))
+    for values in rows:
+        while len(names) < len(values):
+            # Rows wider than the header get generated names instead of losing cells
+            names.append(_extra_name(names))
+        yield json.dumps(dict(zip(names, values))) + '\n'
+
+
+def _parse_number(text):
+    cleaned = _SPACES.sub('', text)
+    if not cleaned:
+        return None
+    if not _NUMBER.fullmatch(cleaned) or not any(char.isdigit() for char in cleaned):
+        raise ValueError(f"Not a number: {text!r}")
+    cleaned = cleaned.replace(',', '')
+    return float(cleaned) if '.' in cleaned else int(cleaned)
+
+
+def columnar(table):
+    """Column-oriented table with a type per column.
+
+    A column is 'int' or 'float' when every non-empty cell is a plain number
+    (sign, digits with optional comma thousands separators, decimals; no
+    leading zeros, so codes like 02134 stay strings) and its values are then
+    numbers, with null for empty cells; otherwise it is 'string'.
+    """
+    names, rows = split_header(iter_table_rows(table))
+    columns = [[] for _ in names]
+    row_count = 0
+    for values in rows:
+        row_count += 1
+        for index in range(len(columns)):
+            columns[index].append(values[index] if index < len(values) else '')
+        for extra in values[len(columns):]:
+            # Rows wider than the header grow new columns
+            names.append(_extra_name(names))
+            columns.append([''] * (row_count - 1) + [extra])
+
+    result = []
+    for name, cells in zip(names, columns):
+        kind, data = 'string', cells
+        try:
+            parsed = [_parse_number(cell) for cell in cells]
+        except ValueError:
+            parsed = None
+        if parsed and any(value is not None for value in parsed):
+            kind = 'int' if all(isinstance(value, int) or value is None for value in parsed) else 'float'
+            data = parsed if kind == 'int' else [None if value is None else float(value) for value in parsed]
+        result.append({'name': name, 'type': kind, 'values': data})
+    return {'rows': row_count, 'columns': result}
@@ -0,0 +1,95 @@
+import gzip
+
+import pytest
+from flask import Flask, request
+
+import api
+
+ITEMS = [{'text': f'headline {n}'} for n in range(25)]
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config['items'] = ITEMS
+
+    @app.route('/news')
+    def news():
+        try:
+            return api.paged_response(request, 'news', {'url': 'http://example.com/'}, app.config['items'],
+                                      api.page_size(request.args.get('limit')), request.args.get('cursor'))
+        except api.CursorError as e:
+            return {'success': False, 'error': str(e)}, 400
+
+    app.after_request(lambda response: api.compress_response(request, response))
+    return app.test_client()
+
+
+def test_cursor_walks_every_item_once(client):
+    seen, cursor = [], None
+    while True:
+        query = {'limit': 10, **({'cursor': cursor} if cursor else {})}
+        data = client.get('/news', query_string=query).get_json()
+        assert data['total'] == len(ITEMS)
+        seen.extend(data['items'])
+        cursor = data['next_cursor']
+        if cursor is None:
+            break
+    assert seen == ITEMS
+
+
+def test_page_size_is_clamped():
+    assert api.page_size(None) == api.DEFAULT_PAGE_SIZE
+    assert api.page_size('0') == 1
+    assert api.page_size(str(api.MAX_PAGE_SIZE + 1)) == api.MAX_PAGE_SIZE
+    with pytest.raises(ValueError):
+        api.page_size('ten')
+
+
+def test_cursor_from_a_changed_result_is_refused(client):
+    cursor = client.get('/news', query_string={'limit': 10}).get_json()['next_cursor']
+    client.application.config['items'] = ITEMS + [{'text': 'breaking'}]
+    response = client.get('/news', query_string={'limit': 10, 'cursor': cursor})
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_malformed_cursor_is_refused(client):
+    assert client.get('/news', query_string={'cursor': 'not-a-cursor'}).status_code == 400
+
+
+def test_unchanged_page_revalidates_to_304(client):
+    first = client.get('/news', query_string={'limit': 10})
+    etag = first.headers['ETag']
+    again = client.get('/news', query_string={'limit': 10}, headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+
+
+def test_each_page_has_its_own_etag(client):
+    first = client.get('/news', query_string={'limit': 10})
+    second = client.get('/news', query_string={'limit': 10, 'cursor': first.get_json()['next_cursor']})
+    assert first.headers['ETag'] != second.headers['ETag']
+    response = client.get('/news', query_string={'limit': 10}, headers={'If-None-Match': second.headers['ETag']})
+    assert response.status_code == 200
+
+
+def test_changed_result_gets_a_new_etag(client):
+    etag = client.get('/news', query_string={'limit': 10}).headers['ETag']
+    client.application.config['items'] = [{'text': 'breaking'}] + ITEMS
+    response = client.get('/news', query_string={'limit': 10}, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_compressed_page_revalidates_with_its_encoded_etag(client):
+    client.application.config['items'] = ITEMS * 10  # past MIN_COMPRESS_BYTES
+    first = client.get('/news', query_string={'limit': 250}, headers={'Accept-Encoding': 'gzip'})
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert first.headers['ETag'].endswith('-gzip"')
+    assert gzip.decompress(first.data).startswith(b'{')
+    again = client.get('/news', query_string={'limit': 250},
+                       headers={'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert again.headers['ETag'] == first.headers['ETag']
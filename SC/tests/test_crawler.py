@@ -0,0 +1,95 @@
+import pytest
+
+import batch
+import crawler
+from crawler import RobotsCache, canonicalize_url, in_scope, site_of
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('HTTP://Example.COM:80/a', 'http://example.com/a'),
+    ('https://example.com:443/a', 'https://example.com/a'),
+    ('https://example.com:8443/a', 'https://example.com:8443/a'),
+    ('https://example.com', 'https://example.com/'),
+    ('https://example.com//a///b', 'https://example.com/a/b'),
+    ('https://example.com/a?b=2&a=1', 'https://example.com/a?a=1&b=2'),
+    ('https://example.com/a?utm_source=x&id=3&UTM_Campaign=y', 'https://example.com/a?id=3'),
+    ('https://example.com/a?q=', 'https://example.com/a?q='),
+    ('https://example.com/a#section', 'https://example.com/a'),
+    ('  https://example.com/a  ', 'https://example.com/a'),
+])
+def test_canonicalize_url(url, expected):
+    assert canonicalize_url(url) == expected
+
+
+@pytest.mark.parametrize('url', ['mailto:a@example.com', 'javascript:void(0)', 'ftp://example.com/f',
+                                 'https:///no-host', 'http://example.com:99999/'])
+def test_canonicalize_url_rejects_non_web_urls(url):
+    assert canonicalize_url(url) is None
+
+
+def test_in_scope():
+    site = site_of('https://www.example.com/start')
+    assert site == 'example.com'
+    assert in_scope('https://example.com/a', site)
+    assert in_scope('https://www.example.com/a', site)
+    assert in_scope('https://docs.example.com/a', site)
+    assert not in_scope('https://notexample.com/a', site)
+    assert not in_scope('https://example.com.evil.net/a', site)
+
+
+class FakeResponse:
+    def __init__(self, status_code, text=''):
+        self.status_code = status_code
+        self.text = text
+
+
+def robots_for(monkeypatch, response):
+    requested = []
+
+    def fetch(url, **kwargs):
+        requested.append(url)
+        return response
+    monkeypatch.setattr(crawler, 'fetch', fetch)
+    return RobotsCache(), requested
+
+
+@pytest.mark.parametrize('status', [401, 403])
+def test_forbidden_robots_txt_disallows_everything(monkeypatch, status):
+    robots, _ = robots_for(monkeypatch, FakeResponse(status))
+    assert not robots.allowed('https://example.com/')
+    assert not robots.allowed('https://example.com/page')
+
+
+@pytest.mark.parametrize('status', [404, 410])
+def test_missing_robots_txt_allows_everything(monkeypatch, status):
+    robots, _ = robots_for(monkeypatch, FakeResponse(status))
+    assert robots.allowed('https://example.com/page')
+    assert robots.crawl_delay('https://example.com/page') is None
+
+
+def test_robots_txt_rules_and_crawl_delay(monkeypatch):
+    robots, requested = robots_for(monkeypatch, FakeResponse(200, 'User-agent: *\nDisallow: /private\nCrawl-delay: 2\n'))
+    assert robots.allowed('https://example.com/public')
+    assert not robots.allowed('https://example.com/private/x')
+    assert robots.crawl_delay('https://example.com/') == 2
+    assert requested == ['https://example.com/robots.txt']  # fetched once per origin
+
+
+def test_each_host_gets_its_own_crawl_delay(monkeypatch):
+    delays = {'https://example.com': 3, 'https://docs.example.com': 7}
+    links = {'https://example.com/': ['https://docs.example.com/a', 'https://cdn.example.com/b']}
+    monkeypatch.setattr(crawler.robots, 'allowed', lambda url: True)
+    monkeypatch.setattr(crawler.robots, 'crawl_delay', lambda url: delays.get(url.rsplit('/', 1)[0]))
+    monkeypatch.setattr(crawler, 'visit', lambda url, collect, profile: {
+        'kind': 'page', 'url': url, 'results': {'links': links.get(url, [])}})
+    spacing = {}
+
+    def run_batch(targets, scrape, host_delay, **kwargs):
+        for target in targets:
+            spacing[batch.host_of(target)] = host_delay(batch.host_of(target))
+        return batch.run_batch(targets, scrape, host_delay=0, **kwargs)
+    monkeypatch.setattr(crawler, 'run_batch', run_batch)
+
+    events = list(crawler.crawl('https://example.com/', max_depth=1))
+    assert [event['type'] for event in events].count('page') == 3
+    assert spacing == {'example.com': 3, 'docs.example.com': 7, 'cdn.example.com': crawler.CRAWL_HOST_DELAY}
@@ -0,0 +1,161 @@
+import threading
+
+import pytest
+
+from driver_pool import DriverPool, PoolTimeout
+
+
+class FakeDriver:
+    """Just enough of a WebDriver for the pool: reset calls and a health check."""
+
+    def __init__(self):
+        self.window_handles = ['main']
+        self.switch_to = self
+        self.alive = True
+        self.quit_calls = 0
+
+    @property
+    def current_url(self):
+        if not self.alive:
+            raise RuntimeError("browser is gone")
+        return 'about:blank'
+
+    def window(self, handle):
+        pass
+
+    def close(self):
+        pass
+
+    def delete_all_cookies(self):
+        if not self.alive:
+            raise RuntimeError("browser is gone")
+
+    def execute_script(self, script):
+        pass
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.quit_calls += 1
+
+
+@pytest.fixture
+def created():
+    return []
+
+
+@pytest.fixture
+def factory(created):
+    def make():
+        driver = FakeDriver()
+        created.append(driver)
+        return driver
+    return make
+
+
+def test_reuses_a_checked_in_driver(factory, created):
+    pool = DriverPool(size=2, factory=factory)
+    with pool.driver() as first:
+        pass
+    with pool.driver() as second:
+        pass
+    assert first is second
+    assert len(created) == 1
+    assert pool.stats()['created'] == 1
+    assert pool.stats()['checkouts'] == 2
+
+
+def test_never_creates_more_than_size(factory, created):
+    pool = DriverPool(size=2, factory=factory)
+    first, second = pool.checkout(), pool.checkout()
+    with pytest.raises(PoolTimeout):
+        pool.checkout(timeout=0.05)
+    assert len(created) == 2
+    assert pool.stats()['timeouts'] == 1
+    pool.checkin(first)
+    pool.checkin(second)
+
+
+def test_waiter_gets_the_driver_checked_in(factory, created):
+    pool = DriverPool(size=1, factory=factory)
+    driver = pool.checkout()
+    timer = threading.Timer(0.05, pool.checkin, (driver,))
+    timer.start()
+    assert pool.checkout(timeout=5) is driver
+    timer.join()
+    assert len(created) == 1
+    assert pool.stats()['waits'] == 1
+
+
+def test_replaces_a_driver_that_crashed(factory, created):
+    pool = DriverPool(size=1, factory=factory)
+    with pytest.raises(ValueError):
+        with pool.driver() as driver:
+            driver.alive = False
+            raise ValueError("page script failed")
+    assert driver.quit_calls == 1
+    with pool.driver() as replacement:
+        assert replacement is not driver
+    assert pool.stats()['crashed'] == 1
+
+
+def test_driver_that_died_while_idle_is_not_handed_out(factory, created):
+    pool = DriverPool(size=1, factory=factory)
+    with pool.driver() as driver:
+        pass
+    driver.alive = False
+    with pool.driver(timeout=0.05) as replacement:
+        assert replacement is not driver
+        assert replacement.alive
+    assert driver.quit_calls == 1
+    assert len(created) == 2
+    assert pool.stats()['crashed'] == 1
+    assert pool.stats()['in_use'] == 0
+
+
+def test_keeps_a_healthy_driver_after_an_error(factory, created):
+    pool = DriverPool(size=1, factory=factory)
+    with pytest.raises(ValueError):
+        with pool.driver() as driver:
+            raise ValueError("element not found")
+    with pool.driver() as again:
+        assert again is driver
+    assert pool.stats()['crashed'] == 0
+
+
+def test_recycles_after_max_uses(factory, created):
+    pool = DriverPool(size=1, max_uses=2, factory=factory)
+    for _ in range(3):
+        with pool.driver():
+            pass
+    assert len(created) == 2
+    assert created[0].quit_calls == 1
+    assert pool.stats()['recycled'] == 1
+
+
+def test_failed_factory_frees_its_slot(created):
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError("chromedriver missing")
+        return FakeDriver()
+
+    pool = DriverPool(size=1, factory=flaky)
+    with pytest.raises(OSError):
+        pool.checkout(timeout=0.05)
+    driver = pool.checkout(timeout=0.05)
+    assert isinstance(driver, FakeDriver)
+    pool.checkin(driver)
+
+
+def test_close_quits_idle_drivers(factory, created):
+    pool = DriverPool(size=2, factory=factory)
+    with pool.driver():
+        pass
+    pool.close()
+    assert created[0].quit_calls == 1
+    with pytest.raises(RuntimeError):
+        pool.checkout()
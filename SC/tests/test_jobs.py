@@ -0,0 +1,137 @@
+import threading
+import time
+
+import pytest
+
+from jobs import JobQueue, JobQueueFull, SqliteJobStore
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def gate():
+    return threading.Event()
+
+
+@pytest.fixture
+def queue(gate):
+    queue = JobQueue(workers=1)
+    calls = []
+
+    def blocked(job, params):
+        calls.append(params)
+        while not gate.wait(0.01):
+            job.check()
+        return params['n']
+
+    queue.register('blocked', blocked)
+    queue.calls = calls
+    yield queue
+    gate.set()
+    queue.close()
+
+
+def test_identical_submissions_share_one_job(queue, gate):
+    job, coalesced = queue.submit('blocked', {'n': 1})
+    again, again_coalesced = queue.submit('blocked', {'n': 1})
+    other, _ = queue.submit('blocked', {'n': 2})
+    assert not coalesced and again_coalesced
+    assert again is job and other is not job
+    assert job.to_dict()['coalesced'] == 1
+
+    gate.set()
+    wait_until(lambda: other.status == 'done')
+    assert job.result == 1 and other.result == 2
+    assert queue.calls == [{'n': 1}, {'n': 2}]
+    assert queue.stats()['coalesced'] == 1
+
+
+def test_finished_job_is_not_joined(queue, gate):
+    gate.set()
+    job, _ = queue.submit('blocked', {'n': 1})
+    wait_until(lambda: job.status == 'done')
+    again, coalesced = queue.submit('blocked', {'n': 1})
+    assert again is not job and not coalesced
+
+
+def test_cancel_queued_job_never_runs(queue, gate):
+    running, _ = queue.submit('blocked', {'n': 1})
+    queued, _ = queue.submit('blocked', {'n': 2})
+    wait_until(lambda: running.status == 'running')
+    assert queue.cancel(queued.id)
+    assert queued.status == 'cancelled' and queued.finished_at is not None
+    gate.set()
+    wait_until(lambda: running.status == 'done')
+    assert queue.calls == [{'n': 1}]
+
+
+def test_cancel_running_job_stops_it_and_drops_its_result(queue):
+    job, _ = queue.submit('blocked', {'n': 1})
+    wait_until(lambda: job.status == 'running')
+    assert queue.cancel(job.id)
+    assert job.status == 'cancelled'
+    assert not queue.cancel(job.id)
+    job.future.result(timeout=5)
+    assert job.status == 'cancelled' and job.result is None
+    assert queue.stats()['cancelled'] == 1
+
+
+def test_cancelled_job_can_be_resubmitted(queue, gate):
+    job, _ = queue.submit('blocked', {'n': 1})
+    queue.cancel(job.id)
+    again, coalesced = queue.submit('blocked', {'n': 1})
+    assert again is not job and not coalesced
+
+
+def test_running_job_times_out(queue):
+    job, _ = queue.submit('blocked', {'n': 1}, timeout=0.1)
+    wait_until(lambda: job.status == 'timeout')
+    assert 'timeout' in job.error
+
+
+def test_full_queue_refuses_new_jobs(gate):
+    queue = JobQueue(workers=1, max_queued=1)
+    queue.register('blocked', lambda job, params: gate.wait(5))
+    try:
+        first, _ = queue.submit('blocked', {'n': 1})
+        wait_until(lambda: first.status == 'running')
+        queue.submit('blocked', {'n': 2})
+        with pytest.raises(JobQueueFull):
+            queue.submit('blocked', {'n': 3})
+    finally:
+        gate.set()
+        queue.close()
+
+
+def test_unknown_kind_is_rejected(queue):
+    with pytest.raises(ValueError):
+        queue.submit('nope', {})
+
+
+def test_cancel_from_another_process(tmp_path, gate):
+    path = str(tmp_path / 'jobs.sqlite3')
+    owner = JobQueue(workers=1, store=SqliteJobStore(path))
+    other = JobQueue(workers=1, store=SqliteJobStore(path))
+
+    def blocked(job, params):
+        while not gate.wait(0.01):
+            job.check()
+
+    owner.register('blocked', blocked)
+    try:
+        job, _ = owner.submit('blocked', {'n': 1})
+        wait_until(lambda: other.record(job.id)['status'] == 'running')
+        assert other.cancel(job.id)
+        wait_until(lambda: other.record(job.id)['status'] == 'cancelled')
+        assert job.status == 'cancelled'
+        assert not other.cancel(job.id)
+    finally:
+        gate.set()
+        owner.close()
+        other.close()
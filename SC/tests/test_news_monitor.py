@@ -0,0 +1,92 @@
+import pytest
+
+import news_monitor
+from news_monitor import MinHashIndex, NewsMonitor, headline_hash, normalize_headline
+
+STORY = "Storm hits the coast overnight leaving thousands without power"
+REWORDED = "Storm hits the coast overnight, leaving thousands without power today"
+OTHER = "Central bank raises interest rates for the third time this year"
+
+
+def test_normalized_text_ignores_case_and_punctuation():
+    assert normalize_headline("  Storm HITS the coast -- again!  ") == 'storm hits the coast again'
+    assert headline_hash("Storm hits the coast!") == headline_hash("storm  hits, the coast")
+    assert headline_hash("Storm hits the coast") != headline_hash("Storm hits the city")
+
+
+def test_near_duplicate_headlines_collapse():
+    index = MinHashIndex()
+    index.add('story', index.signature(STORY))
+    assert index.find_duplicate(index.signature(REWORDED)) == 'story'
+    assert index.find_duplicate(index.signature(STORY.upper() + '!')) == 'story'
+
+
+def test_distinct_headlines_do_not_collapse():
+    index = MinHashIndex()
+    index.add('story', index.signature(STORY))
+    assert index.find_duplicate(index.signature(OTHER)) is None
+    assert index.find_duplicate(index.signature("Storm hits the city centre as rivers burst their banks")) is None
+
+
+def test_signatures_are_stable():
+    assert MinHashIndex().signature(STORY) == MinHashIndex().signature(STORY)
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        MinHashIndex(num_perm=100, bands=32)
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, headlines):
+        self.content = ''.join(f'<h2>{text}</h2>' for text in headlines).encode('utf-8')
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    pages = {}
+    monkeypatch.setattr(news_monitor, 'fetch', lambda url, **kwargs: FakeResponse(pages[url]))
+    monkeypatch.setattr(NewsMonitor, '_ensure_thread', lambda self: None)  # poll by hand only
+    monitor = NewsMonitor()
+    monitor.pages = pages
+    return monitor
+
+
+def test_poll_records_each_story_once(monitor):
+    monitor.pages['http://a.test/'] = [STORY, OTHER, STORY]
+    monitor.pages['http://b.test/'] = [REWORDED, STORY.lower()]
+    monitor.register('http://a.test/')
+    monitor.register('http://b.test/')
+
+    assert [event['headline'] for event in monitor.poll('http://a.test/')] == [STORY, OTHER]
+    assert monitor.poll('http://b.test/') == []
+    stats = monitor.stats()
+    # The repeat on page a is dropped by the extractor; the lowercased copy on page b by its hash
+    assert (stats['new'], stats['duplicates'], stats['near_duplicates']) == (2, 1, 1)
+
+
+def test_exact_dedupe_only(monitor):
+    plain = NewsMonitor(near_duplicates=False)
+    monitor.pages['http://a.test/'] = [STORY, REWORDED, STORY]
+    plain.register('http://a.test/')
+    assert [event['headline'] for event in plain.poll('http://a.test/')] == [STORY, REWORDED]
+
+
+def test_since_returns_only_newer_events(monitor):
+    monitor.pages['http://a.test/'] = [STORY]
+    monitor.register('http://a.test/')
+    first = monitor.poll('http://a.test/')
+    monitor.pages['http://a.test/'] = [STORY, OTHER, "Local team wins the championship after extra time"]
+    second = monitor.poll('http://a.test/')
+
+    assert [event['id'] for event in monitor.events()] == [1, 2, 3]
+    assert monitor.events(since=first[-1]['id']) == second
+    assert [event['id'] for event in monitor.events(since=2)] == [3]
+    assert monitor.events(since=3) == []
+    assert [event['id'] for event in monitor.events(since=0, limit=2)] == [1, 2]
@@ -0,0 +1,107 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import fetcher
+from page_cache import DiskBackend, MemoryBackend, PageCache
+
+BODY = b'<html><body><h1>cached</h1></body></html>'
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Serves BODY with an ETag and Last-Modified, answering matching conditional GETs with 304."""
+    seen = []
+    etag = '"v1"'
+
+    def do_GET(self):
+        self.seen.append({'path': self.path, 'if_none_match': self.headers.get('If-None-Match'),
+                          'if_modified_since': self.headers.get('If-Modified-Since')})
+        if self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.send_header('ETag', self.etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(BODY)))
+        if self.path != '/no-validators':
+            self.send_header('ETag', self.etag)
+            self.send_header('Last-Modified', 'Mon, 05 Oct 2026 10:00:00 GMT')
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_port}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(params=['memory', 'disk'])
+def cache(request, tmp_path, monkeypatch):
+    backend = MemoryBackend() if request.param == 'memory' else DiskBackend(str(tmp_path))
+    cache = PageCache(backend, ttl=60)
+    monkeypatch.setattr(fetcher, 'page_cache', cache)
+    Handler.seen = []
+    Handler.etag = '"v1"'
+    return cache
+
+
+def expire(cache, key):
+    entry, _ = cache.lookup(key)
+    entry.stored_at -= cache.ttl + 1
+    cache.backend.touch(key, entry)
+
+
+def test_fresh_entry_is_served_without_a_request(server, cache):
+    first = fetcher.fetch_page(server + '/page')
+    second = fetcher.fetch_page(server + '/page')
+    assert second.content == first.content == BODY
+    assert len(Handler.seen) == 1
+    assert cache.stats()['hits'] == 1
+
+
+def test_stale_entry_is_revalidated_and_reused_on_304(server, cache):
+    first = fetcher.fetch_page(server + '/page')
+    cache.save_result(first.cache_key, first.cache_entry, 'tables', [[['a']]])
+    expire(cache, first.cache_key)
+
+    second = fetcher.fetch_page(server + '/page')
+    assert Handler.seen[-1]['if_none_match'] == '"v1"'
+    assert Handler.seen[-1]['if_modified_since'] == 'Mon, 05 Oct 2026 10:00:00 GMT'
+    assert second.status_code == 200
+    assert second.content == BODY
+    assert second.cache_entry.results == {'tables': [[['a']]]}
+    assert cache.stats()['revalidated'] == 1
+
+    # The 304 restarted the entry's ttl
+    fetcher.fetch_page(server + '/page')
+    assert len(Handler.seen) == 2
+
+
+def test_changed_page_replaces_the_entry(server, cache):
+    first = fetcher.fetch_page(server + '/page')
+    cache.save_result(first.cache_key, first.cache_entry, 'tables', [])
+    expire(cache, first.cache_key)
+    Handler.etag = '"v2"'
+
+    second = fetcher.fetch_page(server + '/page')
+    assert second.cache_entry.etag == '"v2"'
+    assert second.cache_entry.results == {}
+    assert cache.stats()['misses'] == 2
+
+
+def test_stale_entry_without_validators_is_refetched(server, cache):
+    first = fetcher.fetch_page(server + '/no-validators')
+    expire(cache, first.cache_key)
+    fetcher.fetch_page(server + '/no-validators')
+    assert Handler.seen[-1]['if_none_match'] is None
+    assert cache.stats()['misses'] == 2
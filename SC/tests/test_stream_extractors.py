@@ -0,0 +1,105 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import extractors
+import fetcher
+from extractors import HeadlineExtractor, ImageExtractor, VideoExtractor, run_extractors, stream_extractors
+
+HEAD = '<html><head><title>t</title><base href="/media/"></head><body>'
+HEADLINES = ''.join(f'<h2>Storm season starts early in the north, part {n}</h2>' for n in range(5))
+IMAGES = ''.join(f'<img src="img{n}.jpg" alt="x">' for n in range(10))
+VIDEOS = ''.join(f'<video><source src="clip{n}.mp4" type="video/mp4"></video>' for n in range(5))
+PADDING = '<p>' + 'filler text ' * 100 + '</p>'
+# The limited results all sit in the first few KB, followed by about a megabyte of padding
+PAGE = (HEAD + HEADLINES + IMAGES + VIDEOS + PADDING * 1000 + '<img src="last.jpg"></body></html>').encode('utf-8')
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.end_headers()
+        try:
+            self.wfile.write(PAGE)
+        except OSError:
+            pass  # the client hung up early, as it should
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def page_url():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_port}/news/page.html'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def download(monkeypatch):
+    """Records the streamed response and how many body bytes were read from it."""
+    seen = {'received': 0, 'response': None}
+    fetch, iter_body = fetcher.fetch, fetcher.iter_body
+
+    def recording_fetch(*args, **kwargs):
+        seen['response'] = fetch(*args, **kwargs)
+        return seen['response']
+
+    def counting_iter_body(response, max_bytes=None):
+        for chunk in iter_body(response, max_bytes):
+            seen['received'] += len(chunk)
+            yield chunk
+
+    monkeypatch.setattr(fetcher, 'fetch', recording_fetch)
+    monkeypatch.setattr(fetcher, 'iter_body', counting_iter_body)
+    return seen
+
+
+def make(url, limit):
+    return [ImageExtractor(url, limit=limit), VideoExtractor(url, limit=limit), HeadlineExtractor(url, limit=limit)]
+
+
+def test_stream_stops_after_the_limits_are_met(page_url, download):
+    results = stream_extractors(page_url, make(page_url, 3))
+    assert len(results['images:all']) == 3
+    assert len(results['videos:all']) == 3
+    assert len(results['headlines']) == 3
+    assert download['received'] < len(PAGE) // 10
+
+
+def test_download_is_closed_early(page_url, download):
+    stream_extractors(page_url, [ImageExtractor(page_url, limit=2)])
+    assert download['response'].raw.closed
+    assert download['received'] < len(PAGE)
+
+
+@pytest.mark.parametrize('limit', [1, 3, 5])
+def test_stream_matches_the_full_parse(page_url, download, limit):
+    assert stream_extractors(page_url, make(page_url, limit)) == run_extractors(PAGE, make(page_url, limit))
+
+
+def test_unlimited_stream_reads_the_whole_page(page_url, download):
+    results = stream_extractors(page_url, [ImageExtractor(page_url)])
+    assert download['received'] == len(PAGE)
+    assert results == run_extractors(PAGE, [ImageExtractor(page_url)])
+    assert results['images:all'][-1].endswith('/media/last.jpg')
+
+
+def test_base_href_is_honoured(page_url, download):
+    origin = page_url.rsplit('/news/', 1)[0]
+    results = stream_extractors(page_url, make(page_url, 2))
+    assert results['images:all'] == [f'{origin}/media/img0.jpg', f'{origin}/media/img1.jpg']
+    assert results['videos:all'] == [f'{origin}/media/clip0.mp4', f'{origin}/media/clip1.mp4']
+
+
+def test_extract_url_streams_limited_requests(page_url, download, monkeypatch):
+    monkeypatch.setattr(fetcher, 'page_cache', None)
+    results = extractors.extract_url(page_url, [ImageExtractor(page_url, limit=4)])
+    assert len(results['images:all']) == 4
+    assert download['received'] < len(PAGE)
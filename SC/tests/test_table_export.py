@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+from table_export import _parse_number, columnar, data_tables, iter_table_rows, ndjson_lines, split_header
+
+
+def table(markup):
+    return data_tables(f'<html><body>{markup}</body></html>')[0]
+
+
+def rows(markup):
+    return list(iter_table_rows(table(markup)))
+
+
+def test_colspan_and_rowspan_expand_into_a_grid():
+    assert rows("""<table>
+        <tr><th colspan="2">Name</th><th>Age</th></tr>
+        <tr><td rowspan="2">A</td><td>x</td><td>1</td></tr>
+        <tr><td>y</td><td>2</td></tr>
+        <tr><td>B</td><td colspan="2">z</td></tr>
+    </table>""") == [
+        (True, ['Name', 'Name', 'Age']),
+        (False, ['A', 'x', '1']),
+        (False, ['A', 'y', '2']),
+        (False, ['B', 'z', 'z']),
+    ]
+
+
+def test_rowspan_at_the_end_of_a_row():
+    assert [values for _, values in rows("""<table>
+        <tr><td>a</td><td rowspan="3">r</td></tr>
+        <tr><td>b</td></tr>
+        <tr><td>c</td></tr>
+    </table>""")] == [['a', 'r'], ['b', 'r'], ['c', 'r']]
+
+
+def test_rows_of_nested_tables_are_skipped():
+    assert [values for _, values in rows("""<table>
+        <tr><td>outer</td><td><table><tr><td>inner</td></tr></table></td></tr>
+        <tr><td>last</td><td>row</td></tr>
+    </table>""")] == [['outer', 'inner'], ['last', 'row']]
+
+
+def test_thead_rows_are_headers():
+    assert rows('<table><thead><tr><td>h</td></tr></thead><tr><td>v</td></tr></table>') == [
+        (True, ['h']), (False, ['v'])]
+
+
+def test_repeated_and_missing_header_names():
+    names, body = split_header(rows("""<table>
+        <tr><th>Price</th><th>Price</th><th></th><th>Price</th></tr>
+        <tr><td>1</td><td>2</td><td>3</td><td>4</td></tr>
+    </table>"""))
+    assert names == ['Price', 'Price_2', 'column_3', 'Price_3']
+    assert list(body) == [['1', '2', '3', '4']]
+
+
+def test_stacked_header_rows_are_joined():
+    names, _ = split_header(rows("""<table>
+        <tr><th colspan="2">Size</th></tr>
+        <tr><th>W</th><th>H</th></tr>
+        <tr><td>1</td><td>2</td></tr>
+    </table>"""))
+    assert names == ['Size / W', 'Size / H']
+
+
+def test_ndjson_keeps_cells_past_the_header():
+    lines = list(ndjson_lines(table("""<table>
+        <tr><th>a</th><th>column_3</th></tr>
+        <tr><td>1</td><td>2</td></tr>
+        <tr><td>1</td><td>2</td><td>3</td><td>4</td></tr>
+    </table>""")))
+    assert json.loads(lines[0]) == {'a': '1', 'column_3': '2'}
+    assert json.loads(lines[1]) == {'a': '1', 'column_3': '2', 'column_4': '3', 'column_5': '4'}
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('42', 42), ('-7', -7), ('+3', 3), ('0', 0), ('0.5', 0.5), ('.5', 0.5), ('1,234', 1234),
+    ('1,234.50', 1234.5), ('1 234', 1234), ('', None), ('  ', None),
+])
+def test_plain_numbers_parse(text, expected):
+    assert _parse_number(text) == expected
+
+
+@pytest.mark.parametrize('text', ['02134', '007', '00.5', '0,123', 'nan', 'inf', '1_000', '1e5', '1,00', '12a', '-', '.'])
+def test_everything_else_is_not_a_number(text):
+    with pytest.raises(ValueError):
+        _parse_number(text)
+
+
+def test_columnar_types():
+    result = columnar(table("""<table>
+        <tr><th>zip</th><th>count</th><th>price</th><th>name</th></tr>
+        <tr><td>02134</td><td>1,200</td><td>3.5</td><td>a</td></tr>
+        <tr><td>10001</td><td></td><td>4</td><td>5</td></tr>
+    </table>"""))
+    assert result['rows'] == 2
+    assert [(column['name'], column['type'], column['values']) for column in result['columns']] == [
+        ('zip', 'string', ['02134', '10001']),
+        ('count', 'int', [1200, None]),
+        ('price', 'float', [3.5, 4.0]),
+        ('name', 'string', ['a', '5']),
+    ]
+
+
+def test_columnar_grows_columns_for_wide_rows():
+    result = columnar(table('<table><tr><th>a</th></tr><tr><td>1</td></tr><tr><td>2</td><td>x</td></tr></table>'))
+    assert [(column['name'], column['values']) for column in result['columns']] == [
+        ('a', [1, 2]), ('column_2', ['', 'x'])]